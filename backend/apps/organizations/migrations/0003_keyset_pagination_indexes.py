@@ -0,0 +1,24 @@
+# Generated by Django 4.2.3 on 2026-10-17 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("organizations", "0002_invite"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="invite",
+            index=models.Index(fields=["organization", "created_at", "id"], name="organizatio_organiz_153c7d_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="organization",
+            index=models.Index(fields=["created_at", "id"], name="organizatio_created_31b889_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="organizationmembership",
+            index=models.Index(fields=["organization", "created_at", "id"], name="organizatio_organiz_2f5860_idx"),
+        ),
+    ]
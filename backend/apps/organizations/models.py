@@ -30,6 +30,8 @@ class Organization(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # Keyset pagination of list endpoints
+        indexes = [models.Index(fields=["created_at", "id"])]
         verbose_name = _("Organization")
         verbose_name_plural = _("Organizations")
 
@@ -79,6 +81,7 @@ class OrganizationMembership(models.Model):
     class Meta:
         unique_together = ["user", "organization"]
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["organization", "created_at", "id"])]
         verbose_name = _("Organization Membership")
         verbose_name_plural = _("Organization Memberships")
 
@@ -142,6 +145,7 @@ class Invite(models.Model):
     class Meta:
         unique_together = ["organization", "email"]
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["organization", "created_at", "id"])]
         verbose_name = _("Invitation")
         verbose_name_plural = _("Invitations")
 
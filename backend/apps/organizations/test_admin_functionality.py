@@ -271,7 +271,7 @@ class AdminRoleFunctionalityTest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Admin should see both URLs
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_editor_can_only_view_own_short_urls(self):
         """Test that editor can only view their own short URLs."""
@@ -293,7 +293,7 @@ class AdminRoleFunctionalityTest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Editor should only see their own URL (none in this case)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data['results']), 0)
 
     def test_admin_can_manage_members(self):
         """Test that admin can manage organization members."""
@@ -305,7 +305,7 @@ class AdminRoleFunctionalityTest(APITestCase):
         )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)  # admin, editor, viewer
+        self.assertEqual(len(response.data['results']), 3)  # admin, editor, viewer
 
     def test_editor_cannot_manage_members(self):
         """Test that editor cannot manage organization members."""
@@ -416,8 +416,8 @@ class AdminRoleFunctionalityTest(APITestCase):
         )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'test-namespace')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'test-namespace')
 
     def test_regular_user_cannot_access_organization(self):
         """Test that regular user cannot access organization they're not a member of."""
@@ -41,6 +41,7 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    max_page_size = settings.API_MAX_PAGE_SIZE
 
     def get_queryset(self):
         """Return organizations where user is a member."""
@@ -152,9 +153,9 @@ class OrganizationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        invites = organization.invites.all()
+        invites = self.paginate_queryset(organization.invites.all())
         serializer = InviteSerializer(invites, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, CanInviteMembers])
     def create_invite(self, request, pk=None):
@@ -237,7 +238,12 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         invite.delete()
         return Response({"detail": "Invite revoked successfully."}, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsOrganizationMember])
+    @action(
+        detail=True,
+        methods=['get'],
+        permission_classes=[permissions.IsAuthenticated, IsOrganizationMember],
+        max_page_size=settings.SHORT_URL_MAX_PAGE_SIZE
+    )
     def short_urls(self, request, pk=None):
         """Get all short URLs for an organization (Admin can see all, others see their own)."""
         organization = self.get_object()
@@ -250,13 +256,47 @@ class OrganizationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        from apps.urls.models import ShortURL
         from apps.urls.serializers import ShortURLSerializer
         
+        short_urls = self.paginate_queryset(
+            self._visible_short_urls(request, organization).select_related(
+                'namespace__organization', 'created_by'
+            )
+        )
+        serializer = ShortURLSerializer(short_urls, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsOrganizationMember])
+    def export_short_urls(self, request, pk=None):
+        """Stream the short URLs of an organization and their stats as CSV or NDJSON (?file_format=&gzip=true)."""
+        organization = self.get_object()
+        
+        # Check if user has access to this organization
+        permission = IsOrganizationMember()
+        if not permission.has_object_permission(request, None, organization):
+            return Response(
+                {"detail": "You don't have access to this organization."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        from apps.urls.exports import export_response
+        
+        return export_response(
+            self._visible_short_urls(request, organization),
+            request.query_params,
+            f"short-urls-{organization.pk}"
+        )
+
+    def _visible_short_urls(self, request, organization):
+        """Return the organization's short URLs the user may see (Admin sees all, others their own)."""
+        from apps.urls.models import ShortURL
+        from apps.urls.views import filter_by_expiry
+        
         # Get all short URLs in this organization
         short_urls = ShortURL.objects.filter(
             namespace__organization=organization
-        ).select_related('namespace', 'created_by').order_by('-created_at')
+        ).order_by('-created_at')
+        short_urls = filter_by_expiry(short_urls, request.query_params)
         
         # If user is not admin, filter to only show their own URLs
         is_admin = (
@@ -269,9 +309,26 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         
         if not is_admin:
             short_urls = short_urls.filter(created_by=request.user)
+        return short_urls
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsOrganizationMember])
+    def analytics(self, request, pk=None):
+        """Get the click time series of all namespaces in an organization (?start=&end=&bucket=day|week|month)."""
+        organization = self.get_object()
         
-        serializer = ShortURLSerializer(short_urls, many=True)
-        return Response(serializer.data)
+        # Check if user has access to this organization
+        permission = IsOrganizationMember()
+        if not permission.has_object_permission(request, None, organization):
+            return Response(
+                {"detail": "You don't have access to this organization."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        from apps.urls.analytics import NAMESPACE_BUCKETS, namespace_time_series, parse_time_series_params
+        
+        start, end, bucket = parse_time_series_params(request.query_params, NAMESPACE_BUCKETS)
+        namespace_ids = organization.namespaces.values_list('id', flat=True)
+        return Response(namespace_time_series(namespace_ids, start, end, bucket))
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsOrganizationMember])
     def namespaces(self, request, pk=None):
@@ -290,12 +347,12 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         from apps.urls.serializers import NamespaceSerializer
         
         # Get all namespaces in this organization
-        namespaces = Namespace.objects.filter(
+        namespaces = self.paginate_queryset(Namespace.objects.filter(
             organization=organization
-        ).order_by('-created_at')
+        ))
         
         serializer = NamespaceSerializer(namespaces, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     def _send_invitation_email(self, invite):
         """Send invitation email to the invitee."""
@@ -4,8 +4,15 @@ URL admin.
 Moved from apps.links.admin - handles namespace and short URL admin interface.
 """
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
-from .models import Namespace, ShortURL
+from .hotlinks import top_hot_links
+from .models import BulkActionJob, ClickEvent, Destination, ImportJob, Namespace, ShortURL
+
+# Hot links listed on the admin hot links page
+HOT_LINKS_SHOWN = 100
 
 
 @admin.register(Namespace)
@@ -25,7 +32,43 @@ class ShortURLAdmin(admin.ModelAdmin):
     list_display = ["short_code", "namespace", "original_url", "created_by", "click_count", "is_active", "created_at"]
     list_filter = ["is_active", "created_at", "namespace__organization"]
     search_fields = ["short_code", "original_url", "title", "created_by__email"]
-    readonly_fields = ["id", "click_count", "created_at", "updated_at", "full_short_url"]
+    readonly_fields = [
+        "id", "destination", "click_count", "click_shards", "unique_visitors", "created_at", "updated_at",
+        "full_short_url"
+    ]
+    change_list_template = "admin/urls/shorturl/change_list.html"
+
+    def get_urls(self):
+        return [
+            path(
+                "hot-links/",
+                self.admin_site.admin_view(self.hot_links_view),
+                name="urls_shorturl_hot_links"
+            ),
+        ] + super().get_urls()
+
+    def hot_links_view(self, request):
+        """List the currently hottest short URLs across workers."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        hottest = top_hot_links(HOT_LINKS_SHOWN)
+        short_urls = {
+            (short_url.namespace.name, short_url.short_code): short_url
+            for short_url in ShortURL.objects.filter(
+                namespace__name__in={namespace_name for namespace_name, _, _ in hottest},
+                short_code__in={short_code for _, short_code, _ in hottest}
+            ).select_related("namespace")
+        }
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Hot links",
+            "opts": self.model._meta,
+            "hot_links": [
+                (namespace_name, short_code, score, short_urls.get((namespace_name, short_code)))
+                for namespace_name, short_code, score in hottest
+            ],
+        }
+        return TemplateResponse(request, "admin/urls/shorturl/hot_links.html", context)
     
     def full_short_url(self, obj):
         if obj.pk:
@@ -35,4 +78,41 @@ class ShortURLAdmin(admin.ModelAdmin):
                 obj.get_full_short_url()
             )
         return "-"
-    full_short_url.short_description = "Full Short URL"
\ No newline at end of file
+    full_short_url.short_description = "Full Short URL"
+
+
+@admin.register(ClickEvent)
+class ClickEventAdmin(admin.ModelAdmin):
+    list_display = ["short_url", "clicked_at", "country", "referrer"]
+    list_filter = ["clicked_at", "country"]
+    search_fields = ["short_url__short_code", "referrer"]
+    readonly_fields = ["id", "short_url", "clicked_at", "referrer", "user_agent", "ip_hash", "country"]
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "namespace", "status", "rows_processed", "rows_created", "rows_failed", "created_at"]
+    list_filter = ["status", "format", "created_at"]
+    search_fields = ["namespace__name", "created_by__email"]
+    readonly_fields = [
+        "id", "namespace", "created_by", "file", "format", "status", "rows_processed", "rows_created",
+        "rows_failed", "errors", "error", "created_at", "started_at", "finished_at"
+    ]
+
+
+@admin.register(BulkActionJob)
+class BulkActionJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "namespace", "operation", "status", "rows_matched", "rows_affected", "created_at"]
+    list_filter = ["status", "operation", "created_at"]
+    search_fields = ["namespace__name", "created_by__email"]
+    readonly_fields = [
+        "id", "namespace", "created_by", "operation", "filters", "expiry_date", "status", "rows_matched",
+        "rows_affected", "error", "created_at", "started_at", "finished_at"
+    ]
+
+
+@admin.register(Destination)
+class DestinationAdmin(admin.ModelAdmin):
+    list_display = ["url", "created_at"]
+    search_fields = ["url"]
+    readonly_fields = ["id", "url", "url_hash", "created_at"]
@@ -0,0 +1,198 @@
+"""
+Short code allocation.
+
+Generated short codes come from a per-namespace counter: every new link takes
+the next index, so two links never draw the same code. Indices are turned into
+codes by a keyed Feistel permutation and base62, which makes consecutive links
+look unrelated without giving up uniqueness.
+
+Indices fill codes of SHORT_URL_CODE_MIN_LENGTH characters first, then one
+character longer and so on, so codes grow as a namespace fills. Each length
+has its own permutation of [0, 62^length), walked in cycles until it lands
+inside that range.
+
+Each process leases blocks of SHORT_URL_CODE_BLOCK_SIZE indices and hands
+them out without a round trip. A block only becomes usable once the
+transaction that reserved it commits, so a rolled back reservation is never
+handed out twice; until then every allocation in that transaction reserves
+its own block. Indices left in a block when a process exits are skipped.
+
+Codes can still collide with custom (vanity) codes and with codes generated
+before this allocator existed; ShortURL.save() catches the IntegrityError and
+allocates again.
+"""
+import hashlib
+import os
+import string
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import ShortCodeCounter
+
+ALPHABET = string.digits + string.ascii_letters
+BASE = len(ALPHABET)
+FEISTEL_ROUNDS = 4
+
+
+def _derive_key():
+    secret = settings.SHORT_URL_CODE_KEY or settings.SECRET_KEY
+    return hashlib.blake2b(secret.encode(), digest_size=32, person=b"short-codes").digest()
+
+
+class FeistelPermutation:
+    """Keyed pseudo-random permutation of [0, BASE^length) for each code length."""
+
+    def __init__(self, key):
+        self.key = key
+
+    def _round_value(self, tweak, length, round_number, value, bits):
+        digest = hashlib.blake2b(
+            b"%s:%d:%d:%d" % (tweak, length, round_number, value),
+            key=self.key,
+            digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big") & ((1 << bits) - 1)
+
+    def _encrypt(self, value, tweak, length, half_bits):
+        mask = (1 << half_bits) - 1
+        left, right = value >> half_bits, value & mask
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round_value(tweak, length, round_number, right, half_bits)
+        return (left << half_bits) | right
+
+    def permute(self, value, length, tweak=b""):
+        """
+        Map an offset to another offset of the same code length.
+
+        Args:
+            value: Offset in [0, BASE^length)
+            length: Code length
+            tweak: Bytes that select a different permutation (the namespace)
+
+        Returns:
+            int: The permuted offset, unique for each input offset
+        """
+        domain = BASE ** length
+        # A balanced network over the smallest even bit width covering the domain
+        half_bits = ((domain - 1).bit_length() + 1) // 2
+        value = self._encrypt(value, tweak, length, half_bits)
+        while value >= domain:
+            value = self._encrypt(value, tweak, length, half_bits)
+        return value
+
+
+def encode(number, length):
+    """Encode a number in base62, left-padded to the given length."""
+    characters = []
+    for _ in range(length):
+        number, remainder = divmod(number, BASE)
+        characters.append(ALPHABET[remainder])
+    return "".join(reversed(characters))
+
+
+def split_index(index, min_length):
+    """
+    Find the code length an allocation index falls into.
+
+    Returns:
+        tuple: (code length, offset within the codes of that length)
+    """
+    length = min_length
+    while index >= BASE ** length:
+        index -= BASE ** length
+        length += 1
+    return length, index
+
+
+def code_for_index(namespace_id, index, permutation=None):
+    """Return the short code of an allocation index in a namespace."""
+    permutation = permutation or FeistelPermutation(_derive_key())
+    length, offset = split_index(index, settings.SHORT_URL_CODE_MIN_LENGTH)
+    return encode(permutation.permute(offset, length, str(namespace_id).encode()), length)
+
+
+def reserve_indices(namespace_id, count=1):
+    """
+    Atomically take the next ``count`` allocation indices of a namespace.
+
+    Returns:
+        int: The first reserved index
+    """
+    table = connection.ops.quote_name(ShortCodeCounter._meta.db_table)
+    namespace_field = ShortCodeCounter._meta.get_field("namespace")
+    namespace_column = connection.ops.quote_name(namespace_field.column)
+    allocated = connection.ops.quote_name(ShortCodeCounter._meta.get_field("allocated").column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({namespace_column}, {allocated}) VALUES (%s, %s) "
+            f"ON CONFLICT ({namespace_column}) DO UPDATE SET {allocated} = {table}.{allocated} + EXCLUDED.{allocated} "
+            f"RETURNING {allocated}",
+            [namespace_field.get_db_prep_value(namespace_id, connection), count]
+        )
+        return cursor.fetchone()[0] - count
+
+
+class BlockLeases:
+    """Blocks of allocation indices leased to this process, per namespace."""
+
+    def __init__(self):
+        self._blocks = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # A forked worker must not hand out the indices its parent leased
+        if self._pid != os.getpid():
+            self._blocks.clear()
+            self._pid = os.getpid()
+
+    def take(self, namespace_id):
+        """Return the next leased index of a namespace, or None if none is left."""
+        with self._lock:
+            self._check_fork()
+            block = self._blocks.get(namespace_id)
+            if block is None:
+                return None
+            index, end = block
+            if index + 1 < end:
+                self._blocks[namespace_id] = (index + 1, end)
+            else:
+                del self._blocks[namespace_id]
+            return index
+
+    def lease(self, namespace_id, start, end):
+        """Make the indices [start, end) of a namespace available to this process."""
+        if start >= end:
+            return
+        with self._lock:
+            self._check_fork()
+            # The rest of a block leased concurrently by another thread is skipped
+            self._blocks[namespace_id] = (start, end)
+
+    def clear(self):
+        """Forget every leased block."""
+        with self._lock:
+            self._blocks.clear()
+
+
+leases = BlockLeases()
+
+
+def allocate_short_code(namespace_id):
+    """Allocate a short code no other generated link in the namespace has."""
+    index = leases.take(namespace_id)
+    if index is None:
+        block_size = max(1, settings.SHORT_URL_CODE_BLOCK_SIZE)
+        index = reserve_indices(namespace_id, block_size)
+        transaction.on_commit(partial(leases.lease, namespace_id, index + 1, index + block_size))
+    return code_for_index(namespace_id, index)
+
+
+def allocate_short_codes(namespace_id, count):
+    """Allocate ``count`` short codes with a single reservation (for bulk creation)."""
+    start = reserve_indices(namespace_id, count)
+    permutation = FeistelPermutation(_derive_key())
+    return [code_for_index(namespace_id, index, permutation) for index in range(start, start + count)]
@@ -0,0 +1,315 @@
+"""
+Click analytics.
+
+Click events are rolled up per short URL per UTC hour and per namespace per
+UTC day as they are flushed (see events.flush_click_events), so time series
+are read from a handful of rollup rows instead of scanning raw events. Each
+rollup row and each short URL also keeps a HyperLogLog sketch of hashed
+visitors (client IP hash and user agent), merged across buckets to estimate
+unique visitors over any range. The rebuild_click_rollups command recomputes
+the rollups from ClickEvent.
+"""
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .hyperloglog import HyperLogLog, visitor_hash
+from .models import ClickEvent, DailyNamespaceClickRollup, HourlyClickRollup, ShortURL
+
+UTC = datetime.timezone.utc
+LINK_BUCKETS = ("hour", "day", "week", "month")
+NAMESPACE_BUCKETS = ("day", "week", "month")
+# Longest series an analytics request may ask for
+MAX_BUCKETS = 2000
+DEFAULT_RANGE = datetime.timedelta(days=7)
+REBUILD_BATCH_SIZE = 10000
+
+
+def _hour(value):
+    return value.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+
+
+def _upsert_clicks(model, key_fields, counts):
+    """Add click counts to rollup rows, creating rows that do not exist yet."""
+    if not counts:
+        return
+    key_fields = [model._meta.get_field(name) for name in key_fields]
+    clicks_field = model._meta.get_field("clicks")
+    # Every other column gets its model default; existing rows keep their values
+    other_fields = [
+        field for field in model._meta.concrete_fields
+        if field not in key_fields and field is not clicks_field
+    ]
+    fields = key_fields + [clicks_field] + other_fields
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [connection.ops.quote_name(field.column) for field in fields]
+    key_columns = ", ".join(columns[:len(key_fields)])
+    clicks_column = columns[len(key_fields)]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({key_columns}) DO UPDATE "
+        f"SET {clicks_column} = {table}.{clicks_column} + EXCLUDED.{clicks_column}"
+    )
+    params = []
+    for key, clicks in counts.items():
+        values = [*key, clicks] + [field.get_default() for field in other_fields]
+        params.append([
+            field.get_db_prep_value(value, connection) for field, value in zip(fields, values)
+        ])
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _add_visitors(rows, key, field, hashes):
+    """
+    Add visitor hashes to the sketches of rollup rows.
+
+    Returns:
+        list: (row, merged sketch) pairs for the rows whose sketch changed
+    """
+    changed = []
+    for row in rows:
+        new = hashes.get(key(row))
+        if not new:
+            continue
+        sketch = HyperLogLog.from_bytes(getattr(row, field))
+        for value in new:
+            sketch.add_hash(value)
+        setattr(row, field, sketch.to_bytes())
+        changed.append((row, sketch))
+    return changed
+
+
+def record_click_rollups(rows, namespace_ids):
+    """
+    Add freshly written click events to the rollup tables and visitor sketches.
+
+    Must run inside the transaction that writes the events; sketch rows are
+    locked while they are merged.
+
+    Args:
+        rows: ClickEvent column tuples as written by events.write_click_events
+        namespace_ids: Mapping of short URL pk to namespace pk
+    """
+    hourly = Counter()
+    daily = Counter()
+    hourly_visitors = defaultdict(set)
+    daily_visitors = defaultdict(set)
+    link_visitors = defaultdict(set)
+    for _, short_url_id, clicked_at, _, user_agent, ip_hash, _ in rows:
+        hour = _hour(clicked_at)
+        day_key = (namespace_ids[short_url_id], hour.date())
+        hourly[(short_url_id, hour)] += 1
+        daily[day_key] += 1
+        visitor = visitor_hash(ip_hash, user_agent)
+        if visitor is not None:
+            hourly_visitors[(short_url_id, hour)].add(visitor)
+            daily_visitors[day_key].add(visitor)
+            link_visitors[short_url_id].add(visitor)
+    _upsert_clicks(HourlyClickRollup, ("short_url", "hour"), hourly)
+    _upsert_clicks(DailyNamespaceClickRollup, ("namespace", "day"), daily)
+    if not link_visitors:
+        return
+
+    rollups = HourlyClickRollup.objects.select_for_update().filter(
+        short_url_id__in={short_url_id for short_url_id, _ in hourly_visitors},
+        hour__in={hour for _, hour in hourly_visitors}
+    ).only("short_url", "hour", "visitors").order_by("pk")
+    changed = _add_visitors(rollups, lambda row: (row.short_url_id, row.hour), "visitors", hourly_visitors)
+    HourlyClickRollup.objects.bulk_update([row for row, _ in changed], ["visitors"], batch_size=1000)
+
+    rollups = DailyNamespaceClickRollup.objects.select_for_update().filter(
+        namespace_id__in={namespace_id for namespace_id, _ in daily_visitors},
+        day__in={day for _, day in daily_visitors}
+    ).only("namespace", "day", "visitors").order_by("pk")
+    changed = _add_visitors(rollups, lambda row: (row.namespace_id, row.day), "visitors", daily_visitors)
+    DailyNamespaceClickRollup.objects.bulk_update([row for row, _ in changed], ["visitors"], batch_size=1000)
+
+    short_urls = ShortURL.objects.select_for_update().filter(
+        pk__in=link_visitors
+    ).only("visitor_sketch", "unique_visitors").order_by("pk")
+    changed = _add_visitors(short_urls, lambda row: row.pk, "visitor_sketch", link_visitors)
+    for short_url, sketch in changed:
+        short_url.unique_visitors = sketch.count()
+    ShortURL.objects.bulk_update(
+        [short_url for short_url, _ in changed],
+        ["visitor_sketch", "unique_visitors"],
+        batch_size=1000
+    )
+
+
+def _rebuild_batch(batch):
+    namespace_ids = {row[1]: row[7] for row in batch}
+    # Visitor sketches ignore visitors they already hold, so re-adding to link sketches is harmless
+    record_click_rollups([row[:7] for row in batch], namespace_ids)
+    return len(batch)
+
+
+def rebuild_click_rollups(since=None, until=None):
+    """
+    Recompute rollups from raw click events for the UTC days in [since, until).
+
+    Run it over closed ranges or with the event flusher paused; clicks
+    flushed for the same days while it runs may be counted twice or lost.
+
+    Args:
+        since: First date to rebuild, or None for the oldest event
+        until: Date to stop before, or None for no limit
+
+    Returns:
+        int: Number of click events rolled up
+    """
+    events = ClickEvent.objects.all()
+    hourly_rollups = HourlyClickRollup.objects.all()
+    daily_rollups = DailyNamespaceClickRollup.objects.all()
+    if since is not None:
+        start = datetime.datetime.combine(since, datetime.time(), UTC)
+        events = events.filter(clicked_at__gte=start)
+        hourly_rollups = hourly_rollups.filter(hour__gte=start)
+        daily_rollups = daily_rollups.filter(day__gte=since)
+    if until is not None:
+        end = datetime.datetime.combine(until, datetime.time(), UTC)
+        events = events.filter(clicked_at__lt=end)
+        hourly_rollups = hourly_rollups.filter(hour__lt=end)
+        daily_rollups = daily_rollups.filter(day__lt=until)
+
+    rolled_up = 0
+    with transaction.atomic():
+        hourly_rollups.delete()
+        daily_rollups.delete()
+        rows = events.values_list(
+            "id", "short_url", "clicked_at", "referrer", "user_agent", "ip_hash", "country",
+            "short_url__namespace"
+        ).order_by()
+        batch = []
+        for row in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(row)
+            if len(batch) == REBUILD_BATCH_SIZE:
+                rolled_up += _rebuild_batch(batch)
+                batch = []
+        rolled_up += _rebuild_batch(batch)
+    return rolled_up
+
+
+def _parse_bound(value, name, end=False):
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        # A bare end date includes that whole day
+        moment = datetime.datetime.combine(day + datetime.timedelta(days=int(end)), datetime.time(), UTC)
+    if moment is None:
+        raise ValidationError({name: "Must be an ISO 8601 date or datetime."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, UTC)
+    return moment
+
+
+def _bucket_start(value, bucket):
+    """Truncate a datetime or date to the start of its bucket, as a UTC datetime."""
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time(), UTC)
+    value = _hour(value)
+    if bucket == "hour":
+        return value
+    value = value.replace(hour=0)
+    if bucket == "week":
+        return value - datetime.timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+
+def _next_bucket(value, bucket):
+    if bucket == "hour":
+        return value + datetime.timedelta(hours=1)
+    if bucket == "day":
+        return value + datetime.timedelta(days=1)
+    if bucket == "week":
+        return value + datetime.timedelta(weeks=1)
+    return (value + datetime.timedelta(days=32)).replace(day=1)
+
+
+def parse_time_series_params(query_params, buckets):
+    """
+    Read start, end and bucket from analytics query parameters.
+
+    Returns:
+        tuple: (start, end, bucket) with start and end as aware UTC datetimes
+    """
+    bucket = query_params.get("bucket", "day")
+    if bucket not in buckets:
+        raise ValidationError({"bucket": f"Must be one of: {', '.join(buckets)}."})
+    end = query_params.get("end")
+    end = _parse_bound(end, "end", end=True) if end else timezone.now()
+    start = query_params.get("start")
+    start = _parse_bound(start, "start") if start else end - DEFAULT_RANGE
+    if start >= end:
+        raise ValidationError({"start": "Must be before end."})
+
+    start = _bucket_start(start, bucket)
+    count, moment = 0, start
+    while moment < end:
+        count += 1
+        if count > MAX_BUCKETS:
+            raise ValidationError({"bucket": f"The range covers more than {MAX_BUCKETS} buckets."})
+        moment = _next_bucket(moment, bucket)
+    return start, end, bucket
+
+
+def _series(rows, start, end, bucket):
+    """Turn (bucket value, clicks, visitor sketch) rows into a zero-filled series."""
+    clicks = Counter()
+    visitors = defaultdict(HyperLogLog)
+    for value, count, sketch in rows:
+        moment = _bucket_start(value, bucket)
+        clicks[moment] += count
+        if sketch:
+            visitors[moment].update(sketch)
+    total_visitors = HyperLogLog()
+    series = []
+    moment = start
+    while moment < end:
+        sketch = visitors.get(moment)
+        if sketch is not None:
+            total_visitors.merge(sketch)
+        series.append({
+            "start": moment.isoformat(),
+            "clicks": clicks.get(moment, 0),
+            "unique_visitors": sketch.count() if sketch is not None else 0,
+        })
+        moment = _next_bucket(moment, bucket)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket": bucket,
+        "total": sum(point["clicks"] for point in series),
+        "unique_visitors": total_visitors.count(),
+        "series": series,
+    }
+
+
+def link_time_series(short_url_ids, start, end, bucket):
+    """Click and unique visitor time series of some short URLs, read from the hourly rollups."""
+    rows = HourlyClickRollup.objects.filter(
+        short_url_id__in=short_url_ids,
+        hour__gte=start,
+        hour__lt=end
+    ).values_list("hour", "clicks", "visitors")
+    return _series(rows.iterator(), start, end, bucket)
+
+
+def namespace_time_series(namespace_ids, start, end, bucket):
+    """Click and unique visitor time series of some namespaces, read from the daily rollups."""
+    rows = DailyNamespaceClickRollup.objects.filter(
+        namespace_id__in=namespace_ids,
+        day__gte=start.date(),
+        day__lt=(end - datetime.timedelta(microseconds=1)).date() + datetime.timedelta(days=1)
+    ).values_list("day", "clicks", "visitors")
+    return _series(rows.iterator(), start, end, bucket)
@@ -5,3 +5,6 @@ class UrlsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.urls"
     verbose_name = "URLs"
+
+    def ready(self):
+        import apps.urls.signals  # noqa: F401
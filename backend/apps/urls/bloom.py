@@ -0,0 +1,163 @@
+"""
+Bloom filter of existing short codes.
+
+Answers "does this (namespace name, short code) definitely not exist?" without
+a database query, so redirects for codes that never existed and uniqueness
+checks for new codes skip the database. A false positive only costs the query
+that would have run anyway.
+
+Every saved short code is added through the post_save signal, once right away
+and again when its transaction commits, since a rebuild running in between
+replaces the bitmap without seeing the uncommitted row. Deleted codes stay in
+the filter until the next rebuild. Writes that bypass signals (bulk_create,
+QuerySet.update of short_code) must call add_on_commit() themselves.
+
+The filter is one Redis bitmap shared by every process, so it needs
+django-redis; with any other cache backend it is disabled and every code
+"might exist". Bit 0 marks a completely built filter, so a missing or evicted
+bitmap reads as "unknown" rather than "absent".
+"""
+import hashlib
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from .models import ShortURL
+from .redis_client import get_async_redis_client, get_redis_client
+
+BLOOM_KEY_PREFIX = "urls:bloom"
+# Rows saved this long before a rebuild started are re-added after it, to cover
+# transactions that committed while the rebuild was reading
+REBUILD_OVERLAP = timedelta(minutes=5)
+BUILT_BIT = 0
+
+
+class BloomFilter:
+    """Sizing and bit positions of a Bloom filter over (namespace name, short code) pairs."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+
+    def positions(self, namespace_name, short_code):
+        """Return the bit offsets for a pair (bit 0 is reserved for the built flag)."""
+        digest = hashlib.blake2b(f"{namespace_name}\0{short_code}".encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [1 + (first + i * second) % self.size for i in range(self.hashes)]
+
+    def empty_bitmap(self):
+        """Return a zeroed bitmap in Redis bit order (bit 0 is the high bit of byte 0)."""
+        return bytearray((self.size + 1 + 7) // 8)
+
+
+def _set_bit(bitmap, position):
+    bitmap[position >> 3] |= 0x80 >> (position & 7)
+
+
+class ShortCodeFilter:
+    """Bloom filter of existing short codes, kept in Redis."""
+
+    def __init__(self, capacity, error_rate):
+        self.enabled = capacity > 0
+        self.bloom = BloomFilter(max(capacity, 1), error_rate)
+        # Sizing is part of the key so changing it reads as "not built"
+        self.key = f"{BLOOM_KEY_PREFIX}:{self.bloom.size}:{self.bloom.hashes}"
+
+    def might_contain(self, namespace_name, short_code):
+        """
+        Check whether a short code may exist.
+
+        Returns:
+            bool: False only if the pair definitely does not exist
+        """
+        client = get_redis_client()
+        if not self.enabled or client is None:
+            # A per-process filter would miss codes created by other processes
+            return True
+        pipeline = client.pipeline(transaction=False)
+        for position in [BUILT_BIT] + self.bloom.positions(namespace_name, short_code):
+            pipeline.getbit(self.key, position)
+        try:
+            built, *bits = pipeline.execute()
+        except RedisError:
+            return True
+        return not built or all(bits)
+
+    async def amight_contain(self, namespace_name, short_code):
+        """Async might_contain() for the ASGI redirect view."""
+        client = get_async_redis_client()
+        if not self.enabled or client is None:
+            return self.might_contain(namespace_name, short_code)
+        pipeline = client.pipeline(transaction=False)
+        for position in [BUILT_BIT] + self.bloom.positions(namespace_name, short_code):
+            pipeline.getbit(self.key, position)
+        try:
+            built, *bits = await pipeline.execute()
+        except RedisError:
+            return True
+        return not built or all(bits)
+
+    def add(self, pairs):
+        """Add (namespace name, short code) pairs to the filter."""
+        client = get_redis_client()
+        if not self.enabled or client is None:
+            return
+        pipeline = client.pipeline(transaction=False)
+        for namespace_name, short_code in pairs:
+            for position in self.bloom.positions(namespace_name, short_code):
+                pipeline.setbit(self.key, position, 1)
+        try:
+            pipeline.execute()
+        except RedisError:
+            pass
+
+    def add_on_commit(self, pairs):
+        """Add pairs now and again once the transaction commits."""
+        pairs = list(pairs)
+        self.add(pairs)
+        transaction.on_commit(lambda: self.add(pairs))
+
+    def rebuild(self):
+        """
+        Rebuild the filter from the database, dropping codes that were deleted.
+
+        Returns:
+            int: Number of short codes in the filter, or None when it is
+            disabled or there is no Redis to keep it in
+        """
+        client = get_redis_client()
+        if not self.enabled or client is None:
+            return None
+        started = timezone.now()
+        bitmap, count = self._build_bitmap()
+        building_key = f"{self.key}:building"
+        client.set(building_key, bytes(bitmap))
+        client.rename(building_key, self.key)
+        since = started - REBUILD_OVERLAP
+        self.add(ShortURL.objects.filter(
+            Q(updated_at__gte=since) | Q(namespace__updated_at__gte=since)
+        ).values_list("namespace__name", "short_code"))
+        return count
+
+    def _build_bitmap(self):
+        bitmap = self.bloom.empty_bitmap()
+        count = 0
+        pairs = ShortURL.objects.values_list("namespace__name", "short_code").iterator(chunk_size=10000)
+        for namespace_name, short_code in pairs:
+            for position in self.bloom.positions(namespace_name, short_code):
+                _set_bit(bitmap, position)
+            count += 1
+        _set_bit(bitmap, BUILT_BIT)
+        return bitmap, count
+
+
+short_code_filter = ShortCodeFilter(
+    capacity=settings.SHORT_URL_BLOOM_CAPACITY,
+    error_rate=settings.SHORT_URL_BLOOM_ERROR_RATE,
+)
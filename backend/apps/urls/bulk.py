@@ -0,0 +1,204 @@
+"""
+Bulk short URL creation.
+
+Creates thousands of short URLs with a fixed number of queries instead of a
+handful per link: entries are validated in memory, permission is checked once
+per distinct namespace, generated codes are allocated with one reservation
+per namespace, taken codes are found with one query per chunk and the rows
+are inserted with bulk_create. Entries with reuse_existing are matched to
+existing links with one query per chunk. Each entry gets its own result, so
+one bad entry does not fail the rest.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from .allocator import allocate_short_codes
+from .bloom import short_code_filter
+from .cache import invalidate_short_urls_on_commit
+from .destinations import destination_hash, get_destinations
+from .models import Namespace, ShortURL
+
+BULK_CHUNK_SIZE = 1000
+TAKEN_CODE_ERROR = "Short code must be unique within the namespace."
+
+
+def _taken_codes(codes_by_namespace):
+    """Return the (namespace id, short code) pairs that already exist."""
+    pairs = [(namespace_id, code) for namespace_id, codes in codes_by_namespace.items() for code in codes]
+    taken = set()
+    for start in range(0, len(pairs), BULK_CHUNK_SIZE):
+        condition = Q()
+        chunk = defaultdict(list)
+        for namespace_id, code in pairs[start:start + BULK_CHUNK_SIZE]:
+            chunk[namespace_id].append(code)
+        for namespace_id, codes in chunk.items():
+            condition |= Q(namespace_id=namespace_id, short_code__in=codes)
+        taken.update(ShortURL.objects.filter(condition).values_list("namespace_id", "short_code"))
+    return taken
+
+
+def _custom_codes(entries):
+    """Group the custom codes of entries by namespace id."""
+    codes = defaultdict(list)
+    for entry in entries:
+        if entry["data"].get("short_code"):
+            codes[entry["instance"].namespace_id].append(entry["data"]["short_code"])
+    return codes
+
+
+def _assign_generated_codes(entries, taken):
+    """Allocate codes for entries without one, re-allocating codes that are taken."""
+    pending = [entry for entry in entries if not entry["data"].get("short_code")]
+    while pending:
+        by_namespace = defaultdict(list)
+        for entry in pending:
+            by_namespace[entry["data"]["namespace"]].append(entry)
+        for namespace_id, namespace_entries in by_namespace.items():
+            codes = allocate_short_codes(namespace_id, len(namespace_entries))
+            for entry, code in zip(namespace_entries, codes):
+                entry["instance"].short_code = code
+        # Generated codes can only clash with custom or legacy codes
+        taken |= _taken_codes({
+            namespace_id: [entry["instance"].short_code for entry in namespace_entries]
+            for namespace_id, namespace_entries in by_namespace.items()
+        })
+        pending = [
+            entry for entry in pending
+            if (entry["instance"].namespace_id, entry["instance"].short_code) in taken
+        ]
+
+
+def _find_reusable(entries):
+    """Point entries that asked to reuse a link at the oldest existing one for their URL."""
+    wanted = defaultdict(list)
+    for entry in entries:
+        if entry["data"].get("reuse_existing") and not entry["data"].get("short_code"):
+            instance = entry["instance"]
+            wanted[(instance.namespace_id, destination_hash(instance.original_url))].append(entry)
+    keys = list(wanted)
+    for start in range(0, len(keys), BULK_CHUNK_SIZE):
+        condition = Q()
+        chunk = defaultdict(list)
+        for namespace_id, url_hash in keys[start:start + BULK_CHUNK_SIZE]:
+            chunk[namespace_id].append(url_hash)
+        for namespace_id, url_hashes in chunk.items():
+            condition |= Q(namespace_id=namespace_id, destination__url_hash__in=url_hashes)
+        existing = (
+            ShortURL.objects.filter(condition, is_active=True).unexpired()
+            .select_related("namespace", "destination").order_by("-created_at")
+        )
+        for short_url in existing:
+            for entry in wanted[(short_url.namespace_id, short_url.destination.url_hash)]:
+                entry["existing"] = short_url
+
+
+def _insert(entries):
+    """Insert entries in chunks, falling back to one savepoint per row on a race."""
+    for start in range(0, len(entries), BULK_CHUNK_SIZE):
+        chunk = entries[start:start + BULK_CHUNK_SIZE]
+        try:
+            with transaction.atomic():
+                ShortURL.objects.bulk_create([entry["instance"] for entry in chunk])
+        except IntegrityError:
+            # A concurrent request took one of the codes after they were checked
+            for entry in chunk:
+                if not entry["data"].get("short_code"):
+                    # Let save() allocate and retry generated codes itself
+                    entry["instance"].short_code = ""
+                try:
+                    entry["instance"].save()
+                except ValidationError as error:
+                    entry["errors"] = error.message_dict
+
+
+def bulk_create_short_urls(items, user, serializer_class, can_manage):
+    """
+    Create short URLs from a list of entries.
+
+    Args:
+        items: Entry dicts in the format of ShortURLCreateSerializer
+        user: User recorded as the creator
+        serializer_class: Serializer validating one entry; its namespace field
+            must be a plain id so validation does not query per entry
+        can_manage: Callable (namespace) -> bool checked once per namespace
+
+    Returns:
+        list: Per-entry results, in input order
+    """
+    # One serializer validates every entry, so its fields are only built once
+    serializer = serializer_class()
+    entries = []
+    for index, item in enumerate(items):
+        entry = {"index": index, "data": None, "instance": None, "errors": None, "existing": None}
+        try:
+            entry["data"] = serializer.run_validation(item)
+        except serializers.ValidationError as error:
+            entry["errors"] = error.detail
+        entries.append(entry)
+    valid = [entry for entry in entries if entry["errors"] is None]
+
+    namespaces = Namespace.objects.select_related("organization").in_bulk(
+        {entry["data"]["namespace"] for entry in valid}
+    )
+    allowed = {pk for pk, namespace in namespaces.items() if can_manage(namespace)}
+    seen = set()
+    for entry in valid:
+        data = entry["data"]
+        namespace = namespaces.get(data["namespace"])
+        if namespace is None:
+            entry["errors"] = {"namespace": ["Namespace not found."]}
+        elif namespace.pk not in allowed:
+            entry["errors"] = {"namespace": ["Only organization admins and editors can create short URLs."]}
+        elif data.get("short_code") and (namespace.pk, data["short_code"]) in seen:
+            entry["errors"] = {"short_code": ["Short code is repeated in this request."]}
+        else:
+            if data.get("short_code"):
+                seen.add((namespace.pk, data["short_code"]))
+            fields = {key: value for key, value in data.items() if key != "reuse_existing"}
+            entry["instance"] = ShortURL(
+                **{**fields, "namespace": namespace, "short_code": data.get("short_code", "")},
+                created_by=user
+            )
+    valid = [entry for entry in valid if entry["errors"] is None]
+    _find_reusable(valid)
+    valid = [entry for entry in valid if entry["existing"] is None]
+
+    taken = _taken_codes(_custom_codes(valid))
+    for entry in valid:
+        short_code = entry["data"].get("short_code")
+        if short_code and (entry["instance"].namespace_id, short_code) in taken:
+            entry["errors"] = {"short_code": [TAKEN_CODE_ERROR]}
+    valid = [entry for entry in valid if entry["errors"] is None]
+    _assign_generated_codes(valid, taken)
+    destinations = get_destinations({entry["instance"].original_url for entry in valid})
+    for entry in valid:
+        entry["instance"].destination = destinations[entry["instance"].original_url]
+    _insert(valid)
+
+    created = defaultdict(list)
+    for entry in valid:
+        if entry["errors"] is None:
+            created[entry["instance"].namespace].append(entry["instance"].short_code)
+    for namespace, short_codes in created.items():
+        # bulk_create skips the post_save handlers that keep the filter and caches in sync
+        short_code_filter.add_on_commit([(namespace.name, code) for code in short_codes])
+        invalidate_short_urls_on_commit(namespace.name, short_codes)
+
+    results = []
+    for entry in entries:
+        if entry["errors"] is None:
+            instance = entry["existing"] or entry["instance"]
+            results.append({
+                "index": entry["index"],
+                "status": "created" if entry["existing"] is None else "reused",
+                "id": str(instance.pk),
+                "short_code": instance.short_code,
+                "full_short_url": instance.get_full_short_url(),
+            })
+        else:
+            results.append({"index": entry["index"], "status": "error", "errors": entry["errors"]})
+    return results
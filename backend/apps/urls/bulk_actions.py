@@ -0,0 +1,158 @@
+"""
+Bulk short URL actions.
+
+Activates, deactivates, sets the expiry date of or deletes every short URL of
+a namespace that matches a filter, after one permission check on the
+namespace instead of one per link. Updates run as a single UPDATE that skips
+save() and clean(); deletes run in chunks of SHORT_URL_BULK_ACTION_CHUNK_SIZE.
+The cached resolutions of the affected links are invalidated in one batch per
+statement.
+
+Actions matching more than SHORT_URL_BULK_ACTION_SYNC_LIMIT links run as a
+BulkActionJob in the background instead, one chunk per transaction, so no
+request or lock is held for long.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_short_urls_on_commit
+from .models import BulkActionJob, ImportJob, ShortURL, ShortURLQuerySet
+
+logger = logging.getLogger(__name__)
+
+Operation = BulkActionJob.Operation
+
+
+class BulkDeleteQuerySet(ShortURLQuerySet):
+    """Short URLs deleted by a bulk action, which invalidates their cache entries itself."""
+
+
+def filter_short_urls(namespace, filters):
+    """
+    Select the short URLs of a namespace a bulk action applies to.
+
+    Args:
+        namespace: Namespace the links belong to
+        filters: Dict with optional ids, created_by, created_after and
+            created_before; all links of the namespace when empty
+    """
+    queryset = ShortURL.objects.filter(namespace=namespace)
+    if filters.get("ids"):
+        queryset = queryset.filter(pk__in=filters["ids"])
+    if filters.get("created_by"):
+        queryset = queryset.filter(created_by=filters["created_by"])
+    if filters.get("created_after"):
+        queryset = queryset.filter(created_at__gte=filters["created_after"])
+    if filters.get("created_before"):
+        queryset = queryset.filter(created_at__lt=filters["created_before"])
+    return queryset
+
+
+def _changes(operation, expiry_date):
+    if operation == Operation.ACTIVATE:
+        changes = {"is_active": True}
+    elif operation == Operation.DEACTIVATE:
+        changes = {"is_active": False}
+    else:
+        changes = {"expiry_date": expiry_date}
+    return {**changes, "updated_at": timezone.now()}
+
+
+def _chunks(queryset, chunk_size):
+    """Yield (pks, short codes) of the matching links in primary key order, chunk_size at a time."""
+    last_pk = None
+    while True:
+        chunk = queryset.order_by("pk")
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list("pk", "short_code")[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield [pk for pk, _ in rows], [short_code for _, short_code in rows]
+
+
+def apply_bulk_action(namespace, operation, filters, expiry_date=None, chunked=False, progress=None):
+    """
+    Apply an action to the short URLs of a namespace matching filters.
+
+    Args:
+        namespace: Namespace the links belong to
+        operation: BulkActionJob.Operation value
+        filters: See filter_short_urls()
+        expiry_date: New expiry date for set_expiry (None clears it)
+        chunked: Update in chunks, each in its own transaction, instead of
+            with one UPDATE; deletes are always chunked
+        progress: Optional callable (count) called after every chunk
+
+    Returns:
+        int: Number of short URLs changed or deleted
+    """
+    queryset = filter_short_urls(namespace, filters)
+    chunk_size = settings.SHORT_URL_BULK_ACTION_CHUNK_SIZE
+    if operation != Operation.DELETE and not chunked:
+        with transaction.atomic():
+            affected = queryset.update(**_changes(operation, expiry_date))
+            # None of the filters depend on the updated fields, so this reads the updated links
+            invalidate_short_urls_on_commit(namespace.name, queryset.values_list("short_code", flat=True))
+        return affected
+
+    affected = 0
+    for pks, short_codes in _chunks(queryset, chunk_size):
+        with transaction.atomic():
+            if operation == Operation.DELETE:
+                _, deleted = BulkDeleteQuerySet(ShortURL).filter(pk__in=pks).delete()
+                count = deleted.get(ShortURL._meta.label, 0)
+            else:
+                count = ShortURL.objects.filter(pk__in=pks).update(**_changes(operation, expiry_date))
+            invalidate_short_urls_on_commit(namespace.name, short_codes)
+        affected += count
+        if progress is not None:
+            progress(count)
+    return affected
+
+
+def run_bulk_action_job(job_id):
+    """
+    Run a pending bulk action job to the end.
+
+    Returns:
+        int: Number of short URLs changed or deleted
+    """
+    # Claim the job in one statement so concurrent deliveries cannot both run it
+    claimed = BulkActionJob.objects.filter(pk=job_id, status=ImportJob.Status.PENDING).update(
+        status=ImportJob.Status.RUNNING,
+        started_at=timezone.now()
+    )
+    if not claimed:
+        # Redelivered task; the job already ran or is running elsewhere
+        return 0
+    job = BulkActionJob.objects.select_related("namespace").get(pk=job_id)
+
+    def record_progress(count):
+        job.rows_affected += count
+        job.save(update_fields=["rows_affected"])
+
+    try:
+        apply_bulk_action(
+            job.namespace,
+            job.operation,
+            job.filters,
+            job.expiry_date,
+            chunked=True,
+            progress=record_progress
+        )
+    except BaseException:
+        logger.exception("Bulk action %s stopped", job.pk)
+        job.status = ImportJob.Status.FAILED
+        job.error = "The action stopped unexpectedly; links in chunks before the last progress update were changed."
+        raise
+    else:
+        job.status = ImportJob.Status.COMPLETED
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+    return job.rows_affected
@@ -0,0 +1,603 @@
+"""
+URL resolution cache.
+
+Caches the minimal data a redirect needs, keyed by (namespace name, short code),
+so warm redirects never touch the database. Lookups go through a bounded
+per-process LRU first and the shared cache backend second. Unknown pairs are
+cached too, for a shorter time, so scanners cannot turn misses into DB load,
+and codes the short code Bloom filter rules out never reach the database.
+
+When SHORT_URL_SNAPSHOT_PATH is set, a memory-mapped snapshot of every active
+short URL sits between the two, so a cold worker resolves from the page cache
+instead of the network.
+
+Every invalidation bumps a shared version and, with Redis, logs the changed
+keys under it. Workers poll that change log to evict just those keys from
+their LRU, and to shadow snapshot entries changed after the snapshot was built.
+
+The ``a``-prefixed functions are async equivalents for the ASGI redirect view;
+with django-redis they talk to Redis through a native asyncio client.
+"""
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import datetime
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from apps.utils.metrics import LOOKUP_TIERS
+
+from .bloom import short_code_filter
+from .models import Namespace, RedirectStatus, ShortURL
+from .purge import publish_purge
+from .redis_client import get_async_redis_client, get_redis_client
+from .snapshot import SnapshotStore, build_snapshot, read_snapshot_version
+
+RESOLUTION_CACHE_PREFIX = "urls:resolve"
+RESOLUTION_CACHE_VERSION_KEY = "urls:resolve:version"
+# Sorted set of "namespace\0code" members scored by the version they changed at
+RESOLUTION_CHANGES_KEY = "urls:resolve:changes"
+# Cached in place of a resolution for pairs that do not exist
+NEGATIVE_ENTRY = ()
+# Bumps the version and logs the changed keys under it in one step, so a poll never
+# sees a version without its keys, then drops versions past the retention window.
+# KEYS: version counter, change log; ARGV: versions to keep, changed members...
+LOG_CHANGES_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+for i = 2, #ARGV do
+    redis.call('ZADD', KEYS[2], version, ARGV[i])
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', version - tonumber(ARGV[1]))
+return version
+"""
+
+
+class ResolvedURL(NamedTuple):
+    """Compact record of everything a redirect needs to know about a short URL."""
+    pk: uuid.UUID
+    original_url: str
+    is_active: bool
+    expiry_date: Optional[datetime.datetime]
+    # Effective redirect policy, namespace defaults applied
+    redirect_status: int = RedirectStatus.FOUND
+    redirect_max_age: int = 0
+    redirect_s_maxage: int = 0
+    updated_at: Optional[datetime.datetime] = None
+
+    def is_expired(self):
+        """Check if the short URL has expired."""
+        if not self.expiry_date:
+            return False
+        return timezone.now() > self.expiry_date
+
+    def is_accessible(self):
+        """Check if the short URL is accessible (active and not expired)."""
+        return self.is_active and not self.is_expired()
+
+
+class LocalResolutionCache:
+    """
+    Bounded in-process LRU of resolved short URLs with TTL-based expiry.
+
+    Other processes signal invalidations by bumping a version counter in the
+    shared cache and logging the changed keys under it. The log is polled at
+    most once per ``version_interval`` seconds and only the logged keys are
+    evicted, so stale entries live for at most that interval. When the log
+    cannot account for every version since the last poll (no Redis, trimmed
+    entries, a reset counter) the whole local cache is cleared instead.
+    """
+
+    def __init__(self, max_size, timeout, version_interval):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.version_interval = version_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def version(self):
+        """Shared version this process has applied changes up to, or None before the first poll."""
+        return self._version
+
+    def get(self, key):
+        """Return the cached ResolvedURL for a key, or None."""
+        return self.lookup(key, time.monotonic())
+
+    def lookup(self, key, now):
+        """Return the cached ResolvedURL for a key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                self.misses += 1
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, resolved, timeout=None):
+        """Store a ResolvedURL, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+        if timeout is None:
+            timeout = self.timeout
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, resolved)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete_many(self, keys):
+        """Drop the given keys from this process."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry from this process."""
+        with self._lock:
+            self._entries.clear()
+
+    def bump_version(self):
+        """
+        Tell every other process to drop its local entries.
+
+        Only used without Redis, where no change log is kept.
+
+        Returns:
+            int: The new version, or None if the counter could not be bumped
+        """
+        cache.add(RESOLUTION_CACHE_VERSION_KEY, 0, None)
+        try:
+            version = cache.incr(RESOLUTION_CACHE_VERSION_KEY)
+        except ValueError:
+            return None
+        # Only adopt the new version if no other process bumped it in between
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+        return version
+
+    def version_check_due(self, now):
+        """Check whether the shared version counter should be polled again."""
+        return now - self._version_checked_at >= self.version_interval
+
+    def apply_version(self, version, now):
+        """Clear local entries if the shared version moved since the last poll."""
+        self.apply_changes(version, None, now)
+
+    def apply_changes(self, version, changes, now):
+        """
+        Evict the keys changed since the last poll.
+
+        Args:
+            version: Current shared version
+            changes: Keys changed after the last applied version up to
+                ``version``, or None when they are not known
+            now: time.monotonic() of the poll
+        """
+        self._version_checked_at = now
+        if self._version is not None and version != self._version:
+            if changes is None or version < self._version:
+                # Unknown changes, or a reset counter whose log no longer lines up
+                self.clear()
+            else:
+                self.delete_many(changes)
+        self._version = version
+
+    def stats(self):
+        """Return hit, miss and eviction counters for sizing the cache."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+local_cache = LocalResolutionCache(
+    max_size=settings.SHORT_URL_LOCAL_CACHE_SIZE,
+    timeout=settings.SHORT_URL_LOCAL_CACHE_TIMEOUT,
+    version_interval=settings.SHORT_URL_LOCAL_CACHE_VERSION_INTERVAL,
+)
+
+snapshot_store = SnapshotStore(
+    path=settings.SHORT_URL_SNAPSHOT_PATH,
+    refresh_interval=settings.SHORT_URL_SNAPSHOT_REFRESH_INTERVAL,
+)
+
+
+def resolution_cache_key(namespace_name, short_code):
+    """Build the cache key for a (namespace name, short code) pair."""
+    return f"{RESOLUTION_CACHE_PREFIX}:{namespace_name}:{short_code}"
+
+
+def resolution_values(queryset, *leading_fields):
+    """Select the ResolvedURL fields of short URLs, after any leading fields."""
+    return queryset.values_list(
+        *leading_fields,
+        "pk", "original_url", "is_active", "expiry_date",
+        *(Coalesce(field, f"namespace__{field}") for field in Namespace.REDIRECT_POLICY_FIELDS),
+        "updated_at",
+    )
+
+
+def _lookup_row(namespace_name, short_code):
+    return resolution_values(ShortURL.objects.filter(
+        namespace__name=namespace_name,
+        short_code=short_code
+    ))
+
+
+def _capped_timeout(resolved, timeout):
+    """Cap a cache timeout so an entry for a live link expires with the link."""
+    if not resolved.is_active or resolved.expiry_date is None:
+        return timeout
+    remaining = (resolved.expiry_date - timezone.now()).total_seconds()
+    if remaining <= 0:
+        # Already expired; the entry answers 410 until the link is edited
+        return timeout
+    return min(timeout, math.ceil(remaining))
+
+
+def _entry_for_row(row):
+    """Turn a database row into a shared cache entry and its timeout."""
+    if row is None:
+        # Creating the short URL deletes this key through the save signal
+        return NEGATIVE_ENTRY, settings.SHORT_URL_NEGATIVE_CACHE_TIMEOUT
+    return tuple(row), _capped_timeout(ResolvedURL(*row), settings.SHORT_URL_CACHE_TIMEOUT)
+
+
+def _accept_entry(local_key, entry):
+    """Store a shared cache entry locally and return its resolution."""
+    if entry == NEGATIVE_ENTRY:
+        local_cache.set(local_key, NEGATIVE_ENTRY, settings.SHORT_URL_NEGATIVE_CACHE_TIMEOUT)
+        return None
+    resolved = ResolvedURL(*entry)
+    local_cache.set(local_key, resolved, _capped_timeout(resolved, local_cache.timeout))
+    return resolved
+
+
+def _decode_changes(changes):
+    """Turn change log members and scores into (snapshot key, version) pairs."""
+    for member, score in changes:
+        namespace_name, _, short_code = member.decode().partition("\0")
+        yield (namespace_name, short_code), int(score)
+
+
+def _queue_change_log_read(pipe, since):
+    """Queue reads of the version, the oldest logged change and the changes after since."""
+    pipe.get(cache.make_key(RESOLUTION_CACHE_VERSION_KEY))
+    pipe.zrange(RESOLUTION_CHANGES_KEY, 0, 0, withscores=True)
+    pipe.zrangebyscore(RESOLUTION_CHANGES_KEY, f"({since}", "+inf", withscores=True)
+
+
+def _log_covers(oldest, since):
+    """Check whether the change log still holds every version after since."""
+    # Versions are logged and trimmed whole, so the oldest entry tells
+    return bool(oldest) and int(oldest[0][1]) <= since + 1
+
+
+def _apply_change_log(now, since, version, oldest, changes):
+    """Evict the logged keys from the local cache, or clear it if the log has a gap."""
+    keys = None
+    if _log_covers(oldest, since):
+        keys = [key for key, _ in _decode_changes(changes)]
+    local_cache.apply_changes(int(version or 0), keys, now)
+
+
+def _poll_changes(now):
+    """Apply the invalidations other processes made since this process last looked."""
+    since = local_cache.version
+    client = get_redis_client()
+    if client is None or since is None:
+        local_cache.apply_version(cache.get(RESOLUTION_CACHE_VERSION_KEY, 0), now)
+        return
+    pipe = client.pipeline(transaction=True)
+    _queue_change_log_read(pipe, since)
+    try:
+        results = pipe.execute()
+    except RedisError:
+        # Keep the entries and try again after the next interval
+        local_cache.apply_changes(since, [], now)
+        return
+    _apply_change_log(now, since, *results)
+
+
+async def _apoll_changes(now):
+    """Async _poll_changes()."""
+    since = local_cache.version
+    client = get_async_redis_client()
+    if client is None or since is None:
+        local_cache.apply_version(await acache_get(RESOLUTION_CACHE_VERSION_KEY, 0), now)
+        return
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            _queue_change_log_read(pipe, since)
+            results = await pipe.execute()
+    except RedisError:
+        local_cache.apply_changes(since, [], now)
+        return
+    _apply_change_log(now, since, *results)
+
+
+def _apply_snapshot_changes(since, version, oldest, changes):
+    """Shadow logged keys, or drop the snapshot if the log no longer lines up with it."""
+    version = int(version or 0)
+    if version < since or (version > since and not _log_covers(oldest, since)):
+        # The counter was reset (Redis restarted) or trimmed entries were never read
+        snapshot_store.discard()
+        return
+    snapshot_store.apply_change_log(_decode_changes(changes))
+
+
+def _refresh_snapshot(now):
+    """Pick up a newer snapshot file and shadow keys changed since it was built."""
+    snapshot_store.reload_if_changed(now)
+    client = get_redis_client()
+    if client is None or snapshot_store.reader is None:
+        return
+    since = snapshot_store.changes_seen
+    pipe = client.pipeline(transaction=True)
+    _queue_change_log_read(pipe, since)
+    try:
+        results = pipe.execute()
+    except RedisError:
+        return
+    _apply_snapshot_changes(since, *results)
+
+
+def _snapshot_lookup(local_key):
+    """Resolve a short URL from the snapshot, or None if it must be looked up elsewhere."""
+    row = snapshot_store.lookup(*local_key)
+    return None if row is None else ResolvedURL(*row)
+
+
+def _observe_lookup(tier, started):
+    """Record how long a lookup took and which tier answered it."""
+    LOOKUP_TIERS[tier].observe(time.perf_counter() - started)
+
+
+def resolve_short_url(namespace_name, short_code):
+    """
+    Resolve a short URL through the cache, falling back to the database.
+
+    Returns:
+        ResolvedURL or None if no such short URL exists
+    """
+    started = time.perf_counter()
+    local_key = (namespace_name, short_code)
+    now = time.monotonic()
+    if local_cache.version_check_due(now):
+        _poll_changes(now)
+    resolved = local_cache.lookup(local_key, now)
+    if resolved is not None:
+        _observe_lookup("local", started)
+        return resolved or None
+
+    if snapshot_store.enabled:
+        if snapshot_store.refresh_due(now):
+            _refresh_snapshot(now)
+        resolved = _snapshot_lookup(local_key)
+        if resolved is not None:
+            _observe_lookup("snapshot", started)
+            return resolved
+
+    key = resolution_cache_key(namespace_name, short_code)
+    entry = cache.get(key)
+    tier = "shared"
+    if entry is None:
+        row = None
+        tier = "bloom"
+        if short_code_filter.might_contain(namespace_name, short_code):
+            row = _lookup_row(namespace_name, short_code).first()
+            tier = "db"
+        entry, timeout = _entry_for_row(row)
+        cache.set(key, entry, timeout)
+    resolved = _accept_entry(local_key, entry)
+    _observe_lookup(tier, started)
+    return resolved
+
+
+def warm_resolution_cache(pairs):
+    """
+    Load the resolutions of many short URLs into the caches in one pass.
+
+    Args:
+        pairs: Iterable of (namespace name, short code)
+
+    Returns:
+        int: Number of short URLs now resolvable from the local cache
+    """
+    keys = {resolution_cache_key(*pair): pair for pair in pairs}
+    if not keys:
+        return 0
+    entries = cache.get_many(list(keys))
+    missing = {pair for key, pair in keys.items() if key not in entries}
+    if missing:
+        rows = resolution_values(ShortURL.objects.filter(
+            namespace__name__in={namespace_name for namespace_name, _ in missing},
+            short_code__in={short_code for _, short_code in missing}
+        ), "namespace__name", "short_code")
+        for namespace_name, short_code, *row in rows:
+            if (namespace_name, short_code) not in missing:
+                continue
+            key = resolution_cache_key(namespace_name, short_code)
+            entries[key], timeout = _entry_for_row(row)
+            cache.set(key, entries[key], timeout)
+    return sum(_accept_entry(keys[key], entry) is not None for key, entry in entries.items())
+
+
+async def acache_get(key, default=None):
+    """Async cache.get() that reads Redis natively when possible."""
+    client = get_async_redis_client()
+    if client is None:
+        return await cache.aget(key, default)
+    try:
+        value = await client.get(cache.make_key(key))
+    except RedisError:
+        return default
+    return default if value is None else cache.client.decode(value)
+
+
+async def acache_set(key, value, timeout):
+    """Async cache.set() that writes Redis natively when possible."""
+    client = get_async_redis_client()
+    if client is None:
+        await cache.aset(key, value, timeout)
+        return
+    try:
+        await client.set(cache.make_key(key), cache.client.encode(value), ex=timeout)
+    except RedisError:
+        pass
+
+
+async def _arefresh_snapshot(now):
+    """Async _refresh_snapshot()."""
+    snapshot_store.reload_if_changed(now)
+    client = get_async_redis_client()
+    if client is None or snapshot_store.reader is None:
+        return
+    since = snapshot_store.changes_seen
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            _queue_change_log_read(pipe, since)
+            results = await pipe.execute()
+    except RedisError:
+        return
+    _apply_snapshot_changes(since, *results)
+
+
+async def aresolve_short_url(namespace_name, short_code):
+    """
+    Async resolve_short_url() for the ASGI redirect view.
+
+    Returns:
+        ResolvedURL or None if no such short URL exists
+    """
+    started = time.perf_counter()
+    local_key = (namespace_name, short_code)
+    now = time.monotonic()
+    if local_cache.version_check_due(now):
+        await _apoll_changes(now)
+    resolved = local_cache.lookup(local_key, now)
+    if resolved is not None:
+        _observe_lookup("local", started)
+        return resolved or None
+
+    if snapshot_store.enabled:
+        if snapshot_store.refresh_due(now):
+            await _arefresh_snapshot(now)
+        resolved = _snapshot_lookup(local_key)
+        if resolved is not None:
+            _observe_lookup("snapshot", started)
+            return resolved
+
+    key = resolution_cache_key(namespace_name, short_code)
+    entry = await acache_get(key)
+    tier = "shared"
+    if entry is None:
+        row = None
+        tier = "bloom"
+        if await short_code_filter.amight_contain(namespace_name, short_code):
+            row = await _lookup_row(namespace_name, short_code).afirst()
+            tier = "db"
+        entry, timeout = _entry_for_row(row)
+        await acache_set(key, entry, timeout)
+    resolved = _accept_entry(local_key, entry)
+    _observe_lookup(tier, started)
+    return resolved
+
+
+def invalidate_short_urls(namespace_name, short_codes):
+    """Drop cached resolutions for the given short codes in a namespace."""
+    short_codes = list(short_codes)
+    if not short_codes:
+        return
+    local_keys = [(namespace_name, code) for code in short_codes]
+    cache.delete_many([resolution_cache_key(namespace_name, code) for code in short_codes])
+    local_cache.delete_many(local_keys)
+    version = _log_changes(local_keys)
+    publish_purge(namespace_name, short_codes)
+    if snapshot_store.enabled:
+        snapshot_store.shadow((key, version or float("inf")) for key in local_keys)
+
+
+def invalidate_short_urls_on_commit(namespace_name, short_codes):
+    """
+    Invalidate cached resolutions now and again once the transaction commits.
+
+    The second pass drops any entry a concurrent redirect re-cached from the
+    pre-commit row in between.
+    """
+    short_codes = list(short_codes)
+    invalidate_short_urls(namespace_name, short_codes)
+    transaction.on_commit(lambda: invalidate_short_urls(namespace_name, short_codes))
+
+
+def _log_changes(local_keys):
+    """
+    Bump the resolution version and log the changed keys under it for other processes.
+
+    Returns:
+        int: The new version, or None if it could not be bumped
+    """
+    client = get_redis_client()
+    if client is None:
+        return local_cache.bump_version()
+    members = [f"{namespace_name}\0{short_code}" for namespace_name, short_code in local_keys]
+    try:
+        version = client.register_script(LOG_CHANGES_SCRIPT)(
+            keys=[cache.make_key(RESOLUTION_CACHE_VERSION_KEY), RESOLUTION_CHANGES_KEY],
+            args=[settings.SHORT_URL_CHANGE_LOG_VERSIONS, *members]
+        )
+    except RedisError:
+        return None
+    return int(version)
+
+
+def write_redirect_snapshot(path=None):
+    """
+    Build a snapshot of every active, unexpired short URL.
+
+    The version is read before the rows so that any change racing the build is
+    logged with a later version and shadows the entry it may have missed.
+
+    Returns:
+        int: Number of short URLs written
+    """
+    path = path or snapshot_store.path
+    previous_version = read_snapshot_version(path)
+    version = cache.get(RESOLUTION_CACHE_VERSION_KEY, 0)
+    rows = resolution_values(
+        ShortURL.objects.filter(is_active=True).unexpired(),
+        "namespace__name", "short_code"
+    ).iterator(chunk_size=10000)
+    count = build_snapshot(path, rows, version)
+
+    # Changes older than the snapshot being replaced are covered by the new one
+    client = get_redis_client()
+    if client is not None and previous_version is not None:
+        try:
+            client.zremrangebyscore(RESOLUTION_CHANGES_KEY, "-inf", min(previous_version, version))
+        except RedisError:
+            pass
+    return count
@@ -0,0 +1,274 @@
+"""
+Click counting.
+
+Clicks are buffered in Redis with INCR on a per-link key and folded into
+ShortURL.click_count by the flush_click_counts task in one bulk UPDATE per
+batch. Without a Redis cache backend clicks fall back to a single atomic
+UPDATE per click; links clicked faster than SHORT_URL_SHARDING_THRESHOLD
+switch to sharded counter rows so those UPDATEs stop queueing on one row lock.
+
+Click events for per-click history ride along in the same Redis round trip
+(see events.py).
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from redis.exceptions import RedisError
+
+from .events import backpressure, buffer_event_locally, queue_event
+from .models import ClickCounterShard, ShortURL
+from .redis_client import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CLICK_KEY_PREFIX = "urls:clicks"
+DIRTY_CLICKS_KEY = "urls:clicks:dirty"
+
+
+class ClickRateTracker:
+    """Per-process click counter over a fixed window for spotting hot links."""
+
+    def __init__(self, window, threshold):
+        self.window = window
+        self.threshold = threshold
+        self._counts = {}
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def hit(self, pk, count=1):
+        """Count clicks and return True once a link crosses the threshold in this window."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window_start >= self.window:
+                self._counts = {}
+                self._window_start = now
+            total = self._counts.get(pk, 0) + count
+            self._counts[pk] = total
+        limit = self.threshold * self.window
+        return total >= limit and total - count < limit
+
+
+rate_tracker = ClickRateTracker(
+    window=settings.SHORT_URL_SHARDING_WINDOW,
+    threshold=settings.SHORT_URL_SHARDING_THRESHOLD,
+)
+# pk -> shard count for links this process has seen switch to sharded counting
+_sharded_links = {}
+
+
+def click_key(pk):
+    """Build the Redis key holding unflushed clicks for a short URL."""
+    return f"{CLICK_KEY_PREFIX}:{pk}"
+
+
+def _queue_click(pipe, pk, count, event):
+    """Add the click counter and event buffer commands for one click to a pipeline."""
+    pipe.incrby(click_key(pk), count)
+    pipe.sadd(DIRTY_CLICKS_KEY, str(pk))
+    return event is not None and queue_event(pipe, event)
+
+
+def _check_click_results(results, event_pushed):
+    """Raise if the counter commands failed; a failed event overwrite is only a lost sample."""
+    for result in results[:2]:
+        if isinstance(result, Exception):
+            raise result
+    if event_pushed:
+        backpressure.observe(results[2])
+
+
+def record_click(pk, count=1, event=None):
+    """
+    Record clicks for a short URL without a synchronous row write where possible.
+
+    ``event`` is a serialized click event from capture_click_event(), pushed to
+    the click event buffer in the same round trip.
+    """
+    client = get_redis_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            event_pushed = _queue_click(pipe, pk, count, event)
+            _check_click_results(pipe.execute(raise_on_error=False), event_pushed)
+            return
+        except RedisError:
+            logger.warning("Click buffer unavailable, writing click for %s directly", pk)
+    write_click(pk, count)
+    if event is not None:
+        buffer_event_locally(event)
+
+
+async def arecord_click(pk, count=1, event=None):
+    """Async record_click() that buffers through a native asyncio Redis client."""
+    client = get_async_redis_client()
+    if client is not None:
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                event_pushed = _queue_click(pipe, pk, count, event)
+                _check_click_results(await pipe.execute(raise_on_error=False), event_pushed)
+            return
+        except RedisError:
+            logger.warning("Click buffer unavailable, writing click for %s directly", pk)
+    await sync_to_async(write_click)(pk, count)
+    if event is not None:
+        buffer_event_locally(event)
+
+
+# Keep references so pending click tasks are not garbage collected mid-flight
+_background_clicks = set()
+
+
+def schedule_click(pk, event=None):
+    """Record a click in the background without delaying the response."""
+    task = asyncio.ensure_future(arecord_click(pk, event=event))
+    _background_clicks.add(task)
+    task.add_done_callback(_background_clicks.discard)
+
+
+def write_click(pk, count=1):
+    """Write clicks straight to the database, spreading hot links over shard rows."""
+    shards = _sharded_links.get(pk)
+    if shards is None and settings.SHORT_URL_SHARDING_THRESHOLD and rate_tracker.hit(pk, count):
+        shards = enable_click_sharding(pk)
+    if shards:
+        ClickCounterShard.objects.filter(
+            short_url_id=pk,
+            shard=random.randrange(shards)
+        ).update(count=F("count") + count)
+    else:
+        ShortURL.objects.filter(pk=pk).update(click_count=F("click_count") + count)
+
+
+def enable_click_sharding(pk, shards=None):
+    """
+    Switch a short URL to sharded click counting.
+
+    Returns:
+        int: The number of shards the short URL uses (0 if it no longer exists)
+    """
+    shards = shards or settings.SHORT_URL_CLICK_SHARDS
+    ClickCounterShard.objects.bulk_create(
+        [ClickCounterShard(short_url_id=pk, shard=shard) for shard in range(shards)],
+        ignore_conflicts=True
+    )
+    ShortURL.objects.filter(pk=pk, click_shards=0).update(click_shards=shards)
+    # Another process may have switched the link first with a different count
+    shards = ShortURL.objects.filter(pk=pk).values_list("click_shards", flat=True).first() or 0
+    if shards:
+        _sharded_links[pk] = shards
+    return shards
+
+
+def get_pending_clicks(short_urls):
+    """
+    Get clicks recorded but not yet folded into click_count.
+
+    Covers clicks buffered in Redis and clicks sitting in counter shards.
+
+    Returns:
+        dict: pk -> pending click count, only for short URLs with pending clicks
+    """
+    short_urls = list(short_urls)
+    if not short_urls:
+        return {}
+
+    pending = {}
+    sharded = [short_url.pk for short_url in short_urls if short_url.click_shards]
+    if sharded:
+        pending.update(
+            ClickCounterShard.objects.filter(short_url__in=sharded)
+            .values("short_url")
+            .annotate(total=Sum("count"))
+            .values_list("short_url", "total")
+        )
+
+    client = get_redis_client()
+    if client is not None:
+        pks = [short_url.pk for short_url in short_urls]
+        try:
+            values = client.mget([click_key(pk) for pk in pks])
+        except RedisError:
+            values = []
+        for pk, value in zip(pks, values):
+            if value:
+                pending[pk] = pending.get(pk, 0) + int(value)
+    return {pk: total for pk, total in pending.items() if total}
+
+
+def apply_click_deltas(deltas):
+    """Add click deltas to ShortURL.click_count in a single UPDATE."""
+    if not deltas:
+        return 0
+    return ShortURL.objects.filter(pk__in=list(deltas)).update(
+        click_count=F("click_count") + Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    )
+
+
+def flush_clicks(batch_size=1000):
+    """
+    Move buffered clicks from Redis into the database.
+
+    Returns:
+        int: Number of clicks flushed
+    """
+    client = get_redis_client()
+    if client is None:
+        return 0
+
+    flushed = 0
+    while True:
+        pks = [pk.decode() for pk in client.spop(DIRTY_CLICKS_KEY, batch_size) or []]
+        if not pks:
+            return flushed
+
+        # Read and clear each counter atomically; clicks that land afterwards
+        # re-mark the link dirty for the next flush
+        pipe = client.pipeline(transaction=True)
+        for pk in pks:
+            pipe.get(click_key(pk))
+            pipe.delete(click_key(pk))
+        values = pipe.execute()[::2]
+        deltas = {pk: int(value) for pk, value in zip(pks, values) if value}
+
+        try:
+            apply_click_deltas(deltas)
+        except Exception:
+            # Put the clicks back so the next flush retries them
+            for pk, delta in deltas.items():
+                record_click(pk, delta)
+            raise
+        flushed += sum(deltas.values())
+
+
+def fold_click_shards():
+    """
+    Fold counts held in shard rows back into ShortURL.click_count.
+
+    Returns:
+        int: Number of clicks folded
+    """
+    with transaction.atomic():
+        shards = list(
+            ClickCounterShard.objects.select_for_update()
+            .filter(count__gt=0)
+            .values_list("pk", "short_url_id", "count")
+        )
+        if not shards:
+            return 0
+        deltas = {}
+        for _, short_url_id, count in shards:
+            deltas[short_url_id] = deltas.get(short_url_id, 0) + count
+        ClickCounterShard.objects.filter(pk__in=[pk for pk, _, _ in shards]).update(count=0)
+        apply_click_deltas(deltas)
+    return sum(deltas.values())
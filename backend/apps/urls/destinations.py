@@ -0,0 +1,80 @@
+"""
+Short URL destinations.
+
+Every distinct original URL is stored once as a Destination, keyed by the
+SHA-256 of its normalized form. Finding the short URLs that point at a URL is
+then a lookup on the unique hash index instead of a scan over original_url.
+
+Normalization only rewrites parts of a URL that cannot change where it leads:
+the scheme and host are lowercased, default ports are dropped, an empty path
+becomes "/" and percent-escapes are uppercased. The query string and fragment
+are kept as they are.
+"""
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from .models import Destination
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+PERCENT_ESCAPE = re.compile(r"%[0-9a-fA-F]{2}")
+
+
+def _upper_escapes(value):
+    return PERCENT_ESCAPE.sub(lambda match: match.group().upper(), value)
+
+
+def normalize_url(url):
+    """Return the canonical form of a URL used to deduplicate destinations."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.rpartition("@")[2].lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port is not None and DEFAULT_PORTS.get(scheme) == port:
+        netloc = netloc.rsplit(":", 1)[0]
+    if "@" in parts.netloc:
+        # Credentials are case-sensitive
+        netloc = f"{parts.netloc.rpartition('@')[0]}@{netloc}"
+    return urlunsplit((
+        scheme,
+        netloc,
+        _upper_escapes(parts.path) or "/",
+        _upper_escapes(parts.query),
+        parts.fragment,
+    ))
+
+
+def destination_hash(url):
+    """Return the hash identifying the destination of a URL."""
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+def get_destinations(urls):
+    """
+    Get the destinations of URLs, creating the missing ones.
+
+    Uses one lookup on the hash index and, when some are missing, one insert
+    that skips rows a concurrent request created first.
+
+    Returns:
+        dict: url -> Destination
+    """
+    hashes = {url: destination_hash(url) for url in urls}
+    found = Destination.objects.in_bulk(set(hashes.values()), field_name="url_hash")
+    missing = {url_hash: url for url, url_hash in hashes.items() if url_hash not in found}
+    if missing:
+        Destination.objects.bulk_create(
+            [Destination(url=normalize_url(url), url_hash=url_hash) for url_hash, url in missing.items()],
+            ignore_conflicts=True
+        )
+        # Primary keys are not returned for ignored conflicts; read the rows back
+        found.update(Destination.objects.in_bulk(list(missing), field_name="url_hash"))
+    return {url: found[url_hash] for url, url_hash in hashes.items()}
+
+
+def get_destination(url):
+    """Get the destination of a URL, creating it if needed."""
+    return get_destinations([url])[url]
@@ -0,0 +1,296 @@
+"""
+Click events.
+
+Every redirect captures a compact click event (time, link, referrer, user
+agent, hashed IP, country) into a bounded buffer: a Redis list shared by all
+workers, pushed in the same round trip as the click counter. The
+flush_click_events task drains it in large batches with COPY on PostgreSQL
+and bulk_create elsewhere, updating the click rollups in the same
+transaction, so capturing an event never writes to the database.
+
+Without Redis, or while it fails, events go to a small per-process deque that
+a background thread of the same process flushes every
+SHORT_URL_CLICK_EVENT_LOCAL_FLUSH_INTERVAL seconds.
+
+When the buffer is full, new events are sampled at
+SHORT_URL_CLICK_EVENT_OVERFLOW_SAMPLE_RATE and overwrite a random buffered
+event; the rest are dropped. Redirects never wait for the flusher.
+"""
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from .analytics import record_click_rollups
+from .models import ClickEvent, ShortURL
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CLICK_EVENTS_KEY = "urls:clicks:events"
+REFERRER_MAX_LENGTH = ClickEvent._meta.get_field("referrer").max_length
+USER_AGENT_MAX_LENGTH = ClickEvent._meta.get_field("user_agent").max_length
+COPY_FIELDS = ("id", "short_url", "clicked_at", "referrer", "user_agent", "ip_hash", "country")
+
+
+def hash_ip(ip):
+    """Hash a client IP with the secret key so raw addresses are never stored."""
+    if not ip:
+        return ""
+    return hmac.new(settings.SECRET_KEY.encode(), ip.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def client_ip(request):
+    """Return the client IP from the configured request header."""
+    value = request.META.get(settings.SHORT_URL_CLIENT_IP_HEADER, "")
+    return value.split(",")[0].strip()
+
+
+def capture_click_event(request, pk):
+    """
+    Build the buffered form of a click event from a redirect request.
+
+    Returns:
+        str: Serialized event, or None if click events are disabled
+    """
+    if not settings.SHORT_URL_CLICK_EVENTS:
+        return None
+    return json.dumps([
+        str(pk),
+        time.time(),
+        request.META.get("HTTP_REFERER", "")[:REFERRER_MAX_LENGTH],
+        request.META.get("HTTP_USER_AGENT", "")[:USER_AGENT_MAX_LENGTH],
+        hash_ip(client_ip(request)),
+        request.META.get(settings.SHORT_URL_COUNTRY_HEADER, "")[:2].upper(),
+    ])
+
+
+class EventBackpressure:
+    """
+    Decides which events enter the buffer once it fills up.
+
+    A full buffer is remembered for ``backoff`` seconds; in that time events
+    are sampled instead of appended, so pushes stop until the flusher has had
+    a chance to catch up.
+    """
+
+    def __init__(self, max_size, sample_rate, backoff=1.0):
+        self.max_size = max_size
+        self.sample_rate = sample_rate
+        self.backoff = backoff
+        self._full_until = 0.0
+        self.dropped = 0
+        self.sampled = 0
+
+    def full(self):
+        """Check whether the buffer was recently seen full."""
+        return time.monotonic() < self._full_until
+
+    def observe(self, length):
+        """Record the buffer length seen after an append."""
+        if length >= self.max_size:
+            self._full_until = time.monotonic() + self.backoff
+
+    def sample(self):
+        """
+        Decide the fate of an event arriving while the buffer is full.
+
+        Returns:
+            int: Buffer index to overwrite, or None to drop the event
+        """
+        if random.random() >= self.sample_rate:
+            self.dropped += 1
+            return None
+        self.sampled += 1
+        return random.randrange(self.max_size)
+
+    def stats(self):
+        return {"max_size": self.max_size, "dropped": self.dropped, "sampled": self.sampled}
+
+
+backpressure = EventBackpressure(
+    max_size=settings.SHORT_URL_CLICK_EVENT_BUFFER_SIZE,
+    sample_rate=settings.SHORT_URL_CLICK_EVENT_OVERFLOW_SAMPLE_RATE,
+)
+local_backpressure = EventBackpressure(
+    max_size=settings.SHORT_URL_CLICK_EVENT_LOCAL_BUFFER_SIZE,
+    sample_rate=settings.SHORT_URL_CLICK_EVENT_OVERFLOW_SAMPLE_RATE,
+)
+# Used instead of Redis when the cache backend is not django-redis or Redis fails
+_local_events = deque()
+_local_lock = threading.Lock()
+_flusher_pid = None
+
+
+def queue_event(pipe, event):
+    """
+    Add an event to a Redis pipeline that is about to execute.
+
+    Returns:
+        bool: True if the pipeline's last result is the new buffer length
+    """
+    if not backpressure.full():
+        pipe.rpush(CLICK_EVENTS_KEY, event)
+        return True
+    index = backpressure.sample()
+    if index is not None:
+        pipe.lset(CLICK_EVENTS_KEY, index, event)
+    return False
+
+
+def buffer_event_locally(event):
+    """Buffer an event in this process when Redis is not available."""
+    with _local_lock:
+        if len(_local_events) < local_backpressure.max_size:
+            _local_events.append(event)
+        else:
+            index = local_backpressure.sample()
+            if index is not None:
+                _local_events[index] = event
+    if settings.SHORT_URL_CLICK_EVENT_LOCAL_FLUSH_INTERVAL > 0 and _flusher_pid != os.getpid():
+        _start_local_flusher()
+
+
+def _start_local_flusher():
+    global _flusher_pid
+    with _local_lock:
+        if _flusher_pid == os.getpid():
+            return
+        # A forked worker inherits the parent's deque but not its thread
+        _flusher_pid = os.getpid()
+        threading.Thread(target=_flush_local_forever, name="click-events", daemon=True).start()
+
+
+def _flush_local_forever():
+    while True:
+        time.sleep(settings.SHORT_URL_CLICK_EVENT_LOCAL_FLUSH_INTERVAL)
+        try:
+            flush_local_click_events()
+        except Exception:
+            logger.warning("Could not flush locally buffered click events", exc_info=True)
+        finally:
+            close_old_connections()
+
+
+def _take_local_batch(batch_size):
+    with _local_lock:
+        return [_local_events.popleft() for _ in range(min(batch_size, len(_local_events)))]
+
+
+def _requeue_local(events):
+    with _local_lock:
+        _local_events.extendleft(reversed(events))
+
+
+def _take_batch(batch_size):
+    client = get_redis_client()
+    if client is None:
+        return _take_local_batch(batch_size)
+    pipe = client.pipeline(transaction=True)
+    pipe.lrange(CLICK_EVENTS_KEY, 0, batch_size - 1)
+    pipe.ltrim(CLICK_EVENTS_KEY, batch_size, -1)
+    return pipe.execute()[0]
+
+
+def _requeue(events):
+    client = get_redis_client()
+    if client is None:
+        _requeue_local(events)
+        return
+    client.lpush(CLICK_EVENTS_KEY, *reversed(events))
+
+
+def _event_rows(events):
+    """
+    Decode buffered events into ClickEvent column values, skipping deleted links.
+
+    Returns:
+        tuple: (rows, mapping of short URL pk to namespace pk)
+    """
+    decoded = [json.loads(event) for event in events]
+    namespace_ids = dict(ShortURL.objects.filter(
+        pk__in={event[0] for event in decoded}
+    ).values_list("pk", "namespace_id"))
+    existing = {str(pk) for pk in namespace_ids}
+    rows = [
+        (
+            uuid.uuid4(),
+            uuid.UUID(pk),
+            datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc),
+            referrer,
+            user_agent,
+            ip_hash,
+            country,
+        )
+        for pk, timestamp, referrer, user_agent, ip_hash, country in decoded
+        if pk in existing
+    ]
+    return rows, namespace_ids
+
+
+def write_click_events(rows):
+    """Insert ClickEvent rows with COPY on PostgreSQL or bulk_create elsewhere."""
+    if connection.vendor == "postgresql":
+        columns = ", ".join(ClickEvent._meta.get_field(name).column for name in COPY_FIELDS)
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(
+                f"COPY {ClickEvent._meta.db_table} ({columns}) FROM STDIN"
+            ) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        return
+    attnames = [ClickEvent._meta.get_field(name).attname for name in COPY_FIELDS]
+    ClickEvent.objects.bulk_create(
+        [ClickEvent(**dict(zip(attnames, row))) for row in rows],
+        batch_size=1000
+    )
+
+
+def _flush(take_batch, requeue, batch_size):
+    batch_size = batch_size or settings.SHORT_URL_CLICK_EVENT_BATCH_SIZE
+    written = 0
+    while True:
+        events = take_batch(batch_size)
+        if not events:
+            return written
+        try:
+            rows, namespace_ids = _event_rows(events)
+            with transaction.atomic():
+                write_click_events(rows)
+                record_click_rollups(rows, namespace_ids)
+        except Exception:
+            requeue(events)
+            raise
+        written += len(rows)
+        if len(events) < batch_size:
+            return written
+
+
+def flush_click_events(batch_size=None):
+    """
+    Write buffered click events to the database and add them to the rollups.
+
+    Returns:
+        int: Number of click events written
+    """
+    return _flush(_take_batch, _requeue, batch_size)
+
+
+def flush_local_click_events(batch_size=None):
+    """
+    Write the click events buffered in this process, even while Redis is in use.
+
+    Returns:
+        int: Number of click events written
+    """
+    return _flush(_take_local_batch, _requeue_local, batch_size)
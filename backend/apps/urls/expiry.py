@@ -0,0 +1,53 @@
+"""
+Short URL expiry.
+
+Expired links are flipped inactive in bulk by the deactivate_expired_links
+task instead of only being rejected per request, and their cached
+resolutions are evicted. Between runs, redirect cache entries never outlive
+the link (see cache._capped_timeout), so expiry takes effect on time.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_short_urls
+from .models import ShortURL
+
+
+def deactivate_expired_links(now=None, batch_size=1000):
+    """
+    Mark active short URLs past their expiry date inactive.
+
+    Each batch is flipped with a single UPDATE that re-checks the expiry, so a
+    link whose expiry was extended in the meantime is left alone.
+
+    Returns:
+        int: Number of short URLs deactivated
+    """
+    now = now or timezone.now()
+    deactivated = 0
+    while True:
+        rows = list(
+            ShortURL.objects.filter(is_active=True).expired(now).values_list(
+                "pk", "namespace__name", "short_code"
+            )[:batch_size]
+        )
+        if not rows:
+            return deactivated
+
+        with transaction.atomic():
+            updated = ShortURL.objects.filter(
+                pk__in=[pk for pk, _, _ in rows],
+                is_active=True
+            ).expired(now).update(is_active=False, updated_at=timezone.now())
+
+        short_codes = defaultdict(list)
+        for _, namespace_name, short_code in rows:
+            short_codes[namespace_name].append(short_code)
+        for namespace_name, codes in short_codes.items():
+            invalidate_short_urls(namespace_name, codes)
+
+        deactivated += updated
+        if len(rows) < batch_size:
+            return deactivated
@@ -0,0 +1,209 @@
+"""
+Hot link tracking.
+
+Every served redirect feeds a per-process Space-Saving sketch that keeps
+approximate counts for the SHORT_URL_HOT_LINKS_CAPACITY most clicked
+(namespace, short code) pairs in bounded memory. A background thread drains
+the sketch into a Redis sorted set every SHORT_URL_HOT_LINKS_PERSIST_INTERVAL
+seconds, so the set merges the traffic of all workers; the decay_hot_links
+task halves its scores periodically so it follows current traffic.
+
+New workers read the top of the set at boot (see config/gunicorn.py) and load
+those links into their resolution caches before serving requests.
+"""
+import heapq
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from .cache import warm_resolution_cache
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+HOT_LINKS_KEY = "urls:hot"
+# Score multiplier applied by each decay_hot_links run
+DECAY = 0.5
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters sketch.
+
+    Holds at most ``capacity`` counters. An unseen key takes over the counter
+    of the current minimum and inherits its count as possible overestimation,
+    so any key seen more than total/capacity times is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # Min-heap of (count, key); entries whose count is stale are skipped
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def observe(self, key, count=1):
+        """Count an occurrence of a key."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            counts = self.counts
+            if key in counts:
+                counts[key] += count
+            elif len(counts) < self.capacity:
+                counts[key] = count
+                self.errors[key] = 0
+            else:
+                floor, evicted = self._pop_minimum()
+                del counts[evicted], self.errors[evicted]
+                counts[key] = floor + count
+                self.errors[key] = floor
+            heapq.heappush(self._heap, (counts[key], key))
+            if len(self._heap) > 4 * self.capacity:
+                self._heap = [(value, item) for item, value in counts.items()]
+                heapq.heapify(self._heap)
+
+    def _pop_minimum(self):
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return count, key
+
+    def top(self, limit=None):
+        """
+        Return the most frequent keys.
+
+        Returns:
+            list: (key, count, error) tuples, most frequent first
+        """
+        with self._lock:
+            items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+            return [(key, count, self.errors[key]) for key, count in items[:limit]]
+
+    def drain(self):
+        """Return the guaranteed part of every count and start a new window."""
+        with self._lock:
+            drained = {
+                key: count - self.errors[key] for key, count in self.counts.items()
+                if count > self.errors[key]
+            }
+            self.counts, self.errors, self._heap = {}, {}, []
+        return drained
+
+
+hot_links = SpaceSaving(settings.SHORT_URL_HOT_LINKS_CAPACITY)
+_persister_pid = None
+_persister_lock = threading.Lock()
+
+
+def _member(namespace_name, short_code):
+    return f"{namespace_name}\0{short_code}"
+
+
+def note_hit(namespace_name, short_code):
+    """Count a served redirect of a short URL."""
+    if settings.SHORT_URL_HOT_LINKS_CAPACITY <= 0:
+        return
+    hot_links.observe((namespace_name, short_code))
+    if _persister_pid != os.getpid():
+        _start_persister()
+
+
+def _start_persister():
+    global _persister_pid
+    with _persister_lock:
+        if _persister_pid == os.getpid():
+            return
+        # A forked worker inherits the parent's sketch but not its thread
+        _persister_pid = os.getpid()
+        threading.Thread(target=_persist_forever, name="hot-links", daemon=True).start()
+
+
+def _persist_forever():
+    while True:
+        time.sleep(settings.SHORT_URL_HOT_LINKS_PERSIST_INTERVAL)
+        try:
+            persist_hot_links()
+        except RedisError:
+            logger.warning("Could not persist hot links", exc_info=True)
+
+
+def persist_hot_links():
+    """
+    Add the counts gathered since the last call to the shared hot link set.
+
+    Returns:
+        int: Number of links written
+    """
+    client = get_redis_client()
+    if client is None:
+        return 0
+    counts = hot_links.drain()
+    if not counts:
+        return 0
+    pipe = client.pipeline(transaction=False)
+    for (namespace_name, short_code), count in counts.items():
+        pipe.zincrby(HOT_LINKS_KEY, count, _member(namespace_name, short_code))
+    # Bound the shared set to what a worker could track itself
+    pipe.zremrangebyrank(HOT_LINKS_KEY, 0, -settings.SHORT_URL_HOT_LINKS_CAPACITY - 1)
+    pipe.execute()
+    return len(counts)
+
+
+def decay_hot_links():
+    """Scale down shared hot link scores and drop links that went cold."""
+    client = get_redis_client()
+    if client is None:
+        return 0
+    pipe = client.pipeline(transaction=True)
+    pipe.zunionstore(HOT_LINKS_KEY, {HOT_LINKS_KEY: DECAY})
+    pipe.zremrangebyscore(HOT_LINKS_KEY, "-inf", "(1")
+    pipe.zcard(HOT_LINKS_KEY)
+    return pipe.execute()[-1]
+
+
+def top_hot_links(limit):
+    """
+    Return the hottest short URLs across workers.
+
+    Falls back to this process's sketch when Redis is not available.
+
+    Returns:
+        list: (namespace name, short code, score) tuples, hottest first
+    """
+    client = get_redis_client()
+    if client is None:
+        return [
+            (namespace_name, short_code, count)
+            for (namespace_name, short_code), count, _ in hot_links.top(limit)
+        ]
+    hottest = []
+    for member, score in client.zrevrange(HOT_LINKS_KEY, 0, limit - 1, withscores=True):
+        namespace_name, _, short_code = member.decode().partition("\0")
+        hottest.append((namespace_name, short_code, score))
+    return hottest
+
+
+def prewarm_hot_links(limit=None):
+    """
+    Load the hottest short URLs into this worker's resolution caches.
+
+    Returns:
+        int: Number of short URLs loaded
+    """
+    limit = settings.SHORT_URL_HOT_LINKS_PREWARM if limit is None else limit
+    if limit <= 0:
+        return 0
+    try:
+        hottest = top_hot_links(limit)
+    except RedisError:
+        logger.warning("Could not read hot links", exc_info=True)
+        return 0
+    return warm_resolution_cache(
+        (namespace_name, short_code) for namespace_name, short_code, _ in hottest
+    )
@@ -0,0 +1,151 @@
+"""
+Short URL imports.
+
+Uploaded CSV and NDJSON files are read as a stream, one row at a time, and
+fed to bulk_create_short_urls() in chunks of SHORT_URL_IMPORT_CHUNK_SIZE rows,
+each chunk in its own transaction. Progress is saved after every chunk and
+only the first SHORT_URL_IMPORT_MAX_ERRORS rejected rows are kept, so memory
+use does not depend on the size of the file.
+
+CSV files need a header row naming the ShortURLCreateSerializer fields
+(original_url is required); NDJSON files hold one JSON object per line. The
+namespace always comes from the import job.
+"""
+import csv
+import io
+import json
+import logging
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import bulk_create_short_urls
+from .models import ImportJob
+from .serializers import ShortURLBulkItemSerializer
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_FORMATS = {
+    ".csv": ImportJob.Format.CSV,
+    ".ndjson": ImportJob.Format.NDJSON,
+    ".jsonl": ImportJob.Format.NDJSON,
+}
+CONTENT_TYPE_FORMATS = {
+    "text/csv": ImportJob.Format.CSV,
+    "application/x-ndjson": ImportJob.Format.NDJSON,
+    "application/jsonl": ImportJob.Format.NDJSON,
+}
+
+
+def detect_format(upload):
+    """Guess the format of an uploaded file from its name or content type."""
+    extension = os.path.splitext(upload.name or "")[1].lower()
+    return EXTENSION_FORMATS.get(extension) or CONTENT_TYPE_FORMATS.get(upload.content_type)
+
+
+def read_rows(file, file_format):
+    """
+    Read an import file one row at a time.
+
+    Yields:
+        tuple: (line number, row dict or None, errors or None)
+
+    Raises:
+        ValueError: If the file cannot be read as the given format
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if file_format == ImportJob.Format.CSV:
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or "original_url" not in reader.fieldnames:
+            raise ValueError("The CSV header must include an original_url column.")
+        for row in reader:
+            # Empty cells fall back to the field defaults
+            yield reader.line_num, {key: value for key, value in row.items() if key and value}, None
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None, {"non_field_errors": ["Invalid JSON."]}
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, {"non_field_errors": ["Expected a JSON object."]}
+            continue
+        yield line_number, row, None
+
+
+def import_chunk(job, chunk):
+    """Create the short URLs of one chunk of rows and record the job's progress."""
+    items, lines, errors = [], [], []
+    for line_number, row, row_errors in chunk:
+        if row_errors is not None:
+            errors.append({"line": line_number, "errors": row_errors})
+            continue
+        items.append({**row, "namespace": str(job.namespace_id)})
+        lines.append(line_number)
+
+    with transaction.atomic():
+        results = bulk_create_short_urls(
+            items,
+            job.created_by,
+            ShortURLBulkItemSerializer,
+            lambda namespace: namespace.pk == job.namespace_id
+        )
+    created = 0
+    for line_number, result in zip(lines, results):
+        if result["status"] == "error":
+            errors.append({"line": line_number, "errors": result["errors"]})
+        elif result["status"] == "created":
+            created += 1
+    errors.sort(key=lambda error: error["line"])
+
+    job.rows_processed += len(chunk)
+    job.rows_created += created
+    job.rows_failed += len(errors)
+    job.errors.extend(errors[:max(0, settings.SHORT_URL_IMPORT_MAX_ERRORS - len(job.errors))])
+    job.save(update_fields=["rows_processed", "rows_created", "rows_failed", "errors"])
+
+
+def run_import(job_id):
+    """
+    Run a pending import job to the end.
+
+    Returns:
+        int: Number of short URLs created
+    """
+    # Claim the job in one statement so concurrent deliveries cannot both run it
+    claimed = ImportJob.objects.filter(pk=job_id, status=ImportJob.Status.PENDING).update(
+        status=ImportJob.Status.RUNNING,
+        started_at=timezone.now()
+    )
+    if not claimed:
+        # Redelivered task; the job already ran or is running elsewhere
+        return 0
+    job = ImportJob.objects.select_related("namespace", "created_by").get(pk=job_id)
+
+    try:
+        with job.file.open("rb") as file:
+            rows = read_rows(file, job.format)
+            while chunk := list(islice(rows, settings.SHORT_URL_IMPORT_CHUNK_SIZE)):
+                import_chunk(job, chunk)
+    except (ValueError, csv.Error) as error:
+        job.status = ImportJob.Status.FAILED
+        job.error = str(error)
+    except BaseException:
+        logger.exception("Import %s stopped", job.pk)
+        job.status = ImportJob.Status.FAILED
+        job.error = "The import stopped unexpectedly; rows before the last progress update were imported."
+        raise
+    else:
+        job.status = ImportJob.Status.COMPLETED
+    finally:
+        job.finished_at = timezone.now()
+        job.file.delete(save=False)
+        job.save(update_fields=["status", "error", "finished_at", "file"])
+    return job.rows_created
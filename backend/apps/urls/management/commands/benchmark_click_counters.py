@@ -0,0 +1,111 @@
+"""
+Benchmark click counting strategies under concurrency.
+
+Compares the original read-modify-write increment, a single-row atomic UPDATE
+and sharded counter rows. Run it against PostgreSQL; SQLite serializes all
+writers and hides row lock contention.
+"""
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Sum
+
+from apps.organizations.models import Organization
+from apps.urls.clicks import enable_click_sharding, write_click
+from apps.urls.models import ClickCounterShard, Namespace, ShortURL
+
+User = get_user_model()
+
+
+def legacy_increment(pk):
+    """The original ShortURL.increment_click_count inside a request transaction."""
+    with transaction.atomic():
+        short_url = ShortURL.objects.get(pk=pk)
+        short_url.click_count += 1
+        short_url.save(update_fields=["click_count"])
+
+
+def row_increment(pk):
+    """A single atomic UPDATE against the ShortURL row."""
+    with transaction.atomic():
+        ShortURL.objects.filter(pk=pk).update(click_count=F("click_count") + 1)
+
+
+def sharded_increment(pk):
+    """An atomic UPDATE against a random counter shard."""
+    with transaction.atomic():
+        write_click(pk)
+
+
+class Command(BaseCommand):
+    help = "Benchmark click counter throughput with concurrent writers on one hot link"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent writers")
+        parser.add_argument("--clicks", type=int, default=500, help="Clicks per writer")
+        parser.add_argument("--shards", type=int, default=16, help="Counter shards for the sharded run")
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(email=f"click-bench-{time.time_ns()}@example.com")
+        try:
+            organization = Organization.objects.create(name="Click benchmark", owner=user)
+            namespace = Namespace.objects.create(
+                organization=organization,
+                name=f"click-bench-{time.time_ns()}"
+            )
+            short_url = ShortURL.objects.create(
+                namespace=namespace,
+                original_url="https://example.com/",
+                short_code="bench",
+                created_by=user
+            )
+
+            strategies = [
+                ("read-modify-write", legacy_increment),
+                ("row update", row_increment),
+                ("sharded", sharded_increment),
+            ]
+            for name, increment in strategies:
+                ShortURL.objects.filter(pk=short_url.pk).update(click_count=0)
+                if increment is sharded_increment:
+                    enable_click_sharding(short_url.pk, options["shards"])
+                elapsed, errors = self._run(increment, short_url.pk, options["threads"], options["clicks"])
+
+                recorded = ShortURL.objects.get(pk=short_url.pk).click_count
+                recorded += ClickCounterShard.objects.filter(
+                    short_url=short_url
+                ).aggregate(total=Sum("count"))["total"] or 0
+                expected = options["threads"] * options["clicks"]
+                self.stdout.write(
+                    f"{name:>18}: {expected / elapsed:10.0f} clicks/s, "
+                    f"{expected - recorded - errors} of {expected} clicks lost, {errors} failed"
+                )
+        finally:
+            user.delete()
+
+    def _run(self, increment, pk, threads, clicks):
+        barrier = threading.Barrier(threads + 1)
+        errors = []
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(clicks):
+                    try:
+                        increment(pk)
+                    except DatabaseError:
+                        errors.append(1)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, len(errors)
@@ -0,0 +1,82 @@
+"""
+Benchmark short URL creation with concurrent creators.
+
+Every creator thread saves links with generated codes, one transaction per
+link like an API request, once reserving an index per link (block size 1) and
+once leasing blocks of --block-size indices. Run it against PostgreSQL;
+SQLite serializes all writers and hides the counter row contention.
+"""
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import override_settings
+
+from apps.organizations.models import Organization
+from apps.urls.allocator import leases
+from apps.urls.models import Namespace, ShortURL
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark short URL creations per second with 1, 8 and 32 concurrent creators"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--creators", type=int, nargs="+", default=[1, 8, 32], help="Concurrent creator counts to run"
+        )
+        parser.add_argument("--links", type=int, default=200, help="Links created by each creator")
+        parser.add_argument("--block-size", type=int, default=1000, help="Indices leased at once")
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(email=f"alloc-bench-{time.time_ns()}@example.com")
+        try:
+            organization = Organization.objects.create(name="Allocation benchmark", owner=user)
+            for creators in options["creators"]:
+                for block_size in (1, options["block_size"]):
+                    namespace = Namespace.objects.create(
+                        organization=organization,
+                        name=f"alloc-bench-{time.time_ns()}"
+                    )
+                    leases.clear()
+                    with override_settings(SHORT_URL_CODE_BLOCK_SIZE=block_size):
+                        elapsed, errors = self._run(namespace, user, creators, options["links"])
+                    created = ShortURL.objects.filter(namespace=namespace).count()
+                    self.stdout.write(
+                        f"{creators:>3} creators, block {block_size:>5}: "
+                        f"{created / elapsed:8.0f} creations/s, {created} created, {errors} failed"
+                    )
+        finally:
+            user.delete()
+
+    def _run(self, namespace, user, creators, links):
+        barrier = threading.Barrier(creators + 1)
+        errors = []
+
+        def creator():
+            barrier.wait()
+            try:
+                for number in range(links):
+                    try:
+                        with transaction.atomic():
+                            ShortURL.objects.create(
+                                namespace=namespace,
+                                original_url=f"https://example.com/{number}",
+                                created_by=user
+                            )
+                    except DatabaseError:
+                        errors.append(1)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=creator) for _ in range(creators)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, len(errors)
@@ -0,0 +1,72 @@
+"""
+Benchmark redirect snapshot build time and lookup latency.
+
+Builds a snapshot of synthetic links without touching the database, then
+times random lookups through the mmap reader. Use --links 10000000 to check
+the build and lookup budget at production scale.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from apps.urls.snapshot import SnapshotReader, build_snapshot
+
+
+def synthetic_rows(links, namespaces):
+    """Yield snapshot rows for generated links spread over a few namespaces."""
+    for number in range(links):
+        yield (
+            f"bench-{number % namespaces}",
+            f"{number:x}",
+            uuid.UUID(int=number),
+            f"https://example.com/landing/{number}",
+            True,
+            None,
+            302,
+            0,
+            0,
+            None,
+        )
+
+
+class Command(BaseCommand):
+    help = "Benchmark building and reading a redirect snapshot of synthetic links"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--links", type=int, default=1_000_000, help="Links in the snapshot")
+        parser.add_argument("--lookups", type=int, default=100_000, help="Random lookups to time")
+        parser.add_argument("--namespaces", type=int, default=100, help="Namespaces the links are spread over")
+
+    def handle(self, *args, **options):
+        links, namespaces = options["links"], options["namespaces"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "redirects.snapshot")
+            started = time.perf_counter()
+            build_snapshot(path, synthetic_rows(links, namespaces), version=0)
+            build_seconds = time.perf_counter() - started
+            size = os.path.getsize(path)
+
+            reader = SnapshotReader(path)
+            timings = []
+            misses = 0
+            for _ in range(options["lookups"]):
+                number = random.randrange(links)
+                started = time.perf_counter_ns()
+                found = reader.lookup(f"bench-{number % namespaces}", f"{number:x}")
+                timings.append(time.perf_counter_ns() - started)
+                misses += found is None
+
+        timings.sort()
+        self.stdout.write(
+            f"{links} links: built in {build_seconds:.1f}s, {size / 2 ** 20:.1f} MiB on disk"
+        )
+        self.stdout.write(
+            f"{len(timings)} lookups: mean {statistics.fmean(timings) / 1000:.1f}µs, "
+            f"p50 {timings[len(timings) // 2] / 1000:.1f}µs, "
+            f"p99 {timings[int(len(timings) * 0.99)] / 1000:.1f}µs, {misses} misses"
+        )
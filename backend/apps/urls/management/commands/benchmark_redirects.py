@@ -0,0 +1,317 @@
+"""
+Load-test the redirect endpoint.
+
+Seeds namespaces and links, then replays a Zipf-distributed request mix (a
+few links get most of the traffic, like real short URLs) through the full
+WSGI stack in this process, or against a running server with --url.
+
+Scenarios:
+    cold  every request misses the caches: the link is evicted from the
+          shared cache and this process's local cache before it is requested
+    warm  the caches are pre-loaded with every seeded link
+    hot   --threads workers request the single most popular link at once
+
+Each scenario reports p50/p95/p99 latency, requests per second and SQL
+queries per request (in process only) as JSON. Pass --baseline with the JSON
+of an earlier run to fail when p99 latency or throughput regress by more than
+--max-regression percent. With --url, cold only evicts the shared cache; run
+the server with SHORT_URL_LOCAL_CACHE_SIZE=0 to make it miss locally as well.
+"""
+import http.client
+import json
+import math
+import platform
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+
+from apps.organizations.models import Organization
+from apps.urls.bloom import short_code_filter
+from apps.urls.cache import local_cache, resolution_cache_key, warm_resolution_cache
+from apps.urls.clicks import flush_clicks
+from apps.urls.events import flush_click_events
+from apps.urls.models import Namespace, ShortURL
+
+User = get_user_model()
+
+SCENARIOS = ("cold", "warm", "hot")
+PERCENTILES = (50, 95, 99)
+
+
+def zipf_mix(links, requests, exponent, rng):
+    """Pick ``requests`` links so that the link of rank k is requested ∝ 1/k^exponent."""
+    ranked = list(links)
+    rng.shuffle(ranked)
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, len(ranked) + 1):
+        total += 1 / rank ** exponent
+        cum_weights.append(total)
+    return ranked, rng.choices(ranked, cum_weights=cum_weights, k=requests)
+
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def evict(pair):
+    """Drop one link from the shared cache and this process's local cache."""
+    cache.delete(resolution_cache_key(*pair))
+    local_cache.delete_many([pair])
+
+
+class InProcessTarget:
+    """Sends requests through Django's WSGI handler, counting SQL queries."""
+
+    counts_queries = True
+
+    def __init__(self):
+        self.handler = WSGIHandler()
+        host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "testserver")
+        self.factory = RequestFactory(HTTP_HOST=host)
+
+    def session(self):
+        return self
+
+    def get(self, path):
+        environ = self.factory.get(path, secure=True).environ
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            response = self.handler(environ, lambda status, headers: None)
+            response.close()
+            elapsed = time.perf_counter() - started
+        return elapsed, response.status_code, queries[0]
+
+    def close(self):
+        # Worker threads each opened their own database connection
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+class HTTPTarget:
+    """Sends requests to a running server over keep-alive connections."""
+
+    counts_queries = False
+
+    def __init__(self, url):
+        self.url = urlsplit(url)
+        if self.url.scheme not in ("http", "https") or not self.url.hostname:
+            raise CommandError(f"Not an http(s) URL: {url}")
+
+    def session(self):
+        return HTTPSession(self.url)
+
+
+class HTTPSession:
+    def __init__(self, url):
+        connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        self.connection = connection_class(url.hostname, url.port, timeout=30)
+        self.prefix = url.path.rstrip("/")
+
+    def get(self, path):
+        started = time.perf_counter()
+        self.connection.request("GET", self.prefix + path)
+        response = self.connection.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - started
+        return elapsed, response.status, None
+
+    def close(self):
+        self.connection.close()
+
+
+class Command(BaseCommand):
+    help = "Replay a Zipf-distributed redirect mix and report latency percentiles as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--namespaces", type=int, default=10, help="Namespaces to seed")
+        parser.add_argument("--links", type=int, default=10_000, help="Links to seed, spread over the namespaces")
+        parser.add_argument("--requests", type=int, default=20_000, help="Requests per scenario")
+        parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of the request mix")
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent clients in the hot scenario")
+        parser.add_argument(
+            "--scenario", action="append", choices=SCENARIOS, help="Scenario to run (repeatable, default all)"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for reproducible request mixes")
+        parser.add_argument("--url", help="Base URL of a running server instead of replaying in process")
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+        parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+        parser.add_argument(
+            "--max-regression", type=float, default=10.0,
+            help="Allowed p99 latency increase and throughput drop against the baseline, in percent"
+        )
+
+    def handle(self, *args, **options):
+        if options["links"] < 1 or options["namespaces"] < 1 or options["requests"] < 1:
+            raise CommandError("--links, --namespaces and --requests must be positive")
+        target = HTTPTarget(options["url"]) if options["url"] else InProcessTarget()
+        rng = random.Random(options["seed"])
+        user = User.objects.create_user(email=f"redirect-bench-{time.time_ns()}@example.com")
+        try:
+            pairs = self._seed(user, options["namespaces"], options["links"])
+            ranked, mix = zipf_mix(pairs, options["requests"], options["zipf"], rng)
+            scenarios = {}
+            for name in options["scenario"] or SCENARIOS:
+                if name == "cold":
+                    scenarios[name] = self._replay(target, [mix], before=evict)
+                elif name == "warm":
+                    warm_resolution_cache(pairs)
+                    scenarios[name] = self._replay(target, [mix])
+                else:
+                    threads = max(1, options["threads"])
+                    per_thread = max(1, options["requests"] // threads)
+                    scenarios[name] = self._replay(target, [[ranked[0]] * per_thread] * threads)
+                self.stderr.write(self._summary(name, scenarios[name]))
+        finally:
+            # Write out the benchmark's clicks before its links disappear
+            flush_clicks()
+            flush_click_events()
+            user.delete()
+
+        results = {
+            "config": {
+                key: options[key]
+                for key in ("namespaces", "links", "requests", "zipf", "threads", "seed", "url")
+            },
+            "environment": {
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "cache": settings.CACHES["default"]["BACKEND"],
+            },
+            "scenarios": scenarios,
+        }
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+        if options["baseline"]:
+            self._compare(results, options["baseline"], options["max_regression"])
+
+    def _seed(self, user, namespaces, links):
+        organization = Organization.objects.create(name="Redirect benchmark", owner=user)
+        prefix = f"bench-{time.time_ns()}"
+        created = Namespace.objects.bulk_create(
+            Namespace(organization=organization, name=f"{prefix}-{number}")
+            for number in range(namespaces)
+        )
+        short_urls = [
+            ShortURL(
+                namespace=created[number % namespaces],
+                original_url=f"https://example.com/landing/{number}",
+                short_code=f"b{number:x}",
+                created_by=user
+            )
+            for number in range(links)
+        ]
+        ShortURL.objects.bulk_create(short_urls, batch_size=1000)
+        pairs = [(short_url.namespace.name, short_url.short_code) for short_url in short_urls]
+        short_code_filter.add(pairs)
+        return pairs
+
+    def _replay(self, target, batches, before=None):
+        """Send each batch of links from its own thread and merge the measurements."""
+        results = [None] * len(batches)
+        barrier = threading.Barrier(len(batches))
+
+        def worker(index, batch):
+            session = target.session()
+            latencies, statuses, queries = [], {}, 0
+            barrier.wait()
+            try:
+                for pair in batch:
+                    if before is not None:
+                        before(pair)
+                    elapsed, status, query_count = session.get(f"/{pair[0]}/{pair[1]}/")
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    queries += query_count or 0
+            finally:
+                session.close()
+            results[index] = (latencies, statuses, queries)
+
+        if len(batches) == 1:
+            worker(0, batches[0])
+        else:
+            workers = [
+                threading.Thread(target=worker, args=(index, batch))
+                for index, batch in enumerate(batches)
+            ]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+
+        latencies = sorted(latency for result in results for latency in result[0])
+        statuses = {}
+        for _, counts, _ in results:
+            for status, count in counts.items():
+                statuses[str(status)] = statuses.get(str(status), 0) + count
+        # Workers run side by side, so throughput is bounded by the busiest one
+        busiest = max(sum(result[0]) for result in results)
+        summary = {
+            "requests": len(latencies),
+            "threads": len(batches),
+            "requests_per_second": round(len(latencies) / busiest, 1) if busiest else None,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = round(percentile(latencies, percent) * 1000, 3)
+        summary["queries_per_request"] = (
+            round(sum(result[2] for result in results) / len(latencies), 3)
+            if target.counts_queries else None
+        )
+        summary["statuses"] = statuses
+        return summary
+
+    def _summary(self, name, result):
+        queries = result["queries_per_request"]
+        return (
+            f"{name:>4}: {result['requests_per_second'] or 0:10.1f} req/s, "
+            f"p50 {result['p50_ms']:.2f}ms, p95 {result['p95_ms']:.2f}ms, p99 {result['p99_ms']:.2f}ms"
+            + (f", {queries:.2f} queries/request" if queries is not None else "")
+        )
+
+    def _compare(self, results, path, max_regression):
+        """Report changes against a baseline run and fail on regressions."""
+        try:
+            with open(path) as file:
+                baseline = json.load(file)["scenarios"]
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Could not read baseline {path}: {error}")
+
+        regressions = []
+        for name, current in results["scenarios"].items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            p99_change = (current["p99_ms"] / previous["p99_ms"] - 1) * 100 if previous["p99_ms"] else 0.0
+            rps_change = (
+                (current["requests_per_second"] / previous["requests_per_second"] - 1) * 100
+                if previous["requests_per_second"] else 0.0
+            )
+            self.stderr.write(f"{name:>4}: p99 {p99_change:+.1f}%, throughput {rps_change:+.1f}% against baseline")
+            if p99_change > max_regression:
+                regressions.append(f"{name} p99 latency up {p99_change:.1f}%")
+            if -rps_change > max_regression:
+                regressions.append(f"{name} throughput down {-rps_change:.1f}%")
+        if regressions:
+            raise CommandError("Regressed against baseline: " + ", ".join(regressions))
+        self.stderr.write(self.style.SUCCESS(f"Within {max_regression}% of the baseline"))
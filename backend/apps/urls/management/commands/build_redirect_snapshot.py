@@ -0,0 +1,32 @@
+"""
+Build the memory-mapped redirect snapshot.
+
+Normally run by the build-redirect-snapshot beat entry; use this to seed a
+snapshot at deploy time or to write one somewhere else.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.urls.cache import write_redirect_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write a snapshot of every active short URL for workers to mmap"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=settings.SHORT_URL_SNAPSHOT_PATH,
+            help="Snapshot file (defaults to SHORT_URL_SNAPSHOT_PATH)"
+        )
+
+    def handle(self, *args, **options):
+        if not options["path"]:
+            raise CommandError("Set SHORT_URL_SNAPSHOT_PATH or pass --path")
+        started = time.perf_counter()
+        count = write_redirect_snapshot(options["path"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} short URLs to {options['path']} in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,96 @@
+"""
+Refresh edge redirect caches when short URLs change.
+
+Subscribes to the purge events published on every resolution cache
+invalidation and asks each nginx redirect cache in SHORT_URL_PURGE_ENDPOINTS
+to replace its copy of the changed paths, for every host in
+SHORT_URL_PURGE_HOSTS. Refreshes run concurrently, and a lost Redis
+connection is re-established with exponential backoff.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from redis.exceptions import RedisError
+
+from apps.urls.purge import PURGE_CHANNEL, refresh_edge_cache
+from apps.urls.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before resubscribing after a Redis error, doubled up to the maximum
+RECONNECT_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+
+class Command(BaseCommand):
+    help = "Refresh nginx redirect caches from short URL purge events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            help="nginx redirect cache to refresh (defaults to SHORT_URL_PURGE_ENDPOINTS)"
+        )
+        parser.add_argument(
+            "--host",
+            action="append",
+            dest="hosts",
+            help="Host redirects are served under (defaults to SHORT_URL_PURGE_HOSTS)"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Refresh requests in flight at once"
+        )
+
+    def handle(self, *args, **options):
+        endpoints = options["endpoints"] or settings.SHORT_URL_PURGE_ENDPOINTS
+        if not endpoints:
+            raise CommandError("Set SHORT_URL_PURGE_ENDPOINTS or pass --endpoint")
+        hosts = options["hosts"] or settings.SHORT_URL_PURGE_HOSTS or [None]
+        client = get_redis_client()
+        if client is None:
+            raise CommandError("Purge events need a django-redis cache backend")
+
+        self.stdout.write(f"Refreshing {', '.join(endpoints)} from {PURGE_CHANNEL} events")
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            delay = RECONNECT_DELAY
+            while True:
+                try:
+                    for event in self.events(client):
+                        delay = RECONNECT_DELAY
+                        self.refresh(executor, endpoints, hosts, event["paths"])
+                except RedisError:
+                    logger.warning("Purge subscription lost, resubscribing in %.1fs", delay, exc_info=True)
+                    time.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def events(self, client):
+        """Yield decoded purge events until the connection fails."""
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(PURGE_CHANNEL)
+            for message in pubsub.listen():
+                try:
+                    yield json.loads(message["data"])
+                except (TypeError, ValueError):
+                    logger.warning("Ignoring malformed purge event %r", message["data"])
+        finally:
+            pubsub.close()
+
+    def refresh(self, executor, endpoints, hosts, paths):
+        """Refresh every path on every endpoint and host, waiting for the batch to finish."""
+        requests = [
+            executor.submit(refresh_edge_cache, endpoint, path, host)
+            for path in dict.fromkeys(paths)
+            for endpoint in endpoints
+            for host in hosts
+        ]
+        for request in requests:
+            request.result()
@@ -0,0 +1,36 @@
+"""
+Rebuild the click rollups from raw click events.
+
+Use it to backfill the rollups or to repair them after a failed flush. Run it
+over days that no longer receive clicks, or with the flush-click-events beat
+entry paused, since clicks flushed into a day while it is being rebuilt can be
+counted twice or lost.
+"""
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.urls.analytics import rebuild_click_rollups
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date: {value!r} (expected YYYY-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = "Recompute hourly and daily click rollups from click events"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=_date, help="First UTC day to rebuild (default: oldest event)")
+        parser.add_argument("--until", type=_date, help="UTC day to stop before (default: no limit)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_click_rollups(options["since"], options["until"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {count} click events in {time.perf_counter() - started:.2f}s"
+        ))
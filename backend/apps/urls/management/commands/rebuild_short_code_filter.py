@@ -0,0 +1,30 @@
+"""
+Rebuild the short code Bloom filter.
+
+Run after changing SHORT_URL_BLOOM_CAPACITY or SHORT_URL_BLOOM_ERROR_RATE, or
+to seed the filter at deploy time; the rebuild-short-code-filter beat entry
+keeps it fresh afterwards.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.urls.bloom import short_code_filter
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Bloom filter of existing short codes from the database"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = short_code_filter.rebuild()
+        if count is None:
+            self.stdout.write(self.style.WARNING(
+                "The short code filter is disabled (SHORT_URL_BLOOM_CAPACITY=0 or no django-redis cache)"
+            ))
+            return
+        bloom = short_code_filter.bloom
+        self.stdout.write(self.style.SUCCESS(
+            f"Added {count} short codes to a {bloom.size / 8 / 2 ** 20:.1f} MiB filter "
+            f"with {bloom.hashes} hashes in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,141 @@
+"""
+URL middleware.
+
+Answers short URL redirects before the rest of the middleware stack and the
+URL resolver run, so redirects skip sessions, CSRF, auth, messages and the
+ATOMIC_REQUESTS transaction.
+
+Under ASGI, Django runs its whole middleware chain in a worker thread as soon
+as one middleware is sync-only (WhiteNoise is), so RedirectASGIMiddleware
+wraps the ASGI application instead and answers redirects on the event loop.
+"""
+import io
+import logging
+import re
+
+from asgiref.sync import ThreadSensitiveContext, iscoroutinefunction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseServerError
+from django.urls import get_resolver
+from django.utils.decorators import sync_and_async_middleware
+
+from .redirect_views import aserve_redirect, serve_redirect
+
+logger = logging.getLogger(__name__)
+
+REDIRECT_PATH_RE = re.compile(r"^/([^/]+)/([^/]+)/$")
+REDIRECT_URL_NAME = "short_url_redirect"
+# Characters that end the literal start of a route or regex pattern
+PATTERN_LITERAL_END_RE = re.compile(r"[/<(\[\\.?*+${|]")
+
+
+class RedirectPathMatcher:
+    """
+    Recognizes paths that the URLconf would send to the short URL redirect view.
+
+    A two-segment path reaches the catch-all redirect route unless an earlier
+    pattern claims its first segment, so paths whose first segment starts with
+    the literal prefix of any earlier pattern are left to the normal resolver.
+    """
+
+    def __init__(self, urlconf=None):
+        self.urlconf = urlconf
+        self._loaded = False
+        self._enabled = False
+        self._reserved_prefixes = ()
+
+    def _load(self):
+        prefixes = []
+        for pattern in get_resolver(self.urlconf).url_patterns:
+            if getattr(pattern, "name", None) == REDIRECT_URL_NAME:
+                self._enabled = True
+                break
+            literal = PATTERN_LITERAL_END_RE.split(str(pattern.pattern).lstrip("^"), maxsplit=1)[0]
+            if literal:
+                prefixes.append(literal)
+        self._reserved_prefixes = tuple(prefixes)
+        self._loaded = True
+
+    def match(self, request):
+        """Return (namespace_name, short_code) for redirect requests, else None."""
+        return self.match_path(request.method, request.path_info)
+
+    def match_path(self, method, path_info):
+        """Return (namespace_name, short_code) for a redirect method and path, else None."""
+        if method not in ("GET", "HEAD"):
+            return None
+        match = REDIRECT_PATH_RE.match(path_info)
+        if match is None:
+            return None
+        if not self._loaded:
+            self._load()
+        if not self._enabled or match.group(1).startswith(self._reserved_prefixes):
+            return None
+        return match.groups()
+
+
+@sync_and_async_middleware
+def redirect_fast_path_middleware(get_response):
+    """Serve short URL redirects directly; every other request passes through untouched."""
+    matcher = RedirectPathMatcher()
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            match = matcher.match(request)
+            if match is None:
+                return await get_response(request)
+            return await aserve_redirect(request, *match)
+    else:
+        def middleware(request):
+            match = matcher.match(request)
+            if match is None:
+                return get_response(request)
+            return serve_redirect(request, *match)
+
+    return middleware
+
+
+class RedirectASGIMiddleware:
+    """
+    ASGI middleware serving short URL redirects ahead of Django's handler.
+
+    Redirects are answered by the async view on the event loop, without the
+    request_started/request_finished signals or the middleware chain; only a
+    cache miss that reaches the database uses a thread. Every other request,
+    and every non-HTTP connection, is passed to the wrapped application.
+    """
+
+    def __init__(self, application, urlconf=None):
+        self.application = application
+        self.matcher = RedirectPathMatcher(urlconf)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            root_path = scope.get("root_path", "")
+            path_info = scope["path"]
+            if root_path and path_info.startswith(root_path):
+                path_info = path_info[len(root_path):]
+            match = self.matcher.match_path(scope["method"].upper(), path_info)
+            if match is not None:
+                await self.serve(scope, send, *match)
+                return
+        await self.application(scope, receive, send)
+
+    async def serve(self, scope, send, namespace_name, short_code):
+        """Answer a redirect request; GET and HEAD bodies are ignored."""
+        try:
+            # Like Django's handler, database calls of one request share a thread
+            async with ThreadSensitiveContext():
+                response = await aserve_redirect(ASGIRequest(scope, io.BytesIO()), namespace_name, short_code)
+        except Exception:
+            logger.exception("Redirect for /%s/%s/ failed", namespace_name, short_code)
+            response = HttpResponseServerError()
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (header.encode("ascii"), str(value).encode("latin1"))
+                for header, value in response.items()
+            ],
+        })
+        await send({"type": "http.response.body", "body": response.content})
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.3 on 2026-10-17 03:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0003_alter_shorturl_short_code"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shorturl",
+            name="click_shards",
+            field=models.PositiveSmallIntegerField(
+                default=0, help_text="Number of click counter shards (0 when clicks go to click_count directly)"
+            ),
+        ),
+        migrations.CreateModel(
+            name="ClickCounterShard",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("shard", models.PositiveSmallIntegerField(help_text="Shard number")),
+                ("count", models.PositiveIntegerField(default=0, help_text="Clicks not yet folded into click_count")),
+                (
+                    "short_url",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="click_counter_shards",
+                        to="urls.shorturl",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Click Counter Shard",
+                "verbose_name_plural": "Click Counter Shards",
+                "unique_together": {("short_url", "shard")},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0004_click_counter_shards"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="shorturl",
+            name="expiry_date",
+            field=models.DateTimeField(
+                blank=True, db_index=True, help_text="Optional expiry date for the short URL", null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0005_shorturl_expiry_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="namespace",
+            name="redirect_max_age",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Default seconds browsers may cache redirects (Cache-Control max-age)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="namespace",
+            name="redirect_s_maxage",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Default seconds shared caches and CDNs may cache redirects (Cache-Control s-maxage)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="namespace",
+            name="redirect_status",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (301, "301 Moved Permanently"),
+                    (302, "302 Found"),
+                    (307, "307 Temporary Redirect"),
+                    (308, "308 Permanent Redirect"),
+                ],
+                default=302,
+                help_text="Default redirect status code for short URLs in this namespace",
+            ),
+        ),
+        migrations.AddField(
+            model_name="shorturl",
+            name="redirect_max_age",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Seconds browsers may cache the redirect (defaults to the namespace setting)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="shorturl",
+            name="redirect_s_maxage",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Seconds shared caches may cache the redirect (defaults to the namespace setting)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="shorturl",
+            name="redirect_status",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                choices=[
+                    (301, "301 Moved Permanently"),
+                    (302, "302 Found"),
+                    (307, "307 Temporary Redirect"),
+                    (308, "308 Permanent Redirect"),
+                ],
+                help_text="Redirect status code (defaults to the namespace setting)",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0006_redirect_policy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClickEvent",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("clicked_at", models.DateTimeField(help_text="When the redirect was served")),
+                ("referrer", models.CharField(blank=True, help_text="Referer header", max_length=2048)),
+                ("user_agent", models.CharField(blank=True, help_text="User-Agent header", max_length=512)),
+                (
+                    "ip_hash",
+                    models.CharField(blank=True, help_text="Keyed hash of the client IP address", max_length=32),
+                ),
+                ("country", models.CharField(blank=True, help_text="ISO country code of the client", max_length=2)),
+                (
+                    "short_url",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="click_events", to="urls.shorturl"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Click Event",
+                "verbose_name_plural": "Click Events",
+                "ordering": ["-clicked_at"],
+                "indexes": [models.Index(fields=["short_url", "clicked_at"], name="urls_clicke_short_u_6891d3_idx")],
+            },
+        ),
+    ]
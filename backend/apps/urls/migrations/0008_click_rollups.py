@@ -0,0 +1,56 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0007_click_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HourlyClickRollup",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("hour", models.DateTimeField(help_text="Start of the UTC hour")),
+                ("clicks", models.PositiveBigIntegerField(default=0)),
+                (
+                    "short_url",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hourly_click_rollups",
+                        to="urls.shorturl",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Hourly Click Rollup",
+                "verbose_name_plural": "Hourly Click Rollups",
+                "unique_together": {("short_url", "hour")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyNamespaceClickRollup",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("day", models.DateField(help_text="UTC day")),
+                ("clicks", models.PositiveBigIntegerField(default=0)),
+                (
+                    "namespace",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_click_rollups",
+                        to="urls.namespace",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Namespace Click Rollup",
+                "verbose_name_plural": "Daily Namespace Click Rollups",
+                "unique_together": {("namespace", "day")},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0008_click_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailynamespaceclickrollup",
+            name="visitors",
+            field=models.BinaryField(default=b"", help_text="HyperLogLog sketch of visitors on the day"),
+        ),
+        migrations.AddField(
+            model_name="hourlyclickrollup",
+            name="visitors",
+            field=models.BinaryField(default=b"", help_text="HyperLogLog sketch of visitors in the hour"),
+        ),
+        migrations.AddField(
+            model_name="shorturl",
+            name="unique_visitors",
+            field=models.PositiveIntegerField(default=0, help_text="Estimated number of distinct visitors"),
+        ),
+        migrations.AddField(
+            model_name="shorturl",
+            name="visitor_sketch",
+            field=models.BinaryField(default=b"", help_text="HyperLogLog sketch of hashed visitor identifiers"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0009_unique_visitors"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShortCodeCounter",
+            fields=[
+                (
+                    "namespace",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="short_code_counter",
+                        serialize=False,
+                        to="urls.namespace",
+                    ),
+                ),
+                ("allocated", models.PositiveBigIntegerField(default=0, help_text="Allocation indices handed out")),
+            ],
+            options={
+                "verbose_name": "Short Code Counter",
+                "verbose_name_plural": "Short Code Counters",
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0011_import_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Destination",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("url", models.TextField(help_text="Normalized destination URL")),
+                (
+                    "url_hash",
+                    models.CharField(
+                        editable=False, help_text="SHA-256 of the normalized URL", max_length=64, unique=True
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Destination",
+                "verbose_name_plural": "Destinations",
+            },
+        ),
+        migrations.AddField(
+            model_name="shorturl",
+            name="destination",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Normalized destination of the original URL (set when saving)",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="short_urls",
+                to="urls.destination",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shorturl",
+            index=models.Index(fields=["namespace", "destination"], name="urls_shortu_namespa_e28bb0_idx"),
+        ),
+    ]
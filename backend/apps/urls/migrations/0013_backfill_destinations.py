@@ -0,0 +1,46 @@
+from django.db import migrations, transaction
+
+from apps.urls.destinations import destination_hash, normalize_url
+
+BATCH_SIZE = 1000
+
+
+def backfill_destinations(apps, schema_editor):
+    """Point existing short URLs at their destinations, one batch per transaction."""
+    ShortURL = apps.get_model("urls", "ShortURL")
+    Destination = apps.get_model("urls", "Destination")
+    while True:
+        with transaction.atomic():
+            batch = list(
+                ShortURL.objects.filter(destination__isnull=True)
+                .only("id", "original_url")[:BATCH_SIZE]
+            )
+            if not batch:
+                return
+            hashes = {short_url.pk: destination_hash(short_url.original_url) for short_url in batch}
+            found = Destination.objects.in_bulk(set(hashes.values()), field_name="url_hash")
+            missing = {}
+            for short_url in batch:
+                if hashes[short_url.pk] not in found:
+                    missing[hashes[short_url.pk]] = Destination(
+                        url=normalize_url(short_url.original_url),
+                        url_hash=hashes[short_url.pk]
+                    )
+            Destination.objects.bulk_create(missing.values(), ignore_conflicts=True)
+            found.update(Destination.objects.in_bulk(list(missing), field_name="url_hash"))
+            for short_url in batch:
+                short_url.destination = found[hashes[short_url.pk]]
+            ShortURL.objects.bulk_update(batch, ["destination"])
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so large tables are not locked for the whole run
+    atomic = False
+
+    dependencies = [
+        ("urls", "0012_destinations"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_destinations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.2.3 on 2026-10-17 04:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("urls", "0013_backfill_destinations"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BulkActionJob",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[
+                            ("activate", "Activate"),
+                            ("deactivate", "Deactivate"),
+                            ("set_expiry", "Set expiry date"),
+                            ("delete", "Delete"),
+                        ],
+                        help_text="Action to apply",
+                        max_length=10,
+                    ),
+                ),
+                ("filters", models.JSONField(blank=True, default=dict, help_text="Filter selecting the short URLs")),
+                (
+                    "expiry_date",
+                    models.DateTimeField(blank=True, help_text="Expiry date set by the set_expiry action", null=True),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        help_text="Progress of the action",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "rows_matched",
+                    models.PositiveIntegerField(default=0, help_text="Short URLs matching the filter when queued"),
+                ),
+                (
+                    "rows_affected",
+                    models.PositiveIntegerField(default=0, help_text="Short URLs changed or deleted so far"),
+                ),
+                ("error", models.TextField(blank=True, help_text="Why the action stopped, if it failed")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bulk_action_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "namespace",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bulk_action_jobs",
+                        to="urls.namespace",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Bulk Action Job",
+                "verbose_name_plural": "Bulk Action Jobs",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
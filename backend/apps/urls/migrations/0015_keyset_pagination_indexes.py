@@ -0,0 +1,24 @@
+# Generated by Django 4.2.3 on 2026-10-17 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("urls", "0014_bulk_action_jobs"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="namespace",
+            index=models.Index(fields=["organization", "created_at", "id"], name="urls_namesp_organiz_778a18_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shorturl",
+            index=models.Index(fields=["namespace", "created_at", "id"], name="urls_shortu_namespa_2bb8af_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shorturl",
+            index=models.Index(fields=["created_at", "id"], name="urls_shortu_created_8f7029_idx"),
+        ),
+    ]
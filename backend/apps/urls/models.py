@@ -4,9 +4,8 @@ URL models.
 Moved from apps.links.models - handles URL shortening, namespaces, and related logic.
 """
 import uuid
-import string
-import random
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
@@ -15,8 +14,18 @@ from django.conf import settings
 User = get_user_model()
 
 
+class RedirectStatus(models.IntegerChoices):
+    """HTTP status codes a short URL can redirect with."""
+    MOVED_PERMANENTLY = 301, _("301 Moved Permanently")
+    FOUND = 302, _("302 Found")
+    TEMPORARY_REDIRECT = 307, _("307 Temporary Redirect")
+    PERMANENT_REDIRECT = 308, _("308 Permanent Redirect")
+
+
 class Namespace(models.Model):
     """Namespace model for organizing short URLs within organizations."""
+    REDIRECT_POLICY_FIELDS = ("redirect_status", "redirect_max_age", "redirect_s_maxage")
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     organization = models.ForeignKey(
         'organizations.Organization',  # Reference to the Organization model in organizations app
@@ -29,11 +38,26 @@ class Namespace(models.Model):
         help_text=_("Globally unique namespace name")
     )
     description = models.TextField(blank=True, help_text=_("Namespace description"))
+    redirect_status = models.PositiveSmallIntegerField(
+        choices=RedirectStatus.choices,
+        default=RedirectStatus.FOUND,
+        help_text=_("Default redirect status code for short URLs in this namespace")
+    )
+    redirect_max_age = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Default seconds browsers may cache redirects (Cache-Control max-age)")
+    )
+    redirect_s_maxage = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Default seconds shared caches and CDNs may cache redirects (Cache-Control s-maxage)")
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        # Keyset pagination of the namespace lists
+        indexes = [models.Index(fields=["organization", "created_at", "id"])]
         verbose_name = _("Namespace")
         verbose_name_plural = _("Namespaces")
 
@@ -45,8 +69,55 @@ class Namespace(models.Model):
         return self.shorturls.all()
 
 
+class ShortURLQuerySet(models.QuerySet):
+    """Query helpers for short URLs; expiry filters use the expiry_date index."""
+
+    def expired(self, now=None):
+        """Short URLs whose expiry date has passed."""
+        from django.utils import timezone
+        return self.filter(expiry_date__lt=now or timezone.now())
+
+    def unexpired(self, now=None):
+        """Short URLs without an expiry date or with one still in the future."""
+        from django.utils import timezone
+        return self.filter(Q(expiry_date__isnull=True) | Q(expiry_date__gte=now or timezone.now()))
+
+    def reusable(self, namespace, url):
+        """Active, unexpired short URLs in a namespace that lead to the same destination as url."""
+        from .destinations import destination_hash
+        return self.filter(
+            namespace=namespace,
+            destination__url_hash=destination_hash(url),
+            is_active=True
+        ).unexpired()
+
+
+class Destination(models.Model):
+    """A normalized original URL, stored once however many short URLs point at it."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    url = models.TextField(help_text=_("Normalized destination URL"))
+    url_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        editable=False,
+        help_text=_("SHA-256 of the normalized URL")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Destination")
+        verbose_name_plural = _("Destinations")
+
+    def __str__(self):
+        return self.url
+
+
 class ShortURL(models.Model):
     """Short URL model for storing shortened URLs."""
+    COUNTER_FIELDS = ("click_count", "click_shards", "unique_visitors", "visitor_sketch")
+    # Extra codes allocated when a generated short code turns out to be taken
+    GENERATION_ATTEMPTS = 5
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     namespace = models.ForeignKey(
         Namespace,
@@ -54,6 +125,14 @@ class ShortURL(models.Model):
         related_name="shorturls"
     )
     original_url = models.URLField(help_text=_("Original URL to be shortened"))
+    destination = models.ForeignKey(
+        Destination,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="short_urls",
+        help_text=_("Normalized destination of the original URL (set when saving)")
+    )
     short_code = models.CharField(
         max_length=50,
         blank=True,
@@ -77,15 +156,53 @@ class ShortURL(models.Model):
     expiry_date = models.DateTimeField(
         null=True, 
         blank=True, 
+        db_index=True,
         help_text=_("Optional expiry date for the short URL")
     )
+    redirect_status = models.PositiveSmallIntegerField(
+        choices=RedirectStatus.choices,
+        null=True,
+        blank=True,
+        help_text=_("Redirect status code (defaults to the namespace setting)")
+    )
+    redirect_max_age = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Seconds browsers may cache the redirect (defaults to the namespace setting)")
+    )
+    redirect_s_maxage = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Seconds shared caches may cache the redirect (defaults to the namespace setting)")
+    )
     click_count = models.PositiveIntegerField(default=0, help_text=_("Number of clicks"))
+    click_shards = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_("Number of click counter shards (0 when clicks go to click_count directly)")
+    )
+    unique_visitors = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Estimated number of distinct visitors")
+    )
+    visitor_sketch = models.BinaryField(
+        default=b"",
+        help_text=_("HyperLogLog sketch of hashed visitor identifiers")
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ShortURLQuerySet.as_manager()
+
     class Meta:
         unique_together = ["namespace", "short_code"]
         ordering = ["-created_at"]
+        indexes = [
+            # Finds the links of a namespace that lead to a destination
+            models.Index(fields=["namespace", "destination"]),
+            # Keyset pagination of the short URL lists
+            models.Index(fields=["namespace", "created_at", "id"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
         verbose_name = _("Short URL")
         verbose_name_plural = _("Short URLs")
 
@@ -94,14 +211,13 @@ class ShortURL(models.Model):
 
     def get_full_short_url(self):
         """Get the full short URL."""
-        from django.conf import settings
         base_url = getattr(settings, 'FRONTEND_BASE_URL', 'http://localhost:8000')
         return f"{base_url}/{self.namespace.name}/{self.short_code}"
 
     def increment_click_count(self):
-        """Increment the click count."""
-        self.click_count += 1
-        self.save(update_fields=["click_count"])
+        """Record a click; buffered clicks are flushed into click_count periodically."""
+        from .clicks import record_click
+        record_click(self.pk)
 
     def is_expired(self):
         """Check if the short URL has expired."""
@@ -114,27 +230,22 @@ class ShortURL(models.Model):
         """Check if the short URL is accessible (active and not expired)."""
         return self.is_active and not self.is_expired()
 
-    @staticmethod
-    def generate_short_code(length=6):
-        """Generate a random alphanumeric short code."""
-        characters = string.ascii_letters + string.digits
-        return ''.join(random.choice(characters) for _ in range(length))
+    def allocate_short_code(self):
+        """Allocate a generated short code from the namespace's counter."""
+        from .allocator import allocate_short_code
+        return allocate_short_code(self.namespace_id)
+
+    def assign_destination(self):
+        """Point the short URL at the destination of its original URL."""
+        from .destinations import destination_hash, get_destination
+        if self.destination_id is None or self.destination.url_hash != destination_hash(self.original_url):
+            self.destination = get_destination(self.original_url)
 
     def clean(self):
-        """Validate the short code and ensure it's unique within the namespace."""
+        """Generate a short code if none was provided and validate the expiry date."""
         if not self.short_code:
-            # Generate a short code if not provided
-            self.short_code = self.generate_short_code()
-        
-        # Ensure short code is unique within the namespace
-        if ShortURL.objects.filter(
-            namespace=self.namespace,
-            short_code=self.short_code
-        ).exclude(pk=self.pk).exists():
-            raise ValidationError(
-                _("Short code must be unique within the namespace.")
-            )
-        
+            self.short_code = self.allocate_short_code()
+
         # Validate expiry date is in the future
         if self.expiry_date:
             from django.utils import timezone
@@ -144,5 +255,262 @@ class ShortURL(models.Model):
                 )
 
     def save(self, *args, **kwargs):
+        """
+        Save the short URL, relying on the unique index for short code uniqueness.
+
+        A generated code that turns out to be taken (by a custom code or a
+        legacy random one) is replaced by a newly allocated code; a taken
+        custom code raises ValidationError.
+        """
+        generated = not self.short_code
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "original_url" in update_fields:
+            self.assign_destination()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "destination"}
+        if not self._state.adding and update_fields is None:
+            # Counters only change through atomic UPDATEs; never write back a stale copy
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        for attempt in range(self.GENERATION_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if not ShortURL.objects.filter(
+                    namespace_id=self.namespace_id,
+                    short_code=self.short_code
+                ).exclude(pk=self.pk).exists():
+                    raise
+                if not generated or attempt == self.GENERATION_ATTEMPTS:
+                    raise ValidationError({
+                        "short_code": _("Short code must be unique within the namespace.")
+                    })
+                self.short_code = self.allocate_short_code()
+
+
+class ShortCodeCounter(models.Model):
+    """Number of short codes allocated in a namespace (see apps.urls.allocator)."""
+    namespace = models.OneToOneField(
+        Namespace,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="short_code_counter"
+    )
+    allocated = models.PositiveBigIntegerField(default=0, help_text=_("Allocation indices handed out"))
+
+    class Meta:
+        verbose_name = _("Short Code Counter")
+        verbose_name_plural = _("Short Code Counters")
+
+    def __str__(self):
+        return f"{self.namespace_id} ({self.allocated})"
+
+
+class ClickCounterShard(models.Model):
+    """One of several counter rows that absorb clicks for a hot short URL."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    short_url = models.ForeignKey(
+        ShortURL,
+        on_delete=models.CASCADE,
+        related_name="click_counter_shards"
+    )
+    shard = models.PositiveSmallIntegerField(help_text=_("Shard number"))
+    count = models.PositiveIntegerField(default=0, help_text=_("Clicks not yet folded into click_count"))
+
+    class Meta:
+        unique_together = ["short_url", "shard"]
+        verbose_name = _("Click Counter Shard")
+        verbose_name_plural = _("Click Counter Shards")
+
+    def __str__(self):
+        return f"{self.short_url_id} #{self.shard} ({self.count})"
+
+
+class ClickEvent(models.Model):
+    """A single redirect of a short URL, written in batches from the click event buffer."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    short_url = models.ForeignKey(
+        ShortURL,
+        on_delete=models.CASCADE,
+        related_name="click_events"
+    )
+    clicked_at = models.DateTimeField(help_text=_("When the redirect was served"))
+    referrer = models.CharField(max_length=2048, blank=True, help_text=_("Referer header"))
+    user_agent = models.CharField(max_length=512, blank=True, help_text=_("User-Agent header"))
+    ip_hash = models.CharField(
+        max_length=32,
+        blank=True,
+        help_text=_("Keyed hash of the client IP address")
+    )
+    country = models.CharField(max_length=2, blank=True, help_text=_("ISO country code of the client"))
+
+    class Meta:
+        ordering = ["-clicked_at"]
+        indexes = [models.Index(fields=["short_url", "clicked_at"])]
+        verbose_name = _("Click Event")
+        verbose_name_plural = _("Click Events")
+
+    def __str__(self):
+        return f"{self.short_url_id} @ {self.clicked_at}"
+
+
+class HourlyClickRollup(models.Model):
+    """Clicks of one short URL in one UTC hour, maintained from click events."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    short_url = models.ForeignKey(
+        ShortURL,
+        on_delete=models.CASCADE,
+        related_name="hourly_click_rollups"
+    )
+    hour = models.DateTimeField(help_text=_("Start of the UTC hour"))
+    clicks = models.PositiveBigIntegerField(default=0)
+    visitors = models.BinaryField(default=b"", help_text=_("HyperLogLog sketch of visitors in the hour"))
+
+    class Meta:
+        unique_together = ["short_url", "hour"]
+        verbose_name = _("Hourly Click Rollup")
+        verbose_name_plural = _("Hourly Click Rollups")
+
+    def __str__(self):
+        return f"{self.short_url_id} @ {self.hour}: {self.clicks}"
+
+
+class DailyNamespaceClickRollup(models.Model):
+    """Clicks of all short URLs in a namespace on one UTC day, maintained from click events."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    namespace = models.ForeignKey(
+        Namespace,
+        on_delete=models.CASCADE,
+        related_name="daily_click_rollups"
+    )
+    day = models.DateField(help_text=_("UTC day"))
+    clicks = models.PositiveBigIntegerField(default=0)
+    visitors = models.BinaryField(default=b"", help_text=_("HyperLogLog sketch of visitors on the day"))
+
+    class Meta:
+        unique_together = ["namespace", "day"]
+        verbose_name = _("Daily Namespace Click Rollup")
+        verbose_name_plural = _("Daily Namespace Click Rollups")
+
+    def __str__(self):
+        return f"{self.namespace_id} @ {self.day}: {self.clicks}"
+
+
+class ImportJob(models.Model):
+    """A background import of short URLs from an uploaded CSV or NDJSON file."""
+
+    class Format(models.TextChoices):
+        CSV = "csv", _("CSV")
+        NDJSON = "ndjson", _("NDJSON")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        COMPLETED = "completed", _("Completed")
+        FAILED = "failed", _("Failed")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    namespace = models.ForeignKey(
+        Namespace,
+        on_delete=models.CASCADE,
+        related_name="import_jobs"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="import_jobs"
+    )
+    file = models.FileField(
+        upload_to="imports/",
+        blank=True,
+        help_text=_("Uploaded file, deleted once the import finishes")
+    )
+    format = models.CharField(max_length=10, choices=Format.choices, help_text=_("Format of the uploaded file"))
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        help_text=_("Progress of the import")
+    )
+    rows_processed = models.PositiveIntegerField(default=0, help_text=_("Rows read so far"))
+    rows_created = models.PositiveIntegerField(default=0, help_text=_("Short URLs created so far"))
+    rows_failed = models.PositiveIntegerField(default=0, help_text=_("Rows rejected so far"))
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        help_text=_("The first rejected rows with their line numbers and errors")
+    )
+    error = models.TextField(blank=True, help_text=_("Why the import stopped, if it failed"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = _("Import Job")
+        verbose_name_plural = _("Import Jobs")
+
+    def __str__(self):
+        return f"{self.namespace_id} import {self.id} ({self.status})"
+
+    def rows_per_second(self):
+        """Rows processed per second since the import started."""
+        if self.started_at is None:
+            return None
+        from django.utils import timezone
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else None
+
+
+class BulkActionJob(models.Model):
+    """A bulk action on short URLs matching too many links to run within a request."""
+
+    class Operation(models.TextChoices):
+        ACTIVATE = "activate", _("Activate")
+        DEACTIVATE = "deactivate", _("Deactivate")
+        SET_EXPIRY = "set_expiry", _("Set expiry date")
+        DELETE = "delete", _("Delete")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    namespace = models.ForeignKey(
+        Namespace,
+        on_delete=models.CASCADE,
+        related_name="bulk_action_jobs"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="bulk_action_jobs"
+    )
+    operation = models.CharField(max_length=10, choices=Operation.choices, help_text=_("Action to apply"))
+    filters = models.JSONField(default=dict, blank=True, help_text=_("Filter selecting the short URLs"))
+    expiry_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("Expiry date set by the set_expiry action")
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=ImportJob.Status.choices,
+        default=ImportJob.Status.PENDING,
+        help_text=_("Progress of the action")
+    )
+    rows_matched = models.PositiveIntegerField(default=0, help_text=_("Short URLs matching the filter when queued"))
+    rows_affected = models.PositiveIntegerField(default=0, help_text=_("Short URLs changed or deleted so far"))
+    error = models.TextField(blank=True, help_text=_("Why the action stopped, if it failed"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = _("Bulk Action Job")
+        verbose_name_plural = _("Bulk Action Jobs")
+
+    def __str__(self):
+        return f"{self.namespace_id} {self.operation} {self.id} ({self.status})"
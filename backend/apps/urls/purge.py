@@ -0,0 +1,110 @@
+"""
+Edge cache purge events.
+
+Every resolution cache invalidation publishes an event on the PURGE_CHANNEL
+Redis channel listing the redirect paths and surrogate keys that changed.
+The consume_redirect_purges command turns events into refresh requests
+against the nginx redirect cache; other edge layers (CDN purge APIs) can
+subscribe to the same channel. Pub/sub does not queue events for absent
+subscribers, so s-maxage still bounds how stale an edge can get.
+
+Refresh requests carry a short-lived signed token for their path, which nginx
+forwards only from internal clients; redirects answered to a valid token are
+not counted as clicks.
+"""
+import http.client
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.core import signing
+from django.urls import reverse
+from redis.exceptions import RedisError
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PURGE_CHANNEL = "urls:purge"
+# Request header the nginx redirect cache treats as "fetch and store a fresh copy"
+CACHE_REFRESH_HEADER = "X-Cache-Refresh"
+CACHE_REFRESH_META_KEY = "HTTP_X_CACHE_REFRESH"
+CACHE_REFRESH_SALT = "apps.urls.purge.refresh"
+# Seconds a refresh token stays valid
+CACHE_REFRESH_MAX_AGE = 60
+
+
+def surrogate_keys(namespace_name, short_code):
+    """Return the CDN surrogate keys a redirect is tagged with."""
+    return [f"shorturl:{namespace_name}:{short_code}", f"namespace:{namespace_name}"]
+
+
+def redirect_path(namespace_name, short_code):
+    """Return the path a short URL is served from."""
+    return reverse("short_url_redirect", kwargs={
+        "namespace_name": namespace_name,
+        "short_code": short_code,
+    })
+
+
+def publish_purge(namespace_name, short_codes):
+    """Announce that the redirects of the given short codes changed."""
+    client = get_redis_client()
+    if client is None:
+        return
+    event = {
+        "paths": [redirect_path(namespace_name, code) for code in short_codes],
+        "surrogate_keys": [surrogate_keys(namespace_name, code)[0] for code in short_codes],
+    }
+    try:
+        client.publish(PURGE_CHANNEL, json.dumps(event))
+    except RedisError:
+        logger.warning("Could not publish purge event for %s", namespace_name, exc_info=True)
+
+
+def cache_refresh_token(path):
+    """Sign a path for a refresh request."""
+    return signing.TimestampSigner(salt=CACHE_REFRESH_SALT).sign(path)
+
+
+def is_cache_refresh(request):
+    """Check whether a redirect request is an edge cache refresh rather than a visit."""
+    token = request.META.get(CACHE_REFRESH_META_KEY)
+    if not token:
+        return False
+    try:
+        path = signing.TimestampSigner(salt=CACHE_REFRESH_SALT).unsign(token, max_age=CACHE_REFRESH_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return path == request.path
+
+
+def refresh_edge_cache(endpoint, path, host=None, timeout=5):
+    """
+    Ask an nginx redirect cache to replace its copy of a path.
+
+    Args:
+        endpoint: Base URL of the nginx redirect cache
+        path: Redirect path to refresh
+        host: Host header the redirect is served under (part of the cache key);
+            defaults to the endpoint's host
+
+    Returns:
+        int: Status code of the fresh response, or None if the request failed
+    """
+    url = urlsplit(endpoint)
+    connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(url.netloc, timeout=timeout)
+    headers = {CACHE_REFRESH_HEADER: cache_refresh_token(path)}
+    if host:
+        headers["Host"] = host
+    try:
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    except OSError:
+        logger.warning("Could not refresh %s on %s", path, endpoint, exc_info=True)
+        return None
+    finally:
+        connection.close()
@@ -3,32 +3,142 @@ URL redirect views.
 
 Moved from apps.links.redirect_views - handles short URL redirects.
 """
-from django.shortcuts import get_object_or_404, redirect
-from django.http import Http404
-from .models import ShortURL
+from django.conf import settings
+from django.db import transaction
+from django.http import (
+    HttpResponseGone,
+    HttpResponseNotFound,
+    HttpResponsePermanentRedirect,
+    HttpResponseRedirect,
+)
+from django.http.response import HttpResponseRedirectBase
+from django.utils import timezone
+from .cache import aresolve_short_url, resolve_short_url
+from .clicks import record_click, schedule_click
+from .events import capture_click_event
+from .hotlinks import note_hit
+from .models import RedirectStatus
+from .purge import is_cache_refresh, surrogate_keys
 
+# Dead links are answered with fixed bodies instead of rendering 404.html
+NOT_FOUND_BODY = b"<!doctype html><title>Not Found</title><h1>Short URL not found</h1>"
+NOT_ACTIVE_BODY = b"<!doctype html><title>Not Found</title><h1>Short URL is not active</h1>"
+EXPIRED_BODY = b"<!doctype html><title>Gone</title><h1>Short URL has expired</h1>"
 
+
+class HttpResponseTemporaryRedirect(HttpResponseRedirectBase):
+    status_code = 307
+
+
+class HttpResponsePermanentRedirectKeepMethod(HttpResponseRedirectBase):
+    status_code = 308
+
+
+REDIRECT_RESPONSES = {
+    RedirectStatus.MOVED_PERMANENTLY: HttpResponsePermanentRedirect,
+    RedirectStatus.FOUND: HttpResponseRedirect,
+    RedirectStatus.TEMPORARY_REDIRECT: HttpResponseTemporaryRedirect,
+    RedirectStatus.PERMANENT_REDIRECT: HttpResponsePermanentRedirectKeepMethod,
+}
+# Browsers keep permanent redirects beyond any max-age, so links that may still
+# change are downgraded to the matching temporary status
+TEMPORARY_STATUS = {
+    RedirectStatus.MOVED_PERMANENTLY: RedirectStatus.FOUND,
+    RedirectStatus.PERMANENT_REDIRECT: RedirectStatus.TEMPORARY_REDIRECT,
+}
+
+
+def redirect_policy(short_url, now=None):
+    """
+    Work out the status code and cache lifetimes of a redirect.
+
+    Links with an expiry date are never permanent and are cached for at most
+    their remaining lifetime. Recently edited links are never permanent and
+    not cached by browsers, since only edge caches can be purged.
+
+    Returns:
+        tuple: (status code, max-age, s-maxage)
+    """
+    now = now or timezone.now()
+    status = short_url.redirect_status
+    max_age = short_url.redirect_max_age
+    s_maxage = short_url.redirect_s_maxage
+    if short_url.expiry_date is not None:
+        remaining = max(0, int((short_url.expiry_date - now).total_seconds()))
+        status = TEMPORARY_STATUS.get(status, status)
+        max_age = min(max_age, remaining)
+        s_maxage = min(s_maxage, remaining)
+    if short_url.updated_at is not None:
+        if (now - short_url.updated_at).total_seconds() < settings.SHORT_URL_REDIRECT_EDIT_GRACE:
+            status = TEMPORARY_STATUS.get(status, status)
+            max_age = 0
+    return status, max_age, s_maxage
+
+
+def redirect_response(namespace_name, short_code, short_url):
+    """Build the redirect response for a short URL according to its policy."""
+    status, max_age, s_maxage = redirect_policy(short_url)
+    response = REDIRECT_RESPONSES[status](short_url.original_url)
+    if max_age or s_maxage:
+        response["Cache-Control"] = f"public, max-age={max_age}, s-maxage={s_maxage}"
+        # nginx ignores s-maxage; it caches for X-Accel-Expires and strips the header
+        response["X-Accel-Expires"] = s_maxage
+    elif status in TEMPORARY_STATUS:
+        response["Cache-Control"] = "no-cache"
+    if s_maxage and settings.SHORT_URL_SURROGATE_KEY_HEADER:
+        response[settings.SHORT_URL_SURROGATE_KEY_HEADER] = " ".join(
+            surrogate_keys(namespace_name, short_code)
+        )
+    return response
+
+
+def _dead_link_response(short_url):
+    """Return the fixed response for a missing, inactive or expired short URL."""
+    if short_url is None:
+        return HttpResponseNotFound(NOT_FOUND_BODY)
+    if short_url.is_expired():
+        return HttpResponseGone(EXPIRED_BODY)
+    return HttpResponseNotFound(NOT_ACTIVE_BODY)
+
+
+def serve_redirect(request, namespace_name, short_code):
+    """Resolve a short URL, record the click and build the redirect response."""
+    short_url = resolve_short_url(namespace_name, short_code)
+
+    # Check if URL is accessible (active and not expired)
+    if short_url is None or not short_url.is_accessible():
+        return _dead_link_response(short_url)
+
+    # Increment click count, unless an edge cache is only fetching a fresh copy
+    if not is_cache_refresh(request):
+        record_click(short_url.pk, event=capture_click_event(request, short_url.pk))
+        note_hit(namespace_name, short_code)
+
+    # Redirect to the original URL
+    return redirect_response(namespace_name, short_code, short_url)
+
+
+async def aserve_redirect(request, namespace_name, short_code):
+    """Async serve_redirect() that records the click in the background."""
+    short_url = await aresolve_short_url(namespace_name, short_code)
+    if short_url is None or not short_url.is_accessible():
+        return _dead_link_response(short_url)
+
+    # Record the click after the response is handed back
+    if not is_cache_refresh(request):
+        schedule_click(short_url.pk, capture_click_event(request, short_url.pk))
+        note_hit(namespace_name, short_code)
+
+    return redirect_response(namespace_name, short_code, short_url)
+
+
+@transaction.non_atomic_requests
 def redirect_short_url(request, namespace_name, short_code):
     """Handle short URL redirects."""
-    try:
-        short_url = get_object_or_404(
-            ShortURL,
-            namespace__name=namespace_name,
-            short_code=short_code
-        )
-        
-        # Check if URL is accessible (active and not expired)
-        if not short_url.is_accessible():
-            if short_url.is_expired():
-                raise Http404("Short URL has expired")
-            else:
-                raise Http404("Short URL is not active")
-        
-        # Increment click count
-        short_url.increment_click_count()
-        
-        # Redirect to the original URL
-        return redirect(short_url.original_url)
-        
-    except ShortURL.DoesNotExist:
-        raise Http404("Short URL not found")
+    return serve_redirect(request, namespace_name, short_code)
+
+
+@transaction.non_atomic_requests
+async def redirect_short_url_async(request, namespace_name, short_code):
+    """Handle short URL redirects without blocking the event loop (ASGI)."""
+    return await aserve_redirect(request, namespace_name, short_code)
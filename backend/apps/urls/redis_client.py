@@ -0,0 +1,50 @@
+"""
+Redis clients behind the default cache.
+
+Shared by the resolution cache, click buffering and the short code filter;
+every caller falls back to slower paths when the backend is not django-redis.
+"""
+import asyncio
+import weakref
+
+from django.conf import settings
+
+
+def get_redis_client():
+    """
+    Return the raw Redis client behind the default cache.
+
+    Returns:
+        A redis client, or None when the cache backend is not django-redis
+    """
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        return None
+
+
+_async_redis_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis_client():
+    """
+    Return an asyncio Redis client for the default cache's server.
+
+    Clients are bound to the running event loop. Extra connection pool
+    arguments can be given in the cache's ASYNC_CONNECTION_POOL_KWARGS option.
+
+    Returns:
+        A redis.asyncio client, or None when the cache backend is not django-redis
+    """
+    location = settings.CACHES["default"].get("LOCATION")
+    if get_redis_client() is None or not isinstance(location, str):
+        return None
+    loop = asyncio.get_running_loop()
+    client = _async_redis_clients.get(loop)
+    if client is None:
+        import redis.asyncio
+        options = settings.CACHES["default"].get("OPTIONS", {})
+        client = redis.asyncio.from_url(location, **options.get("ASYNC_CONNECTION_POOL_KWARGS", {}))
+        _async_redis_clients[loop] = client
+    return client
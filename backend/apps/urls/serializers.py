@@ -3,10 +3,15 @@ URL serializers.
 
 Moved from apps.links.serializers - handles namespace and short URL serialization.
 """
+from contextlib import contextmanager
+
 from rest_framework import serializers
+from rest_framework.fields import get_error_detail
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
-from .models import Namespace, ShortURL
+from .clicks import get_pending_clicks
+from .models import BulkActionJob, ImportJob, Namespace, ShortURL
 
 User = get_user_model()
 
@@ -20,6 +25,7 @@ class NamespaceSerializer(serializers.ModelSerializer):
         model = Namespace
         fields = [
             "id", "organization", "organization_name", "name", "description",
+            "redirect_status", "redirect_max_age", "redirect_s_maxage",
             "short_url_count", "created_at", "updated_at"
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
@@ -41,6 +47,24 @@ class NamespaceSerializer(serializers.ModelSerializer):
         return value
 
 
+class ShortURLListSerializer(serializers.ListSerializer):
+    """List serializer that fetches unflushed clicks for the whole page at once."""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        self.child.pending_clicks = get_pending_clicks(items)
+        return super().to_representation(items)
+
+
+@contextmanager
+def short_code_errors():
+    """Report a taken short code found while saving as a validation error."""
+    try:
+        yield
+    except DjangoValidationError as error:
+        raise serializers.ValidationError(get_error_detail(error))
+
+
 class ShortURLSerializer(serializers.ModelSerializer):
     """Serializer for short URLs."""
     namespace_name = serializers.CharField(source="namespace.name", read_only=True)
@@ -54,44 +78,37 @@ class ShortURLSerializer(serializers.ModelSerializer):
             "id", "namespace", "namespace_name", "organization_name",
             "original_url", "short_code", "title", "description",
             "created_by", "created_by_email", "is_active", "expiry_date",
-            "click_count", "full_short_url", "created_at", "updated_at"
+            "redirect_status", "redirect_max_age", "redirect_s_maxage",
+            "click_count", "unique_visitors", "full_short_url", "created_at", "updated_at"
         ]
         read_only_fields = [
-            "id", "created_by", "click_count", "created_at", "updated_at"
+            "id", "created_by", "click_count", "unique_visitors", "created_at", "updated_at"
         ]
+        list_serializer_class = ShortURLListSerializer
+        # Short code uniqueness is enforced by the unique index when saving
+        validators = []
 
     def get_full_short_url(self, obj):
         return obj.get_full_short_url()
 
+    def to_representation(self, instance):
+        """Include clicks that are buffered but not yet flushed in click_count."""
+        data = super().to_representation(instance)
+        pending_clicks = getattr(self, "pending_clicks", None)
+        if pending_clicks is None:
+            pending_clicks = get_pending_clicks([instance])
+        data["click_count"] += pending_clicks.get(instance.pk, 0)
+        return data
+
     def create(self, validated_data):
         # Set the current user as the creator
         validated_data["created_by"] = self.context["request"].user
-        return super().create(validated_data)
-
-    def validate_short_code(self, value):
-        """Validate that short code is unique within the namespace."""
-        namespace = self.initial_data.get("namespace")
-        if namespace and value and value.strip():  # Only validate if value is not empty
-            # Check if this is an update operation
-            if self.instance:
-                # If updating, exclude current instance from uniqueness check
-                if ShortURL.objects.filter(
-                    namespace=namespace,
-                    short_code=value
-                ).exclude(pk=self.instance.pk).exists():
-                    raise serializers.ValidationError(
-                        "Short code must be unique within the namespace."
-                    )
-            else:
-                # If creating, check if short code already exists
-                if ShortURL.objects.filter(
-                    namespace=namespace,
-                    short_code=value
-                ).exists():
-                    raise serializers.ValidationError(
-                        "Short code must be unique within the namespace."
-                    )
-        return value
+        with short_code_errors():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with short_code_errors():
+            return super().update(instance, validated_data)
 
     def validate_expiry_date(self, value):
         """Validate that expiry date is in the future."""
@@ -106,11 +123,20 @@ class ShortURLCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating short URLs with auto-generated short codes."""
     
     short_code = serializers.CharField(required=False, allow_blank=True, max_length=50, default='')
+    reuse_existing = serializers.BooleanField(
+        required=False,
+        default=False,
+        write_only=True,
+        help_text="Return an active link in the namespace that already leads to the URL instead of creating one"
+    )
+    # Set by create() when an existing short URL was returned
+    reused = False
     
     class Meta:
         model = ShortURL
         fields = [
-            "id", "namespace", "original_url", "short_code", "title", "description", "expiry_date"
+            "id", "namespace", "original_url", "short_code", "title", "description", "expiry_date",
+            "redirect_status", "redirect_max_age", "redirect_s_maxage", "reuse_existing"
         ]
         read_only_fields = ["id"]
         extra_kwargs = {
@@ -118,16 +144,25 @@ class ShortURLCreateSerializer(serializers.ModelSerializer):
             'description': {'required': False, 'allow_blank': True},
             'expiry_date': {'required': False}
         }
+        # Short code uniqueness is enforced by the unique index when saving
+        validators = []
 
     def create(self, validated_data):
         # Set the current user as the creator
         validated_data["created_by"] = self.context["request"].user
         
-        # Generate short code if not provided
-        if not validated_data.get("short_code"):
-            validated_data["short_code"] = ShortURL.generate_short_code()
+        # A custom short code always creates a link
+        if validated_data.pop("reuse_existing", False) and not validated_data.get("short_code"):
+            existing = ShortURL.objects.reusable(
+                validated_data["namespace"], validated_data["original_url"]
+            ).order_by("created_at").first()
+            if existing is not None:
+                self.reused = True
+                return existing
         
-        return super().create(validated_data)
+        # A blank short code is allocated by ShortURL.save(), which retries taken codes
+        with short_code_errors():
+            return super().create(validated_data)
 
     def validate_expiry_date(self, value):
         """Validate that expiry date is in the future."""
@@ -136,3 +171,59 @@ class ShortURLCreateSerializer(serializers.ModelSerializer):
                 "Expiry date must be in the future."
             )
         return value
+
+
+class ShortURLBulkItemSerializer(ShortURLCreateSerializer):
+    """One entry of a bulk creation; the namespace is checked once per batch, not per entry."""
+
+    namespace = serializers.UUIDField()
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for the status of a short URL import."""
+    rows_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id", "namespace", "format", "status", "rows_processed", "rows_created", "rows_failed",
+            "rows_per_second", "errors", "error", "created_at", "started_at", "finished_at"
+        ]
+        read_only_fields = fields
+
+
+class ShortURLBulkActionFilterSerializer(serializers.Serializer):
+    """Which short URLs of the namespace a bulk action applies to; all of them when empty."""
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    created_by = serializers.UUIDField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+
+class ShortURLBulkActionSerializer(serializers.Serializer):
+    """Serializer for a bulk action on the short URLs of a namespace."""
+    namespace = serializers.PrimaryKeyRelatedField(queryset=Namespace.objects.select_related("organization"))
+    operation = serializers.ChoiceField(choices=BulkActionJob.Operation.choices)
+    expiry_date = serializers.DateTimeField(required=False, allow_null=True)
+    filter = ShortURLBulkActionFilterSerializer(required=False, default=dict)
+
+    def validate(self, attrs):
+        """Require a future (or null) expiry date for set_expiry."""
+        if attrs["operation"] == BulkActionJob.Operation.SET_EXPIRY:
+            if "expiry_date" not in attrs:
+                raise serializers.ValidationError({"expiry_date": "This field is required for set_expiry."})
+            if attrs["expiry_date"] and attrs["expiry_date"] <= timezone.now():
+                raise serializers.ValidationError({"expiry_date": "Expiry date must be in the future."})
+        return attrs
+
+
+class BulkActionJobSerializer(serializers.ModelSerializer):
+    """Serializer for the status of a background bulk action."""
+
+    class Meta:
+        model = BulkActionJob
+        fields = [
+            "id", "namespace", "operation", "filters", "expiry_date", "status", "rows_matched",
+            "rows_affected", "error", "created_at", "started_at", "finished_at"
+        ]
+        read_only_fields = fields
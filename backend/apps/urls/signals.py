@@ -0,0 +1,85 @@
+"""
+URL signals.
+
+Keeps the redirect resolution cache and the short code Bloom filter in sync
+with ShortURL and Namespace changes.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.organizations.models import Organization
+
+from .bloom import short_code_filter
+from .bulk_actions import BulkDeleteQuerySet
+from .cache import invalidate_short_urls_on_commit
+from .models import Namespace, ShortURL
+
+
+@receiver(pre_save, sender=ShortURL)
+def remember_previous_short_url_key(sender, instance, **kwargs):
+    """Remember the cache key a short URL had before this save."""
+    instance._previous_cache_key = None
+    if not instance._state.adding:
+        instance._previous_cache_key = ShortURL.objects.filter(
+            pk=instance.pk
+        ).values_list("namespace__name", "short_code").first()
+
+
+@receiver(post_save, sender=ShortURL)
+def invalidate_saved_short_url(sender, instance, **kwargs):
+    """Invalidate the cached resolution of a saved short URL, old key included."""
+    previous = getattr(instance, "_previous_cache_key", None)
+    if previous:
+        invalidate_short_urls_on_commit(previous[0], [previous[1]])
+    short_code_filter.add_on_commit([(instance.namespace.name, instance.short_code)])
+    invalidate_short_urls_on_commit(instance.namespace.name, [instance.short_code])
+
+
+@receiver(post_delete, sender=ShortURL)
+def invalidate_deleted_short_url(sender, instance, origin=None, **kwargs):
+    """Invalidate the cached resolution of a deleted short URL."""
+    if isinstance(origin, (Namespace, Organization, BulkDeleteQuerySet)):
+        # Cascading namespace deletes are invalidated in bulk by the namespace handler,
+        # bulk action deletes by apply_bulk_action()
+        return
+    if ShortURL.namespace.is_cached(instance):
+        namespace_name = instance.namespace.name
+    else:
+        namespace_name = Namespace.objects.filter(
+            pk=instance.namespace_id
+        ).values_list("name", flat=True).first()
+    if namespace_name is not None:
+        invalidate_short_urls_on_commit(namespace_name, [instance.short_code])
+
+
+@receiver(pre_save, sender=Namespace)
+def remember_previous_namespace_name(sender, instance, **kwargs):
+    """Remember the name and redirect policy a namespace had before this save."""
+    instance._previous_state = None
+    if not instance._state.adding:
+        instance._previous_state = Namespace.objects.filter(
+            pk=instance.pk
+        ).values_list("name", *Namespace.REDIRECT_POLICY_FIELDS).first()
+
+
+@receiver(post_save, sender=Namespace)
+def invalidate_renamed_namespace(sender, instance, created, **kwargs):
+    """Invalidate every cached resolution of a renamed namespace or one whose redirect policy changed."""
+    previous_state = getattr(instance, "_previous_state", None)
+    if created or not previous_state:
+        return
+    previous_name, *previous_policy = previous_state
+    policy = [getattr(instance, field) for field in Namespace.REDIRECT_POLICY_FIELDS]
+    if previous_name == instance.name and previous_policy == policy:
+        return
+    short_codes = list(instance.shorturls.values_list("short_code", flat=True))
+    if previous_name != instance.name:
+        short_code_filter.add_on_commit([(instance.name, short_code) for short_code in short_codes])
+        invalidate_short_urls_on_commit(previous_name, short_codes)
+    invalidate_short_urls_on_commit(instance.name, short_codes)
+
+
+@receiver(pre_delete, sender=Namespace)
+def invalidate_deleted_namespace(sender, instance, **kwargs):
+    """Invalidate every cached resolution in a namespace that is being deleted."""
+    invalidate_short_urls_on_commit(instance.name, instance.shorturls.values_list("short_code", flat=True))
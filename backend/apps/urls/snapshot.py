@@ -0,0 +1,276 @@
+"""
+Redirect snapshot files.
+
+A snapshot is an immutable binary file mapping (namespace name, short code)
+to everything a redirect needs, which workers mmap and search without any
+database or cache round trip. Layout (little-endian)::
+
+    header  magic(8s) version(Q) count(Q) built_at(d)
+    index   count x [key hash(Q), record offset(Q)], sorted by hash
+    records [key length(H), url length(I), expiry µs(q, -1 = none), pk(16s),
+             active(B), redirect status(H), max-age(I), s-maxage(I),
+             updated µs(q, -1 = none), key, url]
+
+Keys are ``namespace_name + "\\0" + short_code`` in UTF-8, hashed with an
+8-byte BLAKE2b digest. ``version`` is the resolution cache version read
+before the rows were queried; changes logged after it shadow snapshot entries.
+"""
+import datetime
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+
+MAGIC = b"LNSNAP2\0"
+HEADER = struct.Struct("<8sQQd")
+INDEX_ENTRY = struct.Struct("<QQ")
+RECORD = struct.Struct("<HIq16sBHIIq")
+NO_EXPIRY = -1
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def snapshot_key(namespace_name, short_code):
+    """Encode a (namespace name, short code) pair as a snapshot key."""
+    return f"{namespace_name}\0{short_code}".encode()
+
+
+def key_hash(key):
+    """Hash a snapshot key to the unsigned 64-bit value the index is sorted by."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _to_micros(value):
+    if value is None:
+        return NO_EXPIRY
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(value):
+    if value == NO_EXPIRY:
+        return None
+    return EPOCH + datetime.timedelta(microseconds=value)
+
+
+def build_snapshot(path, rows, version):
+    """
+    Write a snapshot file atomically.
+
+    Args:
+        path: Destination file; replaced with os.replace() once complete
+        rows: Iterable of (namespace_name, short_code) followed by the ResolvedURL fields
+              (pk, original_url, is_active, expiry_date, redirect_status,
+              redirect_max_age, redirect_s_maxage, updated_at)
+        version: Resolution cache version read before the rows were queried
+
+    Returns:
+        int: Number of entries written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    hashes = array("Q")
+    offsets = array("Q")
+
+    with tempfile.TemporaryFile(dir=directory) as records:
+        offset = 0
+        for (namespace_name, short_code, pk, original_url, is_active, expiry_date,
+             status, max_age, s_maxage, updated_at) in rows:
+            key = snapshot_key(namespace_name, short_code)
+            url = original_url.encode()
+            records.write(RECORD.pack(
+                len(key), len(url), _to_micros(expiry_date), pk.bytes,
+                is_active, status, max_age, s_maxage, _to_micros(updated_at)
+            ))
+            records.write(key)
+            records.write(url)
+            hashes.append(key_hash(key))
+            offsets.append(offset)
+            offset += RECORD.size + len(key) + len(url)
+
+        count = len(hashes)
+        order = sorted(range(count), key=hashes.__getitem__)
+        index = bytearray(INDEX_ENTRY.size * count)
+        for position, item in enumerate(order):
+            INDEX_ENTRY.pack_into(index, position * INDEX_ENTRY.size, hashes[item], offsets[item])
+        del order, hashes, offsets
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, version, count, time.time()))
+                out.write(index)
+                records.seek(0)
+                shutil.copyfileobj(records, out)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return count
+
+
+def read_snapshot_version(path):
+    """Return the version recorded in a snapshot file, or None if it is missing or invalid."""
+    try:
+        with open(path, "rb") as snapshot:
+            header = snapshot.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, version, _, _ = HEADER.unpack(header)
+    return version if magic == MAGIC else None
+
+
+class SnapshotReader:
+    """Read-only, memory-mapped view of one snapshot file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as snapshot:
+            stat = os.fstat(snapshot.fileno())
+            self._map = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.count, self.built_at = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a redirect snapshot")
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._records_start = HEADER.size + INDEX_ENTRY.size * self.count
+
+    def lookup(self, namespace_name, short_code):
+        """
+        Find a short URL in the snapshot.
+
+        Returns:
+            tuple: The ResolvedURL fields, or None if absent
+        """
+        key = snapshot_key(namespace_name, short_code)
+        target = key_hash(key)
+        data = self._map
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if INDEX_ENTRY.unpack_from(data, HEADER.size + middle * INDEX_ENTRY.size)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        # Walk every entry sharing the hash in case of a collision
+        while low < self.count:
+            entry_hash, offset = INDEX_ENTRY.unpack_from(data, HEADER.size + low * INDEX_ENTRY.size)
+            if entry_hash != target:
+                return None
+            start = self._records_start + offset
+            (key_length, url_length, expiry, pk,
+             is_active, status, max_age, s_maxage, updated_at) = RECORD.unpack_from(data, start)
+            key_start = start + RECORD.size
+            if data[key_start:key_start + key_length] == key:
+                url_start = key_start + key_length
+                url = data[url_start:url_start + url_length].decode()
+                return (
+                    uuid.UUID(bytes=pk), url, bool(is_active), _from_micros(expiry),
+                    status, max_age, s_maxage, _from_micros(updated_at)
+                )
+            low += 1
+        return None
+
+
+class SnapshotStore:
+    """
+    Holds the current snapshot of a process and swaps to newer files.
+
+    Keys changed after the snapshot was built are "shadowed" and never
+    answered from the snapshot, so callers fall back to the normal lookup.
+    Each shadowed key remembers the version it changed at and is forgotten
+    once a snapshot built at or after that version is loaded.
+    """
+
+    def __init__(self, path, refresh_interval):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.reader = None
+        self.changes_seen = 0
+        self._shadowed = {}
+        self._discarded_identity = None
+        self._refreshed_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def refresh_due(self, now):
+        """Check whether the file and change log should be looked at again."""
+        return now - self._refreshed_at >= self.refresh_interval
+
+    def reload_if_changed(self, now):
+        """
+        Swap to a newer snapshot file if one appeared.
+
+        Returns:
+            bool: True if a different snapshot is now loaded
+        """
+        self._refreshed_at = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self.reader is not None and self.reader.identity == identity:
+            return False
+        if identity == self._discarded_identity:
+            return False
+        try:
+            reader = SnapshotReader(self.path)
+        except (OSError, ValueError, struct.error):
+            return False
+        with self._lock:
+            # The old map is released once in-flight lookups drop their reference
+            self.reader = reader
+            self._shadowed = {
+                key: version for key, version in self._shadowed.items()
+                if version > reader.version
+            }
+            self.changes_seen = reader.version
+        return True
+
+    def discard(self):
+        """
+        Stop answering from the current snapshot until a different file is built.
+
+        Used when the change log can no longer say which of its entries are stale.
+        """
+        with self._lock:
+            if self.reader is not None:
+                self._discarded_identity = self.reader.identity
+            self.reader = None
+            self._shadowed = {}
+            self.changes_seen = 0
+
+    def shadow(self, changes):
+        """
+        Stop answering changed keys from the snapshot.
+
+        Args:
+            changes: Iterable of ((namespace name, short code), version) pairs
+        """
+        with self._lock:
+            for key, version in changes:
+                self._shadowed[key] = max(version, self._shadowed.get(key, version))
+
+    def apply_change_log(self, changes):
+        """Shadow keys read from the shared change log and remember how far it was read."""
+        changes = list(changes)
+        self.shadow(changes)
+        for _, version in changes:
+            self.changes_seen = max(self.changes_seen, version)
+
+    def lookup(self, namespace_name, short_code):
+        """Look a short URL up in the current snapshot unless it changed since the build."""
+        reader = self.reader
+        if reader is None or (namespace_name, short_code) in self._shadowed:
+            return None
+        return reader.lookup(namespace_name, short_code)
@@ -0,0 +1,74 @@
+from django.conf import settings
+
+from config import celery_app
+
+from .bloom import short_code_filter
+from .bulk_actions import run_bulk_action_job
+from .cache import write_redirect_snapshot
+from .clicks import flush_clicks, fold_click_shards
+from .events import flush_click_events
+from .expiry import deactivate_expired_links
+from .hotlinks import decay_hot_links
+from .imports import run_import
+
+
+@celery_app.task()
+def flush_click_counts():
+    """Fold clicks buffered in Redis into ShortURL.click_count."""
+    return flush_clicks()
+
+
+@celery_app.task()
+def flush_click_event_buffer():
+    """Write buffered click events to the database in batches."""
+    return flush_click_events()
+
+
+@celery_app.task()
+def fold_click_counter_shards():
+    """Fold sharded click counters of hot links into ShortURL.click_count."""
+    return fold_click_shards()
+
+
+@celery_app.task()
+def build_redirect_snapshot():
+    """Rebuild the memory-mapped redirect snapshot."""
+    if not settings.SHORT_URL_SNAPSHOT_PATH:
+        return 0
+    return write_redirect_snapshot()
+
+
+@celery_app.task()
+def rebuild_short_code_filter():
+    """Rebuild the short code Bloom filter so deleted codes drop out of it."""
+    return short_code_filter.rebuild()
+
+
+@celery_app.task()
+def deactivate_expired_short_urls():
+    """Flip short URLs past their expiry date inactive and evict their cache entries."""
+    return deactivate_expired_links()
+
+
+@celery_app.task()
+def decay_hot_link_scores():
+    """Halve shared hot link scores so the hot list follows current traffic."""
+    return decay_hot_links()
+
+
+@celery_app.task(
+    soft_time_limit=settings.SHORT_URL_IMPORT_TIME_LIMIT,
+    time_limit=settings.SHORT_URL_IMPORT_TIME_LIMIT + 60
+)
+def import_short_urls(job_id):
+    """Create the short URLs of an uploaded import file."""
+    return run_import(job_id)
+
+
+@celery_app.task(
+    soft_time_limit=settings.SHORT_URL_BULK_ACTION_TIME_LIMIT,
+    time_limit=settings.SHORT_URL_BULK_ACTION_TIME_LIMIT + 60
+)
+def run_bulk_action(job_id):
+    """Apply a bulk action too large to run within its request."""
+    return run_bulk_action_job(job_id)
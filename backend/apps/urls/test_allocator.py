@@ -0,0 +1,188 @@
+"""
+Test short code allocation.
+
+Tests for the keyed Feistel permutation, length growth and the IntegrityError
+handling that replaced exists() checks when saving short URLs.
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .allocator import BASE, FeistelPermutation, code_for_index, leases, reserve_indices, split_index
+from .cache import local_cache
+from .models import Namespace, ShortCodeCounter, ShortURL
+
+User = get_user_model()
+
+
+class FeistelPermutationTest(SimpleTestCase):
+    """Test cases for the code permutation."""
+
+    def test_permutation_is_a_bijection(self):
+        """Test that every offset maps to a distinct offset of the same length."""
+        permutation = FeistelPermutation(b'k' * 32)
+        permuted = [permutation.permute(value, 2, b'ns') for value in range(BASE ** 2)]
+        self.assertEqual(sorted(permuted), list(range(BASE ** 2)))
+        # Consecutive offsets do not map to consecutive offsets
+        self.assertNotEqual(permuted[:10], sorted(permuted[:10]))
+
+    def test_key_and_tweak_select_permutations(self):
+        """Test that namespaces and keys get unrelated code sequences."""
+        permutation = FeistelPermutation(b'k' * 32)
+        sequence = [permutation.permute(value, 3, b'one') for value in range(20)]
+        self.assertNotEqual(sequence, [permutation.permute(value, 3, b'two') for value in range(20)])
+        other_key = FeistelPermutation(b'x' * 32)
+        self.assertNotEqual(sequence, [other_key.permute(value, 3, b'one') for value in range(20)])
+
+    def test_length_grows_when_codes_run_out(self):
+        """Test that indices past the shortest codes move on to longer codes."""
+        self.assertEqual(split_index(0, 2), (2, 0))
+        self.assertEqual(split_index(BASE ** 2 - 1, 2), (2, BASE ** 2 - 1))
+        self.assertEqual(split_index(BASE ** 2, 2), (3, 0))
+        self.assertEqual(split_index(BASE ** 2 + BASE ** 3, 2), (4, 0))
+
+    @override_settings(SHORT_URL_CODE_MIN_LENGTH=1)
+    def test_codes_unique_across_lengths(self):
+        """Test that a namespace never gets the same code twice while growing."""
+        codes = [code_for_index('ns', index) for index in range(BASE + 200)]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertEqual({len(code) for code in codes[:BASE]}, {1})
+        self.assertEqual({len(code) for code in codes[BASE:]}, {2})
+
+
+class ShortCodeAllocationTest(TestCase):
+    """Test cases for allocating short codes when saving short URLs."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        leases.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Allocator Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='alloc-ns'
+        )
+
+    def create(self, short_code=''):
+        return ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code=short_code,
+            created_by=self.user
+        )
+
+    @override_settings(SHORT_URL_CODE_BLOCK_SIZE=1)
+    def test_generated_codes_follow_the_counter(self):
+        """Test that generated codes are allocated from the namespace counter."""
+        codes = [self.create().short_code for _ in range(3)]
+        self.assertEqual(len(set(codes)), 3)
+        self.assertEqual(codes[0], code_for_index(self.namespace.pk, 0))
+        self.assertEqual(len(codes[0]), 6)
+        self.assertEqual(ShortCodeCounter.objects.get(namespace=self.namespace).allocated, 3)
+
+    @override_settings(SHORT_URL_CODE_BLOCK_SIZE=100)
+    def test_committed_block_is_used_without_round_trips(self):
+        """Test that a leased block hands out codes without touching the counter."""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create()
+        with self.assertNumQueries(0):
+            codes = [first.allocate_short_code() for _ in range(99)]
+        self.assertEqual(codes[-1], code_for_index(self.namespace.pk, 99))
+        self.assertEqual(ShortCodeCounter.objects.get(namespace=self.namespace).allocated, 100)
+        # The block is used up, so the next code reserves another one
+        self.assertEqual(self.create().short_code, code_for_index(self.namespace.pk, 100))
+
+    @override_settings(SHORT_URL_CODE_BLOCK_SIZE=100)
+    def test_rolled_back_block_is_not_leased(self):
+        """Test that indices reserved by a rolled back transaction are never handed out."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.create()
+                raise RuntimeError
+        self.assertIsNone(leases.take(self.namespace.pk))
+        self.assertEqual(self.create().short_code, code_for_index(self.namespace.pk, 0))
+
+    def test_reserve_indices_hands_out_ranges(self):
+        """Test that reservations never overlap."""
+        self.assertEqual(reserve_indices(self.namespace.pk, 10), 0)
+        self.assertEqual(reserve_indices(self.namespace.pk), 10)
+        self.assertEqual(reserve_indices(self.namespace.pk, 5), 11)
+
+    def test_generated_code_taken_by_vanity_code_is_retried(self):
+        """Test that a collision with an existing code allocates a new code."""
+        self.create('vanity')
+        with mock.patch('apps.urls.allocator.allocate_short_code', side_effect=['vanity', 'fresh1']):
+            short_url = self.create()
+        self.assertEqual(short_url.short_code, 'fresh1')
+
+    def test_taken_vanity_code_raises_validation_error(self):
+        """Test that a custom code that is already taken is rejected on save."""
+        self.create('vanity')
+        with self.assertRaises(ValidationError) as raised:
+            self.create('vanity')
+        self.assertIn('short_code', raised.exception.message_dict)
+        # The failed insert does not break the surrounding transaction
+        self.assertEqual(ShortURL.objects.filter(short_code='vanity').count(), 1)
+
+
+class ShortCodeAPITest(APITestCase):
+    """Test cases for taken short codes through the API."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Allocator API Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='alloc-api-ns'
+        )
+
+    def get_auth_headers(self):
+        refresh = RefreshToken.for_user(self.user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+    def test_taken_vanity_code_returns_400(self):
+        """Test that creating a link with a taken custom code is a validation error."""
+        data = {
+            'namespace': str(self.namespace.pk),
+            'original_url': 'https://example.com/vanity',
+            'short_code': 'launch'
+        }
+        response = self.client.post('/api/short-urls/', data, **self.get_auth_headers())
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post('/api/short-urls/', data, **self.get_auth_headers())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('short_code', response.data)
+
+        data['short_code'] = ''
+        response = self.client.post('/api/short-urls/', data, **self.get_auth_headers())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['short_code']), 6)
@@ -0,0 +1,122 @@
+"""
+Test the short code Bloom filter.
+
+Tests that definite misses skip the database and saved codes are never missed.
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from .bloom import BloomFilter, short_code_filter
+from .cache import local_cache
+from .models import Namespace, ShortURL
+
+User = get_user_model()
+
+
+class BloomFilterTest(SimpleTestCase):
+    """Test cases for Bloom filter sizing."""
+
+    def test_false_positive_rate(self):
+        """Test that a full filter stays close to its configured error rate."""
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        bitmap = bloom.empty_bitmap()
+        for number in range(2000):
+            for position in bloom.positions('ns', f'in{number}'):
+                bitmap[position >> 3] |= 0x80 >> (position & 7)
+        false_positives = sum(
+            all(bitmap[p >> 3] & (0x80 >> (p & 7)) for p in bloom.positions('ns', f'out{number}'))
+            for number in range(10000)
+        )
+        self.assertLess(false_positives / 10000, 0.02)
+
+
+@override_settings(CACHES=settings.REDIS_CACHES)
+class ShortCodeFilterTest(TestCase):
+    """Test cases for the short code filter on redirects."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Bloom Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='bloom-ns'
+        )
+        self.short_url = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code='abc123',
+            created_by=self.user
+        )
+        short_code_filter.rebuild()
+
+    def test_unknown_code_skips_database(self):
+        """Test that a code that never existed is answered without a query."""
+        self.assertFalse(short_code_filter.might_contain('bloom-ns', 'never1'))
+        with self.assertNumQueries(0):
+            response = self.client.get('/bloom-ns/never1/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_saved_codes_are_added(self):
+        """Test that new codes and renamed namespaces are added on save."""
+        self.assertTrue(short_code_filter.might_contain('bloom-ns', 'abc123'))
+        ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/new',
+            short_code='new123',
+            created_by=self.user
+        )
+        self.assertEqual(self.client.get('/bloom-ns/new123/').status_code, 302)
+
+        self.namespace.name = 'bloom-renamed'
+        self.namespace.save()
+        self.assertTrue(short_code_filter.might_contain('bloom-renamed', 'abc123'))
+
+    def test_code_committed_during_rebuild_is_kept(self):
+        """Test that a rebuild that cannot see an uncommitted save does not lose its code."""
+        with self.captureOnCommitCallbacks(execute=True):
+            ShortURL.objects.create(
+                namespace=self.namespace,
+                original_url='https://example.com/late',
+                short_code='late12',
+                created_by=self.user
+            )
+            # The rebuild reads from another connection, where the row is not committed yet
+            uncommitted = ShortURL.objects.exclude(short_code='late12')
+            with mock.patch('apps.urls.bloom.ShortURL', SimpleNamespace(objects=uncommitted)):
+                short_code_filter.rebuild()
+            self.assertFalse(short_code_filter.might_contain('bloom-ns', 'late12'))
+        self.assertTrue(short_code_filter.might_contain('bloom-ns', 'late12'))
+        self.assertEqual(self.client.get('/bloom-ns/late12/').status_code, 302)
+
+    def test_rebuild_drops_deleted_codes(self):
+        """Test that a rebuild forgets deleted codes."""
+        self.short_url.delete()
+        self.assertTrue(short_code_filter.might_contain('bloom-ns', 'abc123'))
+        short_code_filter.rebuild()
+        self.assertFalse(short_code_filter.might_contain('bloom-ns', 'abc123'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LocalShortCodeFilterTest(TestCase):
+    """Test cases for the filter without a shared Redis."""
+
+    def test_disabled_without_redis(self):
+        """Test that without Redis every code might exist, so other processes' codes are never rejected."""
+        with self.assertNumQueries(0):
+            self.assertIsNone(short_code_filter.rebuild())
+            self.assertTrue(short_code_filter.might_contain('bloom-ns', 'never1'))
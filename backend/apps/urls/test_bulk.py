@@ -0,0 +1,147 @@
+"""
+Test bulk short URL creation.
+
+Tests for POST /api/short-urls/bulk/.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .allocator import leases
+from .cache import local_cache
+from .models import Namespace, ShortURL
+
+User = get_user_model()
+
+
+class BulkCreateTest(APITestCase):
+    """Test cases for bulk short URL creation."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        leases.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Bulk Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='bulk-ns'
+        )
+        other_owner = User.objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.other_namespace = Namespace.objects.create(
+            organization=Organization.objects.create(name='Other Organization', owner=other_owner),
+            name='other-ns'
+        )
+        ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/existing',
+            short_code='taken',
+            created_by=self.user
+        )
+
+    def get_auth_headers(self):
+        refresh = RefreshToken.for_user(self.user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+    def post(self, items):
+        return self.client.post('/api/short-urls/bulk/', items, format='json', **self.get_auth_headers())
+
+    def entry(self, number, **fields):
+        return {
+            'namespace': str(self.namespace.pk),
+            'original_url': f'https://example.com/page/{number}',
+            **fields
+        }
+
+    def test_partial_failures_are_reported_per_entry(self):
+        """Test that every entry gets its own result and valid entries are created."""
+        # A cached miss must not hide the new link
+        self.assertEqual(self.client.get('/bulk-ns/launch/').status_code, 404)
+
+        response = self.post([
+            self.entry(0),
+            self.entry(1, short_code='launch'),
+            self.entry(2, short_code='launch'),
+            self.entry(3, short_code='taken'),
+            self.entry(4, original_url='not a url'),
+            self.entry(5, namespace=str(self.other_namespace.pk)),
+            self.entry(6, namespace='00000000-0000-0000-0000-000000000000'),
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 5)
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], list(range(7)))
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['created', 'created', 'error', 'error', 'error', 'error', 'error']
+        )
+        self.assertEqual(len(results[0]['short_code']), 6)
+        self.assertEqual(results[1]['short_code'], 'launch')
+        self.assertIn('short_code', results[2]['errors'])
+        self.assertIn('short_code', results[3]['errors'])
+        self.assertIn('original_url', results[4]['errors'])
+        self.assertIn('namespace', results[5]['errors'])
+        self.assertIn('namespace', results[6]['errors'])
+
+        short_url = ShortURL.objects.get(pk=results[0]['id'])
+        self.assertEqual(short_url.created_by, self.user)
+        self.assertEqual(short_url.original_url, 'https://example.com/page/0')
+        response = self.client.get('/bulk-ns/launch/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], 'https://example.com/page/1')
+
+    def test_query_count_does_not_grow_with_entries(self):
+        """Test that creating links does not run queries per link."""
+        def count_queries(entries):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(entries)
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        few = count_queries([self.entry(number) for number in range(5)])
+        many = count_queries(
+            [self.entry(number) for number in range(200)] +
+            [self.entry(number, short_code=f'custom{number}') for number in range(200)]
+        )
+        # Only the INSERT statements grow, by one per batch of rows the backend accepts
+        insert_batches = -(-400 // connection.ops.bulk_batch_size(ShortURL._meta.concrete_fields, []))
+        self.assertLessEqual(many, few + insert_batches + 1)
+        self.assertEqual(ShortURL.objects.filter(namespace=self.namespace).count(), 406)
+        codes = ShortURL.objects.values_list('short_code', flat=True)
+        self.assertEqual(len(set(codes)), len(codes))
+
+    def test_all_failed_returns_400(self):
+        """Test that a batch with no valid entries is rejected."""
+        response = self.post([self.entry(0, short_code='taken')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+
+    @override_settings(SHORT_URL_BULK_MAX_ITEMS=2)
+    def test_batch_size_limit(self):
+        """Test that oversized batches and non-list bodies are rejected."""
+        response = self.post([self.entry(number) for number in range(3)])
+        self.assertEqual(response.status_code, 400)
+        response = self.post(self.entry(0))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ShortURL.objects.exclude(short_code='taken').exists())
@@ -0,0 +1,202 @@
+"""
+Test bulk short URL actions.
+
+Tests for POST /api/short-urls/bulk_action/ and the background jobs it
+queues for large actions.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .allocator import leases
+from .bulk_actions import run_bulk_action_job
+from .cache import local_cache
+from .models import BulkActionJob, ImportJob, Namespace, ShortURL
+
+User = get_user_model()
+
+
+class BulkActionTest(APITestCase):
+    """Test cases for bulk short URL actions."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        leases.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.editor = User.objects.create_user(
+            email='editor@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Campaign Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        OrganizationMembership.objects.create(
+            user=self.editor,
+            organization=self.organization,
+            role=OrganizationMembership.Role.EDITOR
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='campaign'
+        )
+        self.other_namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='evergreen'
+        )
+        self.links = [
+            ShortURL.objects.create(
+                namespace=self.namespace,
+                original_url=f'https://example.com/{number}',
+                short_code=f'promo{number}',
+                created_by=self.editor if number % 2 else self.user
+            )
+            for number in range(6)
+        ]
+        self.untouched = ShortURL.objects.create(
+            namespace=self.other_namespace,
+            original_url='https://example.com/keep',
+            short_code='promo0',
+            created_by=self.user
+        )
+
+    def get_auth_headers(self, user=None):
+        refresh = RefreshToken.for_user(user or self.user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+    def post(self, operation, user=None, **data):
+        return self.client.post('/api/short-urls/bulk_action/', {
+            'namespace': str(self.namespace.pk),
+            'operation': operation,
+            **data
+        }, format='json', **self.get_auth_headers(user))
+
+    def test_deactivate_by_ids(self):
+        """Test that deactivating links updates them in one statement and drops their cached redirects."""
+        self.assertEqual(self.client.get('/campaign/promo0/').status_code, 302)
+
+        response = self.post('deactivate', filter={'ids': [str(link.pk) for link in self.links[:3]]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['matched'], response.data['affected']), (3, 3))
+        self.assertEqual(
+            set(ShortURL.objects.filter(is_active=False).values_list('short_code', flat=True)),
+            {'promo0', 'promo1', 'promo2'}
+        )
+        self.assertTrue(ShortURL.objects.get(pk=self.untouched.pk).is_active)
+        self.assertNotEqual(self.client.get('/campaign/promo0/').status_code, 302)
+
+        response = self.post('activate')
+        self.assertEqual(response.data['affected'], 6)
+        self.assertFalse(ShortURL.objects.filter(is_active=False).exists())
+        self.assertEqual(self.client.get('/campaign/promo0/').status_code, 302)
+
+    def test_query_count_does_not_grow_with_links(self):
+        """Test that an action runs a fixed number of queries however many links match."""
+        def count_queries(ids):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post('deactivate', filter={'ids': ids})
+            self.assertEqual(response.data['affected'], len(ids))
+            return len(queries)
+
+        self.assertEqual(
+            count_queries([str(self.links[0].pk)]),
+            count_queries([str(link.pk) for link in self.links])
+        )
+
+    def test_set_expiry_by_creator_and_date(self):
+        """Test that set_expiry validates the date and applies to the filtered links."""
+        response = self.post('set_expiry')
+        self.assertEqual(response.status_code, 400)
+        response = self.post('set_expiry', expiry_date=(timezone.now() - timedelta(days=1)).isoformat())
+        self.assertEqual(response.status_code, 400)
+
+        expiry_date = timezone.now() + timedelta(days=7)
+        response = self.post('set_expiry', expiry_date=expiry_date.isoformat(), filter={
+            'created_by': str(self.editor.pk),
+            'created_after': (timezone.now() - timedelta(hours=1)).isoformat(),
+        })
+        self.assertEqual(response.data['affected'], 3)
+        self.assertEqual(ShortURL.objects.filter(expiry_date=expiry_date).count(), 3)
+        self.assertFalse(ShortURL.objects.filter(created_by=self.user, expiry_date__isnull=False).exists())
+
+        response = self.post('set_expiry', expiry_date=None)
+        self.assertEqual(response.data['affected'], 6)
+        self.assertFalse(ShortURL.objects.filter(expiry_date__isnull=False).exists())
+
+    @override_settings(SHORT_URL_BULK_ACTION_CHUNK_SIZE=4)
+    def test_delete_in_chunks(self):
+        """Test that deletes only remove the namespace's matching links and their cached redirects."""
+        self.assertEqual(self.client.get('/campaign/promo5/').status_code, 302)
+        response = self.post('delete')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['affected'], 6)
+        self.assertEqual(list(ShortURL.objects.all()), [self.untouched])
+        self.assertEqual(self.client.get('/campaign/promo5/').status_code, 404)
+        self.assertEqual(self.client.get('/evergreen/promo0/').status_code, 302)
+
+    @override_settings(SHORT_URL_BULK_ACTION_SYNC_LIMIT=2, SHORT_URL_BULK_ACTION_CHUNK_SIZE=4)
+    def test_large_action_runs_in_background(self):
+        """Test that an action matching many links is queued as a job that reports progress."""
+        with mock.patch('apps.urls.views.run_bulk_action.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.post('deactivate', filter={'created_by': str(self.user.pk)})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response.data['rows_matched'], 3)
+        delay.assert_called_once_with(str(response.data['id']))
+        self.assertFalse(ShortURL.objects.filter(is_active=False).exists())
+
+        self.assertEqual(run_bulk_action_job(response.data['id']), 3)
+        status = self.client.get(
+            f'/api/short-urls/bulk_action/{response.data["id"]}/', **self.get_auth_headers()
+        )
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.data['status'], 'completed')
+        self.assertEqual(status.data['rows_affected'], 3)
+        self.assertEqual(ShortURL.objects.filter(is_active=False, created_by=self.user).count(), 3)
+        self.assertFalse(ShortURL.objects.filter(is_active=False, created_by=self.editor).exists())
+        # A redelivered task does nothing
+        self.assertEqual(run_bulk_action_job(response.data['id']), 0)
+        self.assertEqual(BulkActionJob.objects.get().rows_affected, 3)
+
+    @override_settings(SHORT_URL_BULK_ACTION_SYNC_LIMIT=2)
+    def test_running_job_is_not_claimed_twice(self):
+        """Test that a delivery arriving while the job runs elsewhere leaves it alone."""
+        with mock.patch('apps.urls.views.run_bulk_action.delay'):
+            response = self.post('deactivate')
+        BulkActionJob.objects.filter(pk=response.data['id']).update(status=ImportJob.Status.RUNNING)
+        self.assertEqual(run_bulk_action_job(response.data['id']), 0)
+        self.assertFalse(ShortURL.objects.filter(is_active=False).exists())
+
+    def test_permissions(self):
+        """Test that viewers and non-members cannot run bulk actions."""
+        viewer = User.objects.create_user(email='viewer@example.com', password='testpass123')
+        OrganizationMembership.objects.create(
+            user=viewer,
+            organization=self.organization,
+            role=OrganizationMembership.Role.VIEWER
+        )
+        outsider = User.objects.create_user(email='outsider@example.com', password='testpass123')
+        for user in (viewer, outsider):
+            response = self.post('delete', user=user)
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual(ShortURL.objects.count(), 7)
@@ -0,0 +1,134 @@
+"""
+Test click events.
+
+Tests for capturing click events on redirects and writing them in batches.
+"""
+import json
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from . import events
+from .cache import local_cache
+from .events import (
+    EventBackpressure, buffer_event_locally, flush_click_events, flush_local_click_events, hash_ip
+)
+from .models import ClickEvent, Namespace, ShortURL
+
+User = get_user_model()
+
+
+class ClickEventTest(TestCase):
+    """Test cases for the click event pipeline."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        events._local_events.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Events Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='events-ns'
+        )
+        self.short_url = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code='abc123',
+            created_by=self.user
+        )
+
+    def test_redirect_buffers_event(self):
+        """Test that a redirect captures an event that is written on flush."""
+        response = self.client.get(
+            '/events-ns/abc123/',
+            HTTP_REFERER='https://news.example.com/',
+            HTTP_USER_AGENT='TestAgent/1.0',
+            HTTP_CF_IPCOUNTRY='de',
+            REMOTE_ADDR='203.0.113.9'
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(ClickEvent.objects.exists())
+
+        self.assertEqual(flush_click_events(), 1)
+        event = ClickEvent.objects.get()
+        self.assertEqual(event.short_url, self.short_url)
+        self.assertEqual(event.referrer, 'https://news.example.com/')
+        self.assertEqual(event.user_agent, 'TestAgent/1.0')
+        self.assertEqual(event.country, 'DE')
+        self.assertEqual(event.ip_hash, hash_ip('203.0.113.9'))
+        self.assertNotIn('203.0.113.9', event.ip_hash)
+
+    @override_settings(SHORT_URL_CLIENT_IP_HEADER='HTTP_X_REAL_IP')
+    def test_client_ip_from_proxy_header(self):
+        """Test that behind a proxy visitors are told apart by the forwarded address."""
+        for address in ('203.0.113.9', '198.51.100.7'):
+            self.client.get('/events-ns/abc123/', HTTP_X_REAL_IP=address, REMOTE_ADDR='10.0.0.2')
+        flush_click_events()
+        self.assertEqual(
+            set(ClickEvent.objects.values_list('ip_hash', flat=True)),
+            {hash_ip('203.0.113.9'), hash_ip('198.51.100.7')}
+        )
+
+    def test_flush_batches_and_skips_deleted_links(self):
+        """Test that flushing drains every batch and drops events of deleted links."""
+        other = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/other',
+            short_code='gone12',
+            created_by=self.user
+        )
+        for _ in range(5):
+            self.client.get('/events-ns/abc123/')
+        self.client.get('/events-ns/gone12/')
+        other.delete()
+
+        self.assertEqual(flush_click_events(batch_size=2), 5)
+        self.assertEqual(ClickEvent.objects.filter(short_url=self.short_url).count(), 5)
+        self.assertEqual(flush_click_events(), 0)
+
+    def test_full_buffer_drops_events(self):
+        """Test that a full in-process buffer sheds events instead of growing."""
+        pressure = EventBackpressure(max_size=2, sample_rate=0)
+        with mock.patch.object(events, 'local_backpressure', pressure):
+            for number in range(5):
+                buffer_event_locally(f'event-{number}')
+        self.assertEqual(list(events._local_events), ['event-0', 'event-1'])
+        self.assertEqual(pressure.stats()['dropped'], 3)
+
+    def test_process_flushes_its_own_buffer(self):
+        """Test that events buffered in a web process are flushed by a thread of that process."""
+        event = json.dumps([str(self.short_url.pk), time.time(), '', 'TestAgent/1.0', '', ''])
+        with override_settings(SHORT_URL_CLICK_EVENT_LOCAL_FLUSH_INTERVAL=5.0), \
+                mock.patch.object(events, '_flusher_pid', None), \
+                mock.patch('apps.urls.events.threading.Thread') as thread:
+            buffer_event_locally(event)
+            buffer_event_locally(event)
+        thread.assert_called_once_with(target=events._flush_local_forever, name='click-events', daemon=True)
+
+        # Drained even when the shared buffer is in Redis
+        self.assertEqual(flush_local_click_events(), 2)
+        self.assertEqual(ClickEvent.objects.filter(short_url=self.short_url).count(), 2)
+        self.assertFalse(events._local_events)
+
+    def test_backpressure_samples_when_full(self):
+        """Test that a buffer seen full is sampled for the backoff period."""
+        pressure = EventBackpressure(max_size=10, sample_rate=1.0, backoff=60)
+        self.assertFalse(pressure.full())
+        pressure.observe(10)
+        self.assertTrue(pressure.full())
+        self.assertIn(pressure.sample(), range(10))
+        pressure.sample_rate = 0
+        self.assertIsNone(pressure.sample())
+        self.assertEqual(pressure.stats(), {'max_size': 10, 'dropped': 1, 'sampled': 1})
@@ -0,0 +1,161 @@
+"""
+Test click counting.
+
+Tests for buffered click recording, flushing and pending click reads.
+"""
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from . import clicks
+from .clicks import (
+    apply_click_deltas,
+    enable_click_sharding,
+    flush_clicks,
+    fold_click_shards,
+    get_pending_clicks,
+    record_click,
+    write_click,
+)
+from .models import ClickCounterShard, Namespace, ShortURL
+from .serializers import ShortURLSerializer
+
+User = get_user_model()
+
+
+class ClickCountingTest(TestCase):
+    """Test cases for click counting."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        clicks._sharded_links.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Click Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='click-ns'
+        )
+        self.first = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/first',
+            short_code='first',
+            created_by=self.user
+        )
+        self.second = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/second',
+            short_code='second',
+            created_by=self.user
+        )
+
+    def test_recorded_clicks_reach_database_after_flush(self):
+        """Test that recorded clicks end up in click_count once flushed."""
+        for _ in range(3):
+            record_click(self.first.pk)
+        record_click(self.second.pk)
+        flush_clicks()
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.click_count, 3)
+        self.assertEqual(self.second.click_count, 1)
+        self.assertEqual(get_pending_clicks([self.first, self.second]), {})
+
+    def test_apply_click_deltas_is_one_update(self):
+        """Test that deltas for many links are applied in a single statement."""
+        with self.assertNumQueries(1):
+            apply_click_deltas({self.first.pk: 5, self.second.pk: 2})
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.click_count, 5)
+        self.assertEqual(self.second.click_count, 2)
+
+    def test_serializer_includes_pending_clicks(self):
+        """Test that serialized click counts include unflushed clicks."""
+        self.first.increment_click_count()
+        self.first.increment_click_count()
+        self.first.refresh_from_db()
+
+        data = ShortURLSerializer(self.first).data
+        self.assertEqual(data['click_count'], 2)
+
+        data = ShortURLSerializer(ShortURL.objects.all(), many=True).data
+        counts = {item['short_code']: item['click_count'] for item in data}
+        self.assertEqual(counts, {'first': 2, 'second': 0})
+
+    def test_full_save_keeps_concurrent_clicks(self):
+        """Test that saving a stale instance does not overwrite click_count."""
+        stale = ShortURL.objects.get(pk=self.first.pk)
+        apply_click_deltas({self.first.pk: 4})
+        stale.title = 'Renamed'
+        stale.save()
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.click_count, 4)
+        self.assertEqual(self.first.title, 'Renamed')
+
+    def test_sharded_clicks_are_folded(self):
+        """Test that clicks written to shards are folded into click_count."""
+        self.assertEqual(enable_click_sharding(self.first.pk, 4), 4)
+        self.assertEqual(ClickCounterShard.objects.filter(short_url=self.first).count(), 4)
+        for _ in range(10):
+            write_click(self.first.pk)
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.click_count, 0)
+        self.assertEqual(get_pending_clicks([self.first]), {self.first.pk: 10})
+
+        self.assertEqual(fold_click_shards(), 10)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.click_count, 10)
+        self.assertEqual(get_pending_clicks([self.first]), {})
+
+    def test_hot_link_switches_to_shards(self):
+        """Test that crossing the click rate threshold enables sharding."""
+        tracker = clicks.ClickRateTracker(window=60, threshold=0.05)
+        with self.settings(SHORT_URL_CLICK_SHARDS=2):
+            original, clicks.rate_tracker = clicks.rate_tracker, tracker
+            try:
+                for _ in range(3):
+                    write_click(self.first.pk)
+            finally:
+                clicks.rate_tracker = original
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.click_shards, 2)
+        self.assertEqual(self.first.click_count + get_pending_clicks([self.first])[self.first.pk], 3)
+
+
+@override_settings(CACHES=settings.REDIS_CACHES)
+class BufferedClickCountingTest(ClickCountingTest):
+    """Test cases for click counting through the Redis click buffer."""
+
+    def test_failed_flush_keeps_clicks(self):
+        """Test that clicks stay buffered until flushed and survive a failed flush."""
+        for _ in range(2):
+            record_click(self.first.pk)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.click_count, 0)
+        self.assertEqual(get_pending_clicks([self.first]), {self.first.pk: 2})
+
+        with mock.patch('apps.urls.clicks.apply_click_deltas', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                flush_clicks()
+        self.assertEqual(get_pending_clicks([self.first]), {self.first.pk: 2})
+
+        self.assertEqual(flush_clicks(), 2)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.click_count, 2)
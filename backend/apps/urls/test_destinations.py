@@ -0,0 +1,149 @@
+"""
+Test short URL destinations.
+
+Tests for URL normalization, destination assignment and reusing existing
+short URLs on creation.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .allocator import leases
+from .cache import local_cache
+from .destinations import destination_hash, normalize_url
+from .models import Destination, Namespace, ShortURL
+
+User = get_user_model()
+
+
+class NormalizeURLTest(SimpleTestCase):
+    """Test cases for URL normalization."""
+
+    def test_equivalent_urls_normalize_alike(self):
+        """Test that spellings of the same URL share a normal form."""
+        self.assertEqual(normalize_url('HTTPS://Example.COM'), 'https://example.com/')
+        self.assertEqual(normalize_url('https://example.com:443/'), 'https://example.com/')
+        self.assertEqual(normalize_url('http://example.com:80/a%2fb'), 'http://example.com/a%2Fb')
+        self.assertEqual(normalize_url(' https://example.com/x?q=%c3%a9 '), 'https://example.com/x?q=%C3%A9')
+
+    def test_meaningful_differences_are_kept(self):
+        """Test that parts that can change the target are left alone."""
+        self.assertEqual(normalize_url('https://example.com:8443/Path'), 'https://example.com:8443/Path')
+        self.assertEqual(normalize_url('https://example.com/?b=1&a=2#Top'), 'https://example.com/?b=1&a=2#Top')
+        self.assertEqual(normalize_url('https://User:Pw@Example.com/'), 'https://User:Pw@example.com/')
+        self.assertNotEqual(destination_hash('http://example.com/'), destination_hash('https://example.com/'))
+        self.assertEqual(len(destination_hash('https://example.com/')), 64)
+
+
+class DestinationTest(APITestCase):
+    """Test cases for destinations and reusing short URLs."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        leases.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Destination Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='dest-ns'
+        )
+        self.other_namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='other-dest-ns'
+        )
+
+    def get_auth_headers(self):
+        refresh = RefreshToken.for_user(self.user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+    def create(self, **fields):
+        return ShortURL.objects.create(**{'created_by': self.user, 'namespace': self.namespace, **fields})
+
+    def test_equivalent_urls_share_a_destination(self):
+        """Test that short URLs to the same normalized URL share one destination row."""
+        first = self.create(original_url='https://Example.com')
+        second = self.create(original_url='https://example.com:443/', namespace=self.other_namespace)
+        self.assertEqual(first.destination_id, second.destination_id)
+        self.assertEqual(first.destination.url, 'https://example.com/')
+        self.assertEqual(Destination.objects.count(), 1)
+
+        second.original_url = 'https://example.com/other'
+        second.save()
+        second.refresh_from_db()
+        self.assertEqual(second.destination.url, 'https://example.com/other')
+
+        first.original_url = 'https://example.com/moved'
+        first.save(update_fields=['original_url'])
+        first.refresh_from_db()
+        self.assertEqual(first.destination.url, 'https://example.com/moved')
+
+    def test_reusable_is_a_single_query(self):
+        """Test that finding a link for a URL is one indexed lookup."""
+        short_url = self.create(original_url='https://example.com/page')
+        self.create(original_url='https://example.com/page', is_active=False)
+        with self.assertNumQueries(1):
+            found = list(ShortURL.objects.reusable(self.namespace, 'https://EXAMPLE.com/page'))
+        self.assertEqual(found, [short_url])
+
+    def test_create_with_reuse_existing(self):
+        """Test that reuse_existing returns the namespace's existing link for the URL."""
+        existing = self.create(original_url='https://example.com/page')
+        expired = self.create(original_url='https://example.com/expired')
+        ShortURL.objects.filter(pk=expired.pk).update(expiry_date=timezone.now() - timedelta(days=1))
+
+        def post(**fields):
+            return self.client.post('/api/short-urls/', {
+                'namespace': str(self.namespace.pk),
+                'reuse_existing': True,
+                **fields
+            }, format='json', **self.get_auth_headers())
+
+        response = post(original_url='https://example.com:443/page')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], str(existing.pk))
+        self.assertEqual(response.data['short_code'], existing.short_code)
+
+        # Expired links are not handed out, custom codes always create a link
+        response = post(original_url='https://example.com/expired')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(response.data['id'], str(expired.pk))
+        response = post(original_url='https://example.com/page', short_code='custom')
+        self.assertEqual(response.status_code, 201)
+        response = post(original_url='https://example.com/page', reuse_existing=False)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ShortURL.objects.filter(destination=existing.destination).count(), 3)
+
+    def test_bulk_reuse_existing(self):
+        """Test that bulk entries can reuse existing links, matched with one query."""
+        existing = self.create(original_url='https://example.com/page')
+        response = self.client.post('/api/short-urls/bulk/', [
+            {'namespace': str(self.namespace.pk), 'original_url': 'https://example.com/page', 'reuse_existing': True},
+            {'namespace': str(self.namespace.pk), 'original_url': 'https://example.com/new', 'reuse_existing': True},
+            {'namespace': str(self.namespace.pk), 'original_url': 'https://example.com/page'},
+        ], format='json', **self.get_auth_headers())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['reused']), (2, 1))
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['reused', 'created', 'created'])
+        self.assertEqual(results[0]['id'], str(existing.pk))
+        self.assertEqual(ShortURL.objects.get(pk=results[2]['id']).destination_id, existing.destination_id)
+        self.assertEqual(ShortURL.objects.get(pk=results[1]['id']).destination.url, 'https://example.com/new')
@@ -0,0 +1,126 @@
+"""
+Test short URL expiry.
+
+Tests for bulk deactivation, expiry-capped cache TTLs and expiry filters.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .cache import _entry_for_row, local_cache, resolve_short_url
+from .expiry import deactivate_expired_links
+from .models import Namespace, ShortURL
+
+User = get_user_model()
+
+
+class ShortURLExpiryTest(APITestCase):
+    """Test cases for short URL expiry."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Expiry Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='expiry-ns'
+        )
+        self.expired = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/expired',
+            short_code='old123',
+            created_by=self.user
+        )
+        ShortURL.objects.filter(pk=self.expired.pk).update(
+            expiry_date=timezone.now() - timedelta(hours=1)
+        )
+        self.expiring = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/expiring',
+            short_code='soon12',
+            created_by=self.user,
+            expiry_date=timezone.now() + timedelta(seconds=30)
+        )
+        self.permanent = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/permanent',
+            short_code='keep12',
+            created_by=self.user
+        )
+
+    def get_auth_headers(self, user):
+        """Get authentication headers for a user."""
+        refresh = RefreshToken.for_user(user)
+        return {
+            'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'
+        }
+
+    def test_deactivates_expired_links_and_evicts_cache(self):
+        """Test that only expired links are flipped inactive and re-resolved."""
+        self.assertTrue(resolve_short_url('expiry-ns', 'old123').is_active)
+
+        self.assertEqual(deactivate_expired_links(), 1)
+        self.assertEqual(deactivate_expired_links(), 0)
+
+        self.assertFalse(resolve_short_url('expiry-ns', 'old123').is_active)
+        self.assertEqual(
+            list(ShortURL.objects.filter(is_active=True).order_by('short_code').values_list(
+                'short_code', flat=True
+            )),
+            ['keep12', 'soon12']
+        )
+        response = self.client.get('/expiry-ns/old123/')
+        self.assertEqual(response.status_code, 410)
+
+    def test_cache_timeout_capped_at_expiry(self):
+        """Test that cache entries do not outlive the link."""
+        row = ShortURL.objects.filter(pk=self.expiring.pk).values_list(
+            'pk', 'original_url', 'is_active', 'expiry_date'
+        ).get()
+        _, timeout = _entry_for_row(row)
+        self.assertLessEqual(timeout, 30)
+
+        row = ShortURL.objects.filter(pk=self.permanent.pk).values_list(
+            'pk', 'original_url', 'is_active', 'expiry_date'
+        ).get()
+        self.assertGreater(_entry_for_row(row)[1], 30)
+
+    def test_list_filters_on_expiry(self):
+        """Test the expired query parameter on short URL lists."""
+        url = reverse('api:shorturl-list')
+        response = self.client.get(url, {'expired': 'true'}, **self.get_auth_headers(self.user))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['short_code'] for item in response.data['results']], ['old123'])
+
+        response = self.client.get(url, {'expired': 'false'}, **self.get_auth_headers(self.user))
+        self.assertEqual(
+            sorted(item['short_code'] for item in response.data['results']),
+            ['keep12', 'soon12']
+        )
+
+        url = reverse('api:organization-short-urls', args=[self.organization.pk])
+        response = self.client.get(url, {'expired': 'true'}, **self.get_auth_headers(self.user))
+        self.assertEqual([item['short_code'] for item in response.data['results']], ['old123'])
+
+        response = self.client.get(url, {'expired': 'maybe'}, **self.get_auth_headers(self.user))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,140 @@
+"""
+Test short URL exports.
+
+Tests for the streaming namespace and organization export endpoints.
+"""
+import csv
+import gzip
+import io
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .allocator import leases
+from .cache import local_cache
+from .models import Namespace, ShortURL
+
+User = get_user_model()
+
+
+class ExportTest(APITestCase):
+    """Test cases for streaming short URL exports."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        leases.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.editor = User.objects.create_user(
+            email='editor@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Export Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        OrganizationMembership.objects.create(
+            user=self.editor,
+            organization=self.organization,
+            role=OrganizationMembership.Role.EDITOR
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='export-ns'
+        )
+        for number in range(5):
+            ShortURL.objects.create(
+                namespace=self.namespace,
+                original_url=f'https://example.com/{number}',
+                short_code=f'code{number}',
+                title=f'Link, "{number}"',
+                created_by=self.editor if number == 4 else self.user
+            )
+        ShortURL.objects.filter(short_code='code0').update(click_count=7, unique_visitors=3)
+
+    def get_auth_headers(self, user=None):
+        refresh = RefreshToken.for_user(user or self.user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+    def export(self, url, user=None, **params):
+        response = self.client.get(url, params, **self.get_auth_headers(user))
+        if response.status_code == 200:
+            self.assertIsInstance(response, StreamingHttpResponse)
+        return response
+
+    @override_settings(SHORT_URL_EXPORT_CHUNK_SIZE=2)
+    def test_namespace_csv_export(self):
+        """Test that a namespace export streams every link and its stats as CSV in chunks."""
+        response = self.export(f'/api/namespaces/{self.namespace.pk}/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('short-urls-export-ns.csv', response['Content-Disposition'])
+        # The header and then one part per chunk of two rows
+        parts = list(response.streaming_content)
+        self.assertEqual(len(parts), 4)
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(parts).decode())))
+        self.assertEqual(len(rows), 5)
+        row = next(row for row in rows if row['short_code'] == 'code0')
+        self.assertEqual(row['title'], 'Link, "0"')
+        self.assertEqual(row['namespace'], 'export-ns')
+        self.assertEqual(row['click_count'], '7')
+        self.assertEqual(row['unique_visitors'], '3')
+        self.assertEqual(row['created_by_email'], 'admin@example.com')
+        self.assertTrue(row['full_short_url'].endswith('/export-ns/code0'))
+        self.assertEqual(row['expiry_date'], '')
+
+    def test_organization_ndjson_gzip_export(self):
+        """Test that an organization export can be NDJSON compressed on the fly."""
+        response = self.export(
+            f'/api/organizations/{self.organization.pk}/export_short_urls/',
+            file_format='ndjson',
+            gzip='true'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.ndjson.gz', response['Content-Disposition'])
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row['short_code'] for row in rows}, {f'code{number}' for number in range(5)})
+        self.assertIs(rows[0]['is_active'], True)
+
+        # Members who are not admins only export their own links
+        response = self.export(
+            f'/api/organizations/{self.organization.pk}/export_short_urls/',
+            user=self.editor,
+            file_format='ndjson'
+        )
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['short_code'] for row in rows], ['code4'])
+
+    def test_export_queries_do_not_grow_with_links(self):
+        """Test that rows are read with a fixed number of queries per chunk."""
+        response = self.export(f'/api/namespaces/{self.namespace.pk}/export/')
+        with CaptureQueriesContext(connection) as queries:
+            b''.join(response.streaming_content)
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_format_is_rejected(self):
+        """Test that unsupported export formats are rejected."""
+        response = self.export(f'/api/namespaces/{self.namespace.pk}/export/', file_format='xml')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file_format', response.data)
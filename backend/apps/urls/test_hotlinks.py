@@ -0,0 +1,138 @@
+"""
+Test hot link tracking.
+
+Tests for the heavy hitters sketch, the shared hot link list and cache pre-warming.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from .cache import local_cache, resolution_cache_key, resolve_short_url
+from .hotlinks import (
+    HOT_LINKS_KEY,
+    SpaceSaving,
+    decay_hot_links,
+    hot_links,
+    persist_hot_links,
+    prewarm_hot_links,
+    top_hot_links,
+)
+from .models import Namespace, ShortURL
+from .redis_client import get_redis_client
+
+User = get_user_model()
+
+
+class SpaceSavingTest(SimpleTestCase):
+    """Test cases for the Space-Saving sketch."""
+
+    def test_keeps_heavy_hitters_in_bounded_memory(self):
+        """Test that frequent keys survive a long tail of rare keys."""
+        sketch = SpaceSaving(capacity=10)
+        for round_number in range(200):
+            sketch.observe('hot')
+            if round_number % 2 == 0:
+                sketch.observe('warm')
+            sketch.observe(f'rare-{round_number}')
+        self.assertLessEqual(len(sketch.counts), 10)
+        top = sketch.top(2)
+        self.assertEqual([key for key, _, _ in top], ['hot', 'warm'])
+        # Counts never undershoot and overshoot by at most the recorded error
+        for key, count, error in top:
+            expected = 200 if key == 'hot' else 100
+            self.assertGreaterEqual(count, expected)
+            self.assertLessEqual(count - error, expected)
+
+    def test_drain_starts_new_window(self):
+        """Test that draining returns guaranteed counts and empties the sketch."""
+        sketch = SpaceSaving(capacity=2)
+        for key in ['a', 'a', 'a', 'b', 'c']:
+            sketch.observe(key)
+        drained = sketch.drain()
+        self.assertEqual(drained['a'], 3)
+        self.assertNotIn('b', drained)
+        self.assertEqual(sketch.top(), [])
+
+
+@override_settings(CACHES=settings.REDIS_CACHES)
+class HotLinksTest(TestCase):
+    """Test cases for hot link persistence and pre-warming."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        hot_links.drain()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.organization = Organization.objects.create(
+            name='Hot Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='hot-ns'
+        )
+        for short_code in ('hot123', 'warm12', 'cold12'):
+            ShortURL.objects.create(
+                namespace=self.namespace,
+                original_url=f'https://example.com/{short_code}',
+                short_code=short_code,
+                created_by=self.user
+            )
+
+    def click(self, short_code, times):
+        for _ in range(times):
+            self.client.get(f'/hot-ns/{short_code}/')
+
+    def test_redirects_rank_hot_links(self):
+        """Test that served redirects feed the hot link list, hottest first."""
+        self.click('hot123', 5)
+        self.click('warm12', 3)
+        self.click('cold12', 1)
+        self.click('missing', 4)
+        persist_hot_links()
+        self.assertEqual(
+            [(namespace_name, short_code) for namespace_name, short_code, _ in top_hot_links(2)],
+            [('hot-ns', 'hot123'), ('hot-ns', 'warm12')]
+        )
+
+    def test_prewarm_loads_local_cache(self):
+        """Test that pre-warming lets a fresh worker resolve hot links without queries."""
+        self.click('hot123', 3)
+        self.click('warm12', 2)
+        persist_hot_links()
+        cache.delete_many([
+            resolution_cache_key('hot-ns', short_code) for short_code in ('hot123', 'warm12')
+        ])
+        local_cache.clear()
+
+        self.assertEqual(prewarm_hot_links(), 2)
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(resolve_short_url('hot-ns', 'hot123'))
+            self.assertIsNotNone(resolve_short_url('hot-ns', 'warm12'))
+
+    def test_decay_drops_cold_links(self):
+        """Test that decaying halves shared scores and forgets links that went cold."""
+        client = get_redis_client()
+        self.click('hot123', 4)
+        self.click('cold12', 1)
+        persist_hot_links()
+        self.assertEqual(decay_hot_links(), 1)
+        self.assertEqual(client.zscore(HOT_LINKS_KEY, 'hot-ns\0hot123'), 2)
+
+    def test_admin_lists_hot_links(self):
+        """Test the hot links page in the admin."""
+        self.click('hot123', 2)
+        persist_hot_links()
+        self.client.force_login(self.user)
+        response = self.client.get('/admin/urls/shorturl/hot-links/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'hot-ns/hot123')
+        self.assertContains(self.client.get('/admin/urls/shorturl/'), 'hot-links/')
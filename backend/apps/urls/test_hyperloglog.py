@@ -0,0 +1,73 @@
+"""
+Test HyperLogLog sketches.
+
+Tests for unique visitor estimation, merging and serialization.
+"""
+from django.test import SimpleTestCase
+
+from .hyperloglog import DENSE, DENSE_SIZE, REGISTERS, SPARSE, HyperLogLog, merge_sketches, visitor_hash
+
+
+def sketch_of(visitors):
+    """Build a sketch from visitor numbers."""
+    sketch = HyperLogLog()
+    for visitor in visitors:
+        sketch.add_hash(visitor_hash(f"ip-{visitor}", "TestAgent/1.0"))
+    return sketch
+
+
+class HyperLogLogTest(SimpleTestCase):
+    """Test cases for HyperLogLog sketches."""
+
+    def test_small_counts_are_nearly_exact(self):
+        """Test that few visitors are counted almost exactly and repeats are ignored."""
+        self.assertEqual(HyperLogLog().count(), 0)
+        self.assertEqual(sketch_of([1, 2, 3, 2, 1]).count(), 3)
+        self.assertEqual(sketch_of(range(100)).count(), 100)
+
+    def test_large_count_error(self):
+        """Test that estimates stay within a few standard errors at scale."""
+        for size in (10000, 100000):
+            estimate = sketch_of(range(size)).count()
+            self.assertLess(abs(estimate - size) / size, 0.03, size)
+
+    def test_merge_matches_union(self):
+        """Test that merging sketches estimates the union of their visitors."""
+        merged = merge_sketches([
+            sketch_of(range(0, 30000)).to_bytes(),
+            sketch_of(range(20000, 50000)).to_bytes(),
+            b"",
+        ])
+        self.assertEqual(merged.registers, sketch_of(range(50000)).registers)
+
+    def test_merge_takes_register_maximum(self):
+        """Test that merging keeps the larger rank of every register, including the largest ranks."""
+        left = HyperLogLog(bytearray(rank % 52 for rank in range(REGISTERS)))
+        right = HyperLogLog(bytearray((51 - rank) % 52 for rank in range(REGISTERS)))
+        expected = bytearray(map(max, left.registers, right.registers))
+        self.assertEqual(HyperLogLog(bytearray(left.registers)).merge(right).registers, expected)
+        self.assertEqual(HyperLogLog.from_bytes(left.to_bytes()).update(right.to_bytes()).registers, expected)
+
+    def test_serialization_round_trip(self):
+        """Test sparse and dense encodings and their size bounds."""
+        self.assertEqual(HyperLogLog().to_bytes(), b"")
+
+        sparse = sketch_of(range(50))
+        data = sparse.to_bytes()
+        self.assertTrue(data.startswith(SPARSE))
+        self.assertLess(len(data), 200)
+        self.assertEqual(HyperLogLog.from_bytes(data).registers, sparse.registers)
+
+        dense = sketch_of(range(20000))
+        data = dense.to_bytes()
+        self.assertTrue(data.startswith(DENSE))
+        self.assertEqual(len(data), DENSE_SIZE + 1)
+        self.assertEqual(HyperLogLog.from_bytes(data).registers, dense.registers)
+
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_bytes(b"Xjunk")
+
+    def test_visitors_without_ip_are_not_counted(self):
+        """Test that events without a client IP have no visitor hash."""
+        self.assertIsNone(visitor_hash("", "TestAgent/1.0"))
+        self.assertNotEqual(visitor_hash("ip", "A"), visitor_hash("ip", "B"))
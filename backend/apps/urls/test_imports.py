@@ -0,0 +1,164 @@
+"""
+Test short URL imports.
+
+Tests for the namespace import endpoint, the import task and its status
+resource.
+"""
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .allocator import leases
+from .cache import local_cache
+from .imports import import_chunk, run_import
+from .models import ImportJob, Namespace, ShortURL
+
+User = get_user_model()
+
+CSV_FILE = (
+    "original_url,short_code,title\r\n"
+    "https://example.com/one,,First\r\n"
+    "https://example.com/two,spring,Second\r\n"
+    "not a url,,Broken\r\n"
+    "https://example.com/three,spring,Duplicate\r\n"
+    "https://example.com/four,,\r\n"
+)
+
+
+class ImportTest(APITestCase):
+    """Test cases for importing short URLs from files."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        leases.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Import Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='import-ns'
+        )
+
+    def get_auth_headers(self, user=None):
+        refresh = RefreshToken.for_user(user or self.user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+    def upload(self, name, content, user=None, **data):
+        with mock.patch('apps.urls.views.import_short_urls.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/namespaces/{self.namespace.pk}/import/',
+                {'file': SimpleUploadedFile(name, content.encode()), **data},
+                format='multipart',
+                **self.get_auth_headers(user)
+            )
+        return response, delay
+
+    def test_csv_import(self):
+        """Test that a CSV upload is imported in the background with per-row errors."""
+        response, delay = self.upload('links.csv', CSV_FILE)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response.data['format'], 'csv')
+        delay.assert_called_once_with(str(response.data['id']))
+
+        self.assertEqual(run_import(response.data['id']), 3)
+        status = self.client.get(
+            f'/api/namespaces/{self.namespace.pk}/imports/{response.data["id"]}/',
+            **self.get_auth_headers()
+        )
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.data['status'], 'completed')
+        self.assertEqual(status.data['rows_processed'], 5)
+        self.assertEqual(status.data['rows_created'], 3)
+        self.assertEqual(status.data['rows_failed'], 2)
+        self.assertEqual([error['line'] for error in status.data['errors']], [4, 5])
+        self.assertIn('original_url', status.data['errors'][0]['errors'])
+        self.assertIn('short_code', status.data['errors'][1]['errors'])
+        self.assertIsNotNone(status.data['rows_per_second'])
+
+        self.assertEqual(ShortURL.objects.get(short_code='spring').title, 'Second')
+        self.assertEqual(ShortURL.objects.filter(namespace=self.namespace).count(), 3)
+        # The upload is removed once it has been imported
+        self.assertFalse(ImportJob.objects.get(pk=response.data['id']).file)
+
+    @override_settings(SHORT_URL_IMPORT_CHUNK_SIZE=2, SHORT_URL_IMPORT_MAX_ERRORS=1)
+    def test_ndjson_import_in_chunks(self):
+        """Test that NDJSON rows are imported chunk by chunk and stored errors are capped."""
+        lines = [f'{{"original_url": "https://example.com/{number}"}}' for number in range(5)]
+        lines[1] = '{"original_url": '
+        lines[3] = '["https://example.com/list"]'
+        response, _ = self.upload('links.ndjson', '\n'.join(lines) + '\n\n')
+        self.assertEqual(response.status_code, 202)
+
+        with mock.patch('apps.urls.imports.import_chunk', wraps=import_chunk) as chunk:
+            run_import(response.data['id'])
+        self.assertEqual(chunk.call_count, 3)
+        job = ImportJob.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual((job.rows_processed, job.rows_created, job.rows_failed), (5, 3, 2))
+        self.assertEqual(job.errors, [{'line': 2, 'errors': {'non_field_errors': ['Invalid JSON.']}}])
+
+    def test_running_import_is_not_claimed_twice(self):
+        """Test that a redelivered task leaves a running or finished import alone."""
+        response, _ = self.upload('links.csv', CSV_FILE)
+        ImportJob.objects.filter(pk=response.data['id']).update(status=ImportJob.Status.RUNNING)
+        self.assertEqual(run_import(response.data['id']), 0)
+        self.assertFalse(ShortURL.objects.exists())
+
+        ImportJob.objects.filter(pk=response.data['id']).update(status=ImportJob.Status.PENDING)
+        self.assertEqual(run_import(response.data['id']), 3)
+        self.assertEqual(run_import(response.data['id']), 0)
+        self.assertEqual(ShortURL.objects.filter(namespace=self.namespace).count(), 3)
+
+    def test_csv_without_url_column_fails(self):
+        """Test that a file that cannot be imported marks the job failed."""
+        response, _ = self.upload('links.csv', 'url,title\r\nhttps://example.com/,Home\r\n')
+        run_import(response.data['id'])
+        job = ImportJob.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertIn('original_url', job.error)
+        self.assertFalse(ShortURL.objects.exists())
+
+    def test_upload_validation(self):
+        """Test that viewers cannot import and unknown formats are rejected."""
+        response, delay = self.upload('links.txt', CSV_FILE)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('format', response.data)
+        response, _ = self.upload('links.txt', CSV_FILE, format='csv')
+        self.assertEqual(response.status_code, 202)
+
+        viewer = User.objects.create_user(email='viewer@example.com', password='testpass123')
+        OrganizationMembership.objects.create(
+            user=viewer,
+            organization=self.organization,
+            role=OrganizationMembership.Role.VIEWER
+        )
+        response, delay = self.upload('links.csv', CSV_FILE, user=viewer)
+        self.assertEqual(response.status_code, 403)
+        delay.assert_not_called()
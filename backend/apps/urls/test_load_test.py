@@ -0,0 +1,78 @@
+"""
+Test the redirect load-test harness.
+
+Tests for the benchmark_redirects management command.
+"""
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from .cache import local_cache
+from .management.commands.benchmark_redirects import zipf_mix
+from .models import Namespace, ShortURL
+
+
+class BenchmarkRedirectsTest(TestCase):
+    """Test cases for the redirect load-test harness."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+
+    def run_benchmark(self, *args):
+        stdout = StringIO()
+        call_command(
+            'benchmark_redirects', '--links=40', '--namespaces=3', '--requests=200', '--threads=1',
+            *args, stdout=stdout, stderr=StringIO()
+        )
+        return json.loads(stdout.getvalue())
+
+    def test_zipf_mix_is_skewed_and_reproducible(self):
+        """Test that the top ranked link gets the largest share of requests."""
+        links = [('ns', str(number)) for number in range(100)]
+        ranked, mix = zipf_mix(links, 10000, 1.1, random.Random(7))
+        self.assertEqual(zipf_mix(links, 10000, 1.1, random.Random(7)), (ranked, mix))
+        counts = {link: mix.count(link) for link in ranked[:2]}
+        self.assertGreater(counts[ranked[0]], counts[ranked[1]])
+        self.assertGreater(counts[ranked[0]], 1000)
+
+    def test_scenarios_reported_as_json(self):
+        """Test that every scenario reports percentiles, throughput and queries."""
+        results = self.run_benchmark()
+        self.assertEqual(set(results['scenarios']), {'cold', 'warm', 'hot'})
+        for scenario in results['scenarios'].values():
+            self.assertEqual(scenario['statuses'], {'302': scenario['requests']})
+            self.assertLessEqual(scenario['p50_ms'], scenario['p95_ms'])
+            self.assertLessEqual(scenario['p95_ms'], scenario['p99_ms'])
+            self.assertGreater(scenario['requests_per_second'], 0)
+        cold, warm = results['scenarios']['cold'], results['scenarios']['warm']
+        self.assertGreater(cold['queries_per_request'], warm['queries_per_request'])
+
+        # Seeded data is removed afterwards
+        self.assertFalse(Namespace.objects.exists())
+        self.assertFalse(ShortURL.objects.exists())
+
+    def test_baseline_regression_fails(self):
+        """Test that a run slower than its baseline fails the command."""
+        results = self.run_benchmark('--scenario=warm')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            results['scenarios']['warm']['p99_ms'] /= 100
+            with open(path, 'w') as file:
+                json.dump(results, file)
+            with self.assertRaisesMessage(CommandError, 'warm p99 latency up'):
+                self.run_benchmark('--scenario=warm', f'--baseline={path}')
+
+            results['scenarios']['warm']['p99_ms'] *= 10000
+            results['scenarios']['warm']['requests_per_second'] = 0.001
+            with open(path, 'w') as file:
+                json.dump(results, file)
+            self.run_benchmark('--scenario=warm', f'--baseline={path}')
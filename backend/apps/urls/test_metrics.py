@@ -0,0 +1,114 @@
+"""
+Test Prometheus metrics.
+
+Tests for the /metrics endpoint, request and redirect lookup metrics and
+Celery queue lag reporting.
+"""
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from prometheus_client import REGISTRY
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization
+from apps.utils.metrics import QUEUE_LAG_KEY
+from config.celery_app import report_queue_lag, stamp_publish_time
+from .cache import local_cache
+from .models import Namespace, ShortURL
+from .redis_client import get_redis_client
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(CACHES=settings.REDIS_CACHES)
+class MetricsTest(TestCase):
+    """Test cases for the metrics endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Metrics Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='metrics-ns'
+        )
+        ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code='abc123',
+            created_by=self.user
+        )
+
+    def test_redirect_lookups_by_tier(self):
+        """Test that redirect lookups are timed by the tier that answered."""
+        db_lookups = sample('linknest_redirect_lookup_seconds_count', tier='db')
+        local_lookups = sample('linknest_redirect_lookup_seconds_count', tier='local')
+        self.client.get('/metrics-ns/abc123/')
+        self.client.get('/metrics-ns/abc123/')
+        self.assertEqual(sample('linknest_redirect_lookup_seconds_count', tier='db'), db_lookups + 1)
+        self.assertEqual(sample('linknest_redirect_lookup_seconds_count', tier='local'), local_lookups + 1)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'linknest_redirect_lookup_seconds_bucket{le="1e-05",tier="local"}', response.content)
+        self.assertIn(b'linknest_click_buffer_depth{buffer="click_events"}', response.content)
+
+    def test_requests_by_view_name(self):
+        """Test that other requests are timed and their queries counted per view."""
+        view = 'api:shorturl-list'
+        requests = sample('linknest_requests_total', view=view, status='2xx')
+        queries = sample('linknest_db_queries_per_request_sum', view=view)
+        timed = sample('linknest_request_duration_seconds_count', view=view)
+        refresh = RefreshToken.for_user(self.user)
+        response = self.client.get('/api/short-urls/', HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sample('linknest_requests_total', view=view, status='2xx'), requests + 1)
+        self.assertGreater(sample('linknest_db_queries_per_request_sum', view=view), queries)
+        self.assertEqual(sample('linknest_request_duration_seconds_count', view=view), timed + 1)
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-secret')
+    def test_token_required_when_configured(self):
+        """Test that a configured token protects the endpoint."""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_internal_networks_only_without_token(self):
+        """Test that without a token only direct requests from allowed networks may scrape."""
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.9').status_code, 403)
+        proxied = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.9')
+        self.assertEqual(proxied.status_code, 403)
+        with override_settings(METRICS_ALLOWED_NETWORKS=['10.0.0.0/8']):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_celery_queue_lag(self):
+        """Test that workers report how long tasks waited in their queue."""
+        headers = {}
+        stamp_publish_time(headers=headers)
+        self.assertIn('published_at', headers)
+
+        client = get_redis_client()
+        task = SimpleNamespace(request=SimpleNamespace(
+            published_at=headers['published_at'] - 2,
+            delivery_info={'routing_key': 'celery'}
+        ))
+        report_queue_lag(task=task)
+        self.assertIsNotNone(client.hget(QUEUE_LAG_KEY, 'celery'))
+        response = self.client.get('/metrics')
+        self.assertIn(b'linknest_celery_queue_lag_seconds{queue="celery"} 2.', response.content)
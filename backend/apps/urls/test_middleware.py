@@ -0,0 +1,172 @@
+"""
+Test redirect fast-path middleware.
+
+Tests that redirects skip the Django stack and other paths fall through.
+"""
+import asyncio
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from config.asgi import application
+from . import redirect_views
+from .cache import ResolvedURL, local_cache
+from .middleware import RedirectPathMatcher
+from .models import Namespace, ShortURL
+from .redis_client import get_redis_client
+
+User = get_user_model()
+
+
+class RedirectFastPathTest(TestCase):
+    """Test cases for the redirect fast-path middleware."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Fast Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='fast-ns'
+        )
+        ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/fast',
+            short_code='go',
+            created_by=self.user
+        )
+
+    def test_redirect_skips_session_and_stack(self):
+        """Test that a redirect is answered before session or CSRF middleware runs."""
+        response = self.client.get('/fast-ns/go/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], 'https://example.com/fast')
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertFalse(hasattr(response.wsgi_request, 'user'))
+
+    def test_warm_redirect_runs_no_lookup_queries(self):
+        """Test that warm redirects run no lookups or transaction savepoints."""
+        self.client.get('/fast-ns/go/')
+        self.client.get('/fast-ns/missing/')
+        with self.assertNumQueries(0):
+            self.client.get('/fast-ns/missing/')
+        # Without a Redis click buffer the only statement is the click UPDATE
+        with self.assertNumQueries(0 if get_redis_client() else 1):
+            self.client.get('/fast-ns/go/')
+
+    def test_other_paths_fall_through(self):
+        """Test that non-redirect paths still go through the full stack."""
+        response = self.client.get('/api/short-urls/')
+        self.assertIn(response.status_code, [401, 403])
+        self.assertTrue(hasattr(response.wsgi_request, 'user'))
+
+        response = self.client.post('/fast-ns/go/')
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
+
+    def test_matcher_reserves_earlier_routes(self):
+        """Test that paths claimed by earlier URL patterns are not matched."""
+        matcher = RedirectPathMatcher()
+        request = self.client.get('/fast-ns/go/').wsgi_request
+        self.assertEqual(matcher.match(request), ('fast-ns', 'go'))
+
+        for path in ['/api/short-urls/', '/users/someone/', '/admin/login/', '/fast-ns/go', '/a/b/c/']:
+            request.path_info = path
+            self.assertIsNone(matcher.match(request), path)
+
+
+async def call_asgi(path, method='GET'):
+    """Run one HTTP request through the ASGI application and return (status, headers)."""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application({
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': b'', 'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+    }, receive, send)
+    return messages[0]['status'], dict(messages[0]['headers'])
+
+
+class RedirectASGITest(TestCase):
+    """Test cases for serving redirects from the ASGI application."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        namespace = Namespace.objects.create(
+            organization=Organization.objects.create(name='ASGI Organization', owner=user),
+            name='fast-ns'
+        )
+        ShortURL.objects.create(
+            namespace=namespace,
+            original_url='https://example.com/fast',
+            short_code='go',
+            created_by=user
+        )
+
+    async def test_redirect_uses_async_resolver(self):
+        """Test that ASGI redirects resolve asynchronously, never through the sync path."""
+        aresolve_short_url = redirect_views.aresolve_short_url
+        with mock.patch.object(redirect_views, 'aresolve_short_url', wraps=aresolve_short_url) as aresolve, \
+                mock.patch.object(redirect_views, 'resolve_short_url') as resolve:
+            status, headers = await call_asgi('/fast-ns/go/')
+            self.assertEqual(status, 302)
+            self.assertEqual(headers[b'Location'], b'https://example.com/fast')
+            status, _ = await call_asgi('/fast-ns/missing/')
+            self.assertEqual(status, 404)
+        self.assertEqual(aresolve.call_count, 2)
+        resolve.assert_not_called()
+
+    async def test_redirects_are_served_concurrently(self):
+        """Test that one process keeps many redirects in flight instead of serving them one at a time."""
+        in_flight = 0
+        all_waiting = asyncio.Event()
+        release = asyncio.Event()
+        resolved = ResolvedURL(pk=None, original_url='https://example.com/fast', is_active=True, expiry_date=None)
+
+        async def slow_resolve(namespace_name, short_code):
+            nonlocal in_flight
+            in_flight += 1
+            if in_flight == 200:
+                all_waiting.set()
+            await release.wait()
+            return resolved
+
+        with mock.patch.object(redirect_views, 'aresolve_short_url', slow_resolve), \
+                mock.patch.object(redirect_views, 'schedule_click'):
+            requests = [asyncio.create_task(call_asgi(f'/fast-ns/go{number}/')) for number in range(200)]
+            await asyncio.wait_for(all_waiting.wait(), timeout=5)
+            release.set()
+            results = await asyncio.gather(*requests)
+        self.assertEqual({status for status, _ in results}, {302})
+
+    async def test_other_requests_reach_django(self):
+        """Test that non-redirect requests are handed to Django's ASGI handler."""
+        with mock.patch.object(redirect_views, 'aresolve_short_url') as aresolve:
+            status, _ = await call_asgi('/health/')
+            self.assertEqual(status, 200)
+            status, _ = await call_asgi('/api/short-urls/')
+            self.assertIn(status, [401, 403])
+        aresolve.assert_not_called()
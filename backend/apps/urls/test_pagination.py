@@ -0,0 +1,131 @@
+"""
+Test keyset pagination.
+
+Tests for the cursor pagination of the short URL and organization list
+endpoints.
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from .allocator import leases
+from .cache import local_cache
+from .models import Namespace, ShortURL
+from .views import ShortURLViewSet
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(APITestCase):
+    """Test cases for keyset pagination of list endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        leases.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Paged Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='paged-ns'
+        )
+        for number in range(7):
+            ShortURL.objects.create(
+                namespace=self.namespace,
+                original_url=f'https://example.com/{number}',
+                short_code=f'page{number}',
+                created_by=self.user
+            )
+        # Rows sharing a created_at are told apart by id
+        ShortURL.objects.filter(short_code__in=['page2', 'page3', 'page4']).update(created_at=timezone.now())
+        self.expected = [
+            str(pk) for pk in ShortURL.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+
+    def get_auth_headers(self):
+        refresh = RefreshToken.for_user(self.user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+    def get(self, url, **params):
+        response = self.client.get(url, params, **self.get_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, url, **params):
+        pages = [self.get(url, **params)]
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+        return pages
+
+    def test_pages_follow_created_at_and_id(self):
+        """Test that following next links returns every row once, newest first."""
+        for url, params in [
+            ('/api/short-urls/', {}),
+            ('/api/short-urls/by_namespace/', {'namespace_id': str(self.namespace.pk)}),
+            (f'/api/organizations/{self.organization.pk}/short_urls/', {}),
+        ]:
+            pages = self.walk(url, page_size=3, **params)
+            self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+            self.assertEqual([item['id'] for page in pages for item in page['results']], self.expected)
+            self.assertIsNone(pages[0]['previous'])
+            self.assertNotIn('count', pages[0])
+
+            # Previous links lead back to the same pages
+            previous = self.get(pages[2]['previous'])
+            self.assertEqual(previous['results'], pages[1]['results'])
+            first = self.get(previous['previous'])
+            self.assertEqual(first['results'], pages[0]['results'])
+            self.assertIsNone(first['previous'])
+
+    def test_deep_pages_cost_the_same(self):
+        """Test that a later page runs the same queries as the first."""
+        pages = self.walk('/api/short-urls/', page_size=2)
+
+        def count_queries(url, **params):
+            with CaptureQueriesContext(connection) as queries:
+                self.get(url, **params)
+            return len(queries)
+
+        self.assertEqual(count_queries('/api/short-urls/', page_size=2), count_queries(pages[1]['next']))
+
+    @override_settings(API_PAGINATION_COUNT_LIMIT=5)
+    def test_optional_capped_count(self):
+        """Test that counts are only returned on request and capped."""
+        page = self.get('/api/short-urls/', count='true')
+        self.assertEqual((page['count'], page['count_capped']), (5, True))
+        page = self.get(f'/api/organizations/{self.organization.pk}/namespaces/', count='true')
+        self.assertEqual((page['count'], page['count_capped']), (1, False))
+
+    def test_page_size_limits(self):
+        """Test that page sizes are capped by the endpoint's maximum."""
+        with mock.patch.object(ShortURLViewSet, 'max_page_size', 4):
+            page = self.get('/api/short-urls/', page_size=100)
+        self.assertEqual(len(page['results']), 4)
+        with override_settings(API_PAGE_SIZE=5):
+            page = self.get('/api/short-urls/', page_size='many')
+        self.assertEqual(len(page['results']), 5)
+
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected."""
+        response = self.client.get('/api/short-urls/', {'cursor': 'not-a-cursor'}, **self.get_auth_headers())
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,240 @@
+"""
+Test redirect resolution cache.
+
+Tests for the cached short URL resolution path and its invalidation.
+"""
+import asyncio
+import time
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from . import clicks
+from .clicks import flush_clicks
+from . import cache as resolution_cache
+from .cache import LocalResolutionCache, local_cache, resolution_cache_key, resolve_short_url
+from .models import Namespace, ShortURL
+from .redirect_views import redirect_short_url_async
+
+User = get_user_model()
+
+
+class RedirectCacheTest(TestCase):
+    """Test cases for the redirect resolution cache."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Cache Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='cache-ns'
+        )
+        self.short_url = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code='abc123',
+            created_by=self.user
+        )
+
+    def test_warm_lookup_runs_no_queries(self):
+        """Test that a cached resolution does not hit the database."""
+        resolve_short_url('cache-ns', 'abc123')
+        with self.assertNumQueries(0):
+            resolved = resolve_short_url('cache-ns', 'abc123')
+        self.assertEqual(resolved.original_url, 'https://example.com/landing')
+        self.assertEqual(resolved.pk, self.short_url.pk)
+
+    def test_local_hit_skips_shared_cache(self):
+        """Test that a locally cached resolution survives a shared cache flush."""
+        resolve_short_url('cache-ns', 'abc123')
+        cache.delete(resolution_cache_key('cache-ns', 'abc123'))
+        hits = local_cache.hits
+        with self.assertNumQueries(0):
+            resolve_short_url('cache-ns', 'abc123')
+        self.assertEqual(local_cache.hits, hits + 1)
+
+    def test_redirect_uses_cache(self):
+        """Test that the redirect view resolves through the cache."""
+        response = self.client.get('/cache-ns/abc123/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], 'https://example.com/landing')
+        self.assertIsNotNone(cache.get(resolution_cache_key('cache-ns', 'abc123')))
+
+        flush_clicks()
+        self.short_url.refresh_from_db()
+        self.assertEqual(self.short_url.click_count, 1)
+
+    def test_save_invalidates_entry(self):
+        """Test that editing a short URL drops the stale resolution."""
+        resolve_short_url('cache-ns', 'abc123')
+        self.short_url.original_url = 'https://example.com/other'
+        self.short_url.save()
+        self.assertEqual(
+            resolve_short_url('cache-ns', 'abc123').original_url,
+            'https://example.com/other'
+        )
+
+    def test_short_code_change_invalidates_old_key(self):
+        """Test that changing the short code drops the old key."""
+        resolve_short_url('cache-ns', 'abc123')
+        self.short_url.short_code = 'new123'
+        self.short_url.save()
+        self.assertIsNone(resolve_short_url('cache-ns', 'abc123'))
+
+    def test_delete_invalidates_entry(self):
+        """Test that deleting a short URL drops its resolution."""
+        resolve_short_url('cache-ns', 'abc123')
+        self.short_url.delete()
+        self.assertIsNone(resolve_short_url('cache-ns', 'abc123'))
+
+    def test_namespace_rename_invalidates_entries(self):
+        """Test that renaming a namespace drops resolutions under the old name."""
+        resolve_short_url('cache-ns', 'abc123')
+        self.namespace.name = 'renamed-ns'
+        self.namespace.save()
+        self.assertIsNone(resolve_short_url('cache-ns', 'abc123'))
+        self.assertIsNotNone(resolve_short_url('renamed-ns', 'abc123'))
+
+    def test_namespace_delete_invalidates_entries(self):
+        """Test that deleting a namespace drops all of its resolutions."""
+        resolve_short_url('cache-ns', 'abc123')
+        self.namespace.delete()
+        self.assertIsNone(resolve_short_url('cache-ns', 'abc123'))
+
+    def test_miss_is_negatively_cached(self):
+        """Test that repeated lookups of an unknown code skip the database."""
+        response = self.client.get('/cache-ns/missing/')
+        self.assertEqual(response.status_code, 404)
+        with self.assertNumQueries(0):
+            response = self.client.get('/cache-ns/missing/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_clears_negative_entry(self):
+        """Test that creating a short URL clears its cached miss."""
+        self.assertIsNone(resolve_short_url('cache-ns', 'later1'))
+        ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/later',
+            short_code='later1',
+            created_by=self.user
+        )
+        self.assertEqual(
+            resolve_short_url('cache-ns', 'later1').original_url,
+            'https://example.com/later'
+        )
+
+    def test_inactive_returns_not_found(self):
+        """Test that an inactive short URL gets a minimal 404."""
+        self.short_url.is_active = False
+        self.short_url.save()
+        response = self.client.get('/cache-ns/abc123/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn(b'not active', response.content)
+
+    def test_expired_returns_gone(self):
+        """Test that an expired short URL gets a minimal 410."""
+        ShortURL.objects.filter(pk=self.short_url.pk).update(
+            expiry_date=timezone.now() - timedelta(days=1)
+        )
+        response = self.client.get('/cache-ns/abc123/')
+        self.assertEqual(response.status_code, 410)
+        self.assertIn(b'expired', response.content)
+
+    async def test_async_redirect(self):
+        """Test that the async view redirects and records the click in the background."""
+        request = AsyncRequestFactory().get('/cache-ns/abc123/')
+        response = await redirect_short_url_async(request, 'cache-ns', 'abc123')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], 'https://example.com/landing')
+        await asyncio.gather(*clicks._background_clicks)
+
+        response = await redirect_short_url_async(request, 'cache-ns', 'missing')
+        self.assertEqual(response.status_code, 404)
+
+        await sync_to_async(flush_clicks)()
+        short_url = await ShortURL.objects.aget(pk=self.short_url.pk)
+        self.assertEqual(short_url.click_count, 1)
+
+
+@override_settings(CACHES=settings.REDIS_CACHES)
+class SharedRedirectCacheTest(RedirectCacheTest):
+    """Test cases for the redirect cache with the shared tier in Redis."""
+
+
+@override_settings(CACHES=settings.REDIS_CACHES)
+class LocalResolutionCacheTest(TestCase):
+    """Test cases for the in-process LRU layer."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.local = LocalResolutionCache(max_size=2, timeout=60, version_interval=0)
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted when full."""
+        self.local.set('a', 1)
+        self.local.set('b', 2)
+        self.local.get('a')
+        self.local.set('c', 3)
+        self.assertIsNone(self.local.get('b'))
+        self.assertEqual(self.local.get('a'), 1)
+        self.assertEqual(self.local.stats()['evictions'], 1)
+
+    def test_expired_entries_miss(self):
+        """Test that entries past their TTL are not returned."""
+        self.local.timeout = -1
+        self.local.set('a', 1)
+        self.assertIsNone(self.local.get('a'))
+        self.assertEqual(self.local.stats()['misses'], 1)
+
+    def test_applied_changes_evict_only_changed_keys(self):
+        """Test that logged changes evict their keys and unknown changes clear everything."""
+        self.local.apply_changes(5, None, 0)
+        self.local.set('a', 1)
+        self.local.set('b', 2)
+        self.local.apply_changes(6, ['a'], 0)
+        self.assertIsNone(self.local.get('a'))
+        self.assertEqual(self.local.get('b'), 2)
+
+        self.local.apply_version(7, 0)
+        self.assertIsNone(self.local.get('b'))
+
+        # A counter that went backwards (Redis restarted) cannot be matched to the log
+        self.local.set('a', 1)
+        self.local.apply_changes(1, [], 0)
+        self.assertIsNone(self.local.get('a'))
+        self.assertEqual(self.local.version, 1)
+
+    def test_other_process_invalidation_evicts_one_key(self):
+        """Test that an invalidation elsewhere evicts just that key from this process."""
+        resolution_cache._poll_changes(time.monotonic())
+        local_cache.set(('ns', 'kept'), 1)
+        local_cache.set(('ns', 'changed'), 2)
+        # Logged by another process, so this process's entries are untouched until it polls
+        resolution_cache._log_changes([('ns', 'changed')])
+        self.assertEqual(local_cache.get(('ns', 'changed')), 2)
+
+        resolution_cache._poll_changes(time.monotonic())
+        self.assertIsNone(local_cache.get(('ns', 'changed')))
+        self.assertEqual(local_cache.get(('ns', 'kept')), 1)
+
+        # Versions trimmed before this process read them clear everything
+        with self.settings(SHORT_URL_CHANGE_LOG_VERSIONS=1):
+            resolution_cache._log_changes([('ns', 'other')])
+            resolution_cache._log_changes([('ns', 'other')])
+        resolution_cache._poll_changes(time.monotonic())
+        self.assertIsNone(local_cache.get(('ns', 'kept')))
@@ -0,0 +1,157 @@
+"""
+Test redirect caching policies.
+
+Tests for per-link and per-namespace redirect status codes, cache headers
+and purge events.
+"""
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from .cache import local_cache
+from .models import Namespace, RedirectStatus, ShortURL
+from .purge import PURGE_CHANNEL, cache_refresh_token, is_cache_refresh, refresh_edge_cache
+
+User = get_user_model()
+
+
+@override_settings(SHORT_URL_REDIRECT_EDIT_GRACE=0)
+class RedirectPolicyTest(TestCase):
+    """Test cases for redirect caching policies."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Policy Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='policy-ns',
+            redirect_status=RedirectStatus.MOVED_PERMANENTLY,
+            redirect_max_age=3600,
+            redirect_s_maxage=86400
+        )
+        self.short_url = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code='abc123',
+            created_by=self.user
+        )
+
+    def test_default_policy_is_uncached_found(self):
+        """Test that links without a policy keep the plain 302."""
+        Namespace.objects.filter(pk=self.namespace.pk).update(
+            redirect_status=RedirectStatus.FOUND, redirect_max_age=0, redirect_s_maxage=0
+        )
+        response = self.client.get('/policy-ns/abc123/')
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('Cache-Control', response)
+
+    def test_namespace_policy(self):
+        """Test that namespace defaults set the status and cache headers."""
+        response = self.client.get('/policy-ns/abc123/')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], 'https://example.com/landing')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600, s-maxage=86400')
+        self.assertEqual(response['X-Accel-Expires'], '86400')
+
+    def test_link_policy_overrides_namespace(self):
+        """Test that per-link settings win over namespace defaults."""
+        self.short_url.redirect_status = RedirectStatus.PERMANENT_REDIRECT
+        self.short_url.redirect_s_maxage = 60
+        self.short_url.save()
+        response = self.client.get('/policy-ns/abc123/')
+        self.assertEqual(response.status_code, 308)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600, s-maxage=60')
+
+    def test_expiring_link_is_temporary_and_capped(self):
+        """Test that links with an expiry date are never permanent or cached past expiry."""
+        self.short_url.expiry_date = timezone.now() + timedelta(seconds=120)
+        self.short_url.save()
+        response = self.client.get('/policy-ns/abc123/')
+        self.assertEqual(response.status_code, 302)
+        max_age = int(response['X-Accel-Expires'])
+        self.assertLessEqual(max_age, 120)
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={max_age}, s-maxage={max_age}'
+        )
+
+    @override_settings(SHORT_URL_REDIRECT_EDIT_GRACE=300)
+    def test_recently_edited_link_is_not_browser_cached(self):
+        """Test that a fresh edit keeps browsers from pinning the redirect."""
+        response = self.client.get('/policy-ns/abc123/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=0, s-maxage=86400')
+
+    @override_settings(SHORT_URL_SURROGATE_KEY_HEADER='Surrogate-Key')
+    def test_surrogate_keys(self):
+        """Test that edge-cacheable redirects are tagged with surrogate keys."""
+        response = self.client.get('/policy-ns/abc123/')
+        self.assertEqual(
+            response['Surrogate-Key'],
+            'shorturl:policy-ns:abc123 namespace:policy-ns'
+        )
+
+    def test_namespace_policy_change_invalidates(self):
+        """Test that changing namespace defaults re-resolves its links."""
+        self.assertEqual(self.client.get('/policy-ns/abc123/').status_code, 301)
+        self.namespace.redirect_status = RedirectStatus.TEMPORARY_REDIRECT
+        self.namespace.save()
+        self.assertEqual(self.client.get('/policy-ns/abc123/').status_code, 307)
+
+    def test_invalidation_publishes_purge_event(self):
+        """Test that editing a link announces the paths to purge."""
+        client = mock.Mock()
+        with mock.patch('apps.urls.purge.get_redis_client', return_value=client):
+            self.short_url.original_url = 'https://example.com/other'
+            self.short_url.save()
+        channel, payload = client.publish.call_args.args
+        self.assertEqual(channel, PURGE_CHANNEL)
+        self.assertEqual(json.loads(payload), {
+            'paths': ['/policy-ns/abc123/'],
+            'surrogate_keys': ['shorturl:policy-ns:abc123'],
+        })
+
+    def test_cache_refresh_is_not_a_click(self):
+        """Test that an edge cache refresh with a valid token records no click or hot link hit."""
+        with mock.patch('apps.urls.redirect_views.record_click') as record_click, \
+                mock.patch('apps.urls.redirect_views.note_hit') as note_hit:
+            response = self.client.get(
+                '/policy-ns/abc123/', HTTP_X_CACHE_REFRESH=cache_refresh_token('/policy-ns/abc123/')
+            )
+            self.assertEqual(response.status_code, 301)
+            record_click.assert_not_called()
+            note_hit.assert_not_called()
+
+            # Forged or borrowed tokens count as visits
+            for token in ['1', cache_refresh_token('/policy-ns/other/')]:
+                self.client.get('/policy-ns/abc123/', HTTP_X_CACHE_REFRESH=token)
+            self.assertEqual(record_click.call_count, 2)
+            self.assertEqual(note_hit.call_count, 2)
+
+    def test_refresh_request_targets_served_host(self):
+        """Test that refresh requests are signed and sent under the host nginx caches the redirect for."""
+        with mock.patch('http.client.HTTPConnection') as connection_class:
+            connection_class.return_value.getresponse.return_value.status = 301
+            status = refresh_edge_cache('http://nginx:80', '/policy-ns/abc123/', host='s.example.com')
+        self.assertEqual(status, 301)
+        connection_class.assert_called_once_with('nginx:80', timeout=5)
+        method, path = connection_class.return_value.request.call_args.args
+        headers = connection_class.return_value.request.call_args.kwargs['headers']
+        self.assertEqual((method, path, headers['Host']), ('GET', '/policy-ns/abc123/', 's.example.com'))
+        request = mock.Mock(path=path, META={'HTTP_X_CACHE_REFRESH': headers['X-Cache-Refresh']})
+        self.assertTrue(is_cache_refresh(request))
@@ -0,0 +1,202 @@
+"""
+Test click rollups.
+
+Tests for rolling click events up on flush, the analytics endpoints and
+rebuilding rollups from raw events.
+"""
+import json
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.organizations.models import Organization, OrganizationMembership
+from . import events
+from .cache import local_cache
+from .events import CLICK_EVENTS_KEY, buffer_event_locally, flush_click_events
+from .models import DailyNamespaceClickRollup, HourlyClickRollup, Namespace, ShortURL
+from .redis_client import get_redis_client
+
+User = get_user_model()
+
+
+def click_at(short_url, moment, visitor=""):
+    """Buffer a click event of a short URL at a given time."""
+    event = json.dumps([str(short_url.pk), moment.timestamp(), "", "TestAgent/1.0", visitor, ""])
+    client = get_redis_client()
+    if client is None:
+        buffer_event_locally(event)
+    else:
+        client.rpush(CLICK_EVENTS_KEY, event)
+
+
+class ClickRollupTest(APITestCase):
+    """Test cases for click rollups and analytics."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        events._local_events.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Rollup Organization',
+            owner=self.user
+        )
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.organization,
+            role=OrganizationMembership.Role.ADMIN
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='rollup-ns'
+        )
+        self.short_url = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code='abc123',
+            created_by=self.user
+        )
+        self.other = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/other',
+            short_code='def456',
+            created_by=self.user
+        )
+
+    def get_auth_headers(self, user):
+        """Get authentication headers for a user."""
+        refresh = RefreshToken.for_user(user)
+        return {
+            'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'
+        }
+
+    def click_history(self):
+        """Buffer clicks over two days and flush them in two batches."""
+        click_at(self.short_url, datetime(2024, 3, 1, 9, 5, tzinfo=dt_timezone.utc), 'visitor-a')
+        click_at(self.short_url, datetime(2024, 3, 1, 9, 55, tzinfo=dt_timezone.utc), 'visitor-b')
+        click_at(self.other, datetime(2024, 3, 1, 11, 0, tzinfo=dt_timezone.utc), 'visitor-a')
+        flush_click_events()
+        click_at(self.short_url, datetime(2024, 3, 1, 9, 30, tzinfo=dt_timezone.utc), 'visitor-a')
+        click_at(self.short_url, datetime(2024, 3, 3, 0, 10, tzinfo=dt_timezone.utc), 'visitor-c')
+        flush_click_events()
+
+    def test_flush_upserts_rollups(self):
+        """Test that flushing adds to existing rollup rows instead of duplicating them."""
+        self.click_history()
+        hourly = HourlyClickRollup.objects.get(
+            short_url=self.short_url,
+            hour=datetime(2024, 3, 1, 9, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(hourly.clicks, 3)
+        self.assertEqual(HourlyClickRollup.objects.count(), 3)
+        self.assertEqual(
+            dict(DailyNamespaceClickRollup.objects.values_list('day', 'clicks')),
+            {date(2024, 3, 1): 4, date(2024, 3, 3): 1}
+        )
+
+    def test_short_url_analytics(self):
+        """Test the zero-filled time series of a short URL."""
+        self.click_history()
+        url = reverse('api:shorturl-analytics', args=[self.short_url.pk])
+        response = self.client.get(
+            url,
+            {'start': '2024-03-01', 'end': '2024-03-03', 'bucket': 'day'},
+            **self.get_auth_headers(self.user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([point['clicks'] for point in response.data['series']], [3, 0, 1])
+        self.assertEqual([point['unique_visitors'] for point in response.data['series']], [2, 0, 1])
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['unique_visitors'], 3)
+
+        response = self.client.get(
+            url,
+            {'start': '2024-03-01T08:00:00Z', 'end': '2024-03-01T11:00:00Z', 'bucket': 'hour'},
+            **self.get_auth_headers(self.user)
+        )
+        self.assertEqual([point['clicks'] for point in response.data['series']], [0, 3, 0])
+
+    def test_organization_analytics(self):
+        """Test the time series of all namespaces in an organization."""
+        self.click_history()
+        url = reverse('api:organization-analytics', args=[self.organization.pk])
+        response = self.client.get(
+            url,
+            {'start': '2024-02-26', 'end': '2024-03-10', 'bucket': 'week'},
+            **self.get_auth_headers(self.user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['series'][0]['start'], '2024-02-26T00:00:00+00:00')
+        self.assertEqual([point['clicks'] for point in response.data['series']], [5, 0])
+        self.assertEqual(response.data['unique_visitors'], 3)
+
+    def test_short_url_unique_visitors(self):
+        """Test that flushing keeps the all-time unique visitor estimate of each link."""
+        self.click_history()
+        self.short_url.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.short_url.unique_visitors, 3)
+        self.assertEqual(self.other.unique_visitors, 1)
+
+        # Saving a stale copy must not overwrite the sketch
+        stale = ShortURL.objects.get(pk=self.other.pk)
+        click_at(self.other, datetime(2024, 3, 2, 8, 0, tzinfo=dt_timezone.utc), 'visitor-d')
+        flush_click_events()
+        stale.title = 'Renamed'
+        stale.save()
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.unique_visitors, 2)
+
+        url = reverse('api:shorturl-detail', args=[self.short_url.pk])
+        response = self.client.get(url, **self.get_auth_headers(self.user))
+        self.assertEqual(response.data['unique_visitors'], 3)
+
+    def test_invalid_parameters(self):
+        """Test that bad buckets and ranges are rejected."""
+        headers = self.get_auth_headers(self.user)
+        url = reverse('api:shorturl-analytics', args=[self.short_url.pk])
+        for params in (
+            {'bucket': 'minute'},
+            {'start': 'yesterday'},
+            {'start': '2024-03-02', 'end': '2024-03-01'},
+            {'start': '2000-01-01', 'end': '2024-01-01', 'bucket': 'hour'},
+        ):
+            response = self.client.get(url, params, **headers)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+        url = reverse('api:organization-analytics', args=[self.organization.pk])
+        response = self.client.get(url, {'bucket': 'hour'}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_from_events(self):
+        """Test that rebuilding a range restores rollups from raw click events."""
+        self.click_history()
+        HourlyClickRollup.objects.update(clicks=100, visitors=b'')
+        DailyNamespaceClickRollup.objects.all().delete()
+
+        call_command('rebuild_click_rollups', '--since=2024-03-01', '--until=2024-03-02', verbosity=0)
+        self.assertEqual(
+            sorted(HourlyClickRollup.objects.values_list('clicks', flat=True)),
+            [1, 3, 100]
+        )
+        self.assertEqual(
+            dict(DailyNamespaceClickRollup.objects.values_list('day', 'clicks')),
+            {date(2024, 3, 1): 4}
+        )
+        url = reverse('api:shorturl-analytics', args=[self.short_url.pk])
+        response = self.client.get(
+            url,
+            {'start': '2024-03-01', 'end': '2024-03-01'},
+            **self.get_auth_headers(self.user)
+        )
+        self.assertEqual(response.data['unique_visitors'], 2)
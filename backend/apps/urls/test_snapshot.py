@@ -0,0 +1,174 @@
+"""
+Test redirect snapshots.
+
+Tests for the snapshot file format and resolving short URLs through it.
+"""
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from apps.organizations.models import Organization
+from . import cache as resolution_cache
+from .cache import local_cache, resolve_short_url, snapshot_store, write_redirect_snapshot
+from .models import Namespace, ShortURL
+from .snapshot import SnapshotReader, SnapshotStore, build_snapshot
+
+User = get_user_model()
+
+
+class SnapshotFileTest(SimpleTestCase):
+    """Test cases for building and reading snapshot files."""
+
+    def setUp(self):
+        """Set up a scratch directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'redirects.snapshot')
+
+    def row(self, pk, original_url):
+        """Build a snapshot row for ns/a with the default redirect policy."""
+        return ('ns', 'a', pk, original_url, True, None, 302, 0, 0, None)
+
+    def test_round_trip(self):
+        """Test that every written row can be looked up again."""
+        expiry = timezone.now() + timedelta(days=1)
+        rows = [
+            ('ns-%d' % (n % 3), 'code%d' % n, uuid.uuid4(), 'https://example.com/%d' % n, True,
+             expiry if n % 2 else None, 301 if n % 2 else 302, n, 2 * n, expiry)
+            for n in range(500)
+        ]
+        self.assertEqual(build_snapshot(self.path, rows, version=7), 500)
+
+        reader = SnapshotReader(self.path)
+        self.assertEqual(reader.version, 7)
+        for namespace_name, short_code, *resolved in rows:
+            self.assertEqual(reader.lookup(namespace_name, short_code), tuple(resolved))
+        self.assertIsNone(reader.lookup('ns-0', 'missing'))
+        self.assertIsNone(reader.lookup('ns-1', 'code0'))
+
+    def test_store_swaps_and_shadows(self):
+        """Test that the store picks up new files and skips changed keys."""
+        pk = uuid.uuid4()
+        build_snapshot(self.path, [self.row(pk, 'https://example.com/a')], version=1)
+        store = SnapshotStore(self.path, refresh_interval=0)
+        self.assertTrue(store.reload_if_changed(0))
+        self.assertEqual(store.lookup('ns', 'a')[0], pk)
+
+        store.shadow([(('ns', 'a'), 2)])
+        self.assertIsNone(store.lookup('ns', 'a'))
+
+        # A snapshot built before the change keeps the key shadowed
+        build_snapshot(self.path, [self.row(pk, 'https://example.com/old')], version=1)
+        os.utime(self.path, ns=(0, 1))
+        self.assertTrue(store.reload_if_changed(1))
+        self.assertIsNone(store.lookup('ns', 'a'))
+
+        build_snapshot(self.path, [self.row(pk, 'https://example.com/new')], version=2)
+        os.utime(self.path, ns=(0, 2))
+        self.assertTrue(store.reload_if_changed(2))
+        self.assertEqual(store.lookup('ns', 'a')[1], 'https://example.com/new')
+
+
+@override_settings(CACHES=settings.REDIS_CACHES)
+class SnapshotResolutionTest(TestCase):
+    """Test cases for resolving short URLs through the snapshot."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        local_cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'redirects.snapshot')
+        for attribute, value in (('path', path), ('refresh_interval', 0), ('reader', None),
+                                 ('_shadowed', {}), ('changes_seen', 0), ('_discarded_identity', None)):
+            patcher = mock.patch.object(snapshot_store, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.organization = Organization.objects.create(
+            name='Snapshot Organization',
+            owner=self.user
+        )
+        self.namespace = Namespace.objects.create(
+            organization=self.organization,
+            name='snap-ns'
+        )
+        self.short_url = ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/landing',
+            short_code='abc123',
+            created_by=self.user
+        )
+        ShortURL.objects.create(
+            namespace=self.namespace,
+            original_url='https://example.com/off',
+            short_code='off123',
+            created_by=self.user,
+            is_active=False
+        )
+
+    def test_cold_lookup_runs_no_queries(self):
+        """Test that a snapshotted short URL resolves without the cache or database."""
+        self.assertEqual(write_redirect_snapshot(), 1)
+        # Clearing the whole cache would reset the change log and retire the snapshot
+        cache.delete('urls:resolve:snap-ns:abc123')
+        with self.assertNumQueries(0):
+            resolved = resolve_short_url('snap-ns', 'abc123')
+        self.assertEqual(resolved.pk, self.short_url.pk)
+        self.assertEqual(resolved.original_url, 'https://example.com/landing')
+        self.assertIsNone(cache.get('urls:resolve:snap-ns:abc123'))
+
+    def test_inactive_links_fall_through(self):
+        """Test that links left out of the snapshot still resolve from the database."""
+        write_redirect_snapshot()
+        self.assertFalse(resolve_short_url('snap-ns', 'off123').is_active)
+        self.assertIsNone(resolve_short_url('snap-ns', 'missing'))
+
+    def test_changes_after_build_are_not_served_stale(self):
+        """Test that edits made after the build bypass the snapshot."""
+        write_redirect_snapshot()
+        resolve_short_url('snap-ns', 'abc123')
+        self.short_url.original_url = 'https://example.com/other'
+        self.short_url.save()
+        self.assertEqual(
+            resolve_short_url('snap-ns', 'abc123').original_url,
+            'https://example.com/other'
+        )
+        self.short_url.delete()
+        self.assertIsNone(resolve_short_url('snap-ns', 'abc123'))
+
+    def test_reset_change_log_drops_the_snapshot(self):
+        """Test that a snapshot is no longer served once the change log was reset under it."""
+        for _ in range(3):
+            resolution_cache._log_changes([('other-ns', 'code')])
+        write_redirect_snapshot()
+        resolve_short_url('snap-ns', 'abc123')
+        self.assertIsNotNone(snapshot_store.reader)
+
+        # Redis restarts empty and another process edits the link
+        cache.clear()
+        ShortURL.objects.filter(pk=self.short_url.pk).update(original_url='https://example.com/other')
+        resolution_cache._log_changes([('snap-ns', 'abc123')])
+        local_cache.clear()
+        self.assertEqual(resolve_short_url('snap-ns', 'abc123').original_url, 'https://example.com/other')
+        self.assertIsNone(snapshot_store.reader)
+
+        # The next build is picked up again
+        write_redirect_snapshot()
+        local_cache.clear()
+        cache.delete('urls:resolve:snap-ns:abc123')
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_short_url('snap-ns', 'abc123').original_url, 'https://example.com/other')
@@ -3,16 +3,32 @@ URL views.
 
 Moved from apps.links.views - handles namespace and short URL management.
 """
+import os
+from django.conf import settings
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import Namespace, ShortURL
+from .analytics import LINK_BUCKETS, link_time_series, parse_time_series_params
+from .bulk import bulk_create_short_urls
+from .bulk_actions import apply_bulk_action, filter_short_urls
+from .cache import local_cache
+from .exports import export_response
+from .imports import detect_format
+from .models import BulkActionJob, ImportJob, Namespace, ShortURL
+from .tasks import import_short_urls, run_bulk_action
 from .serializers import (
     NamespaceSerializer,
     ShortURLSerializer,
-    ShortURLCreateSerializer
+    ShortURLCreateSerializer,
+    ShortURLBulkItemSerializer,
+    ShortURLBulkActionSerializer,
+    ShortURLBulkActionFilterSerializer,
+    ImportJobSerializer,
+    BulkActionJobSerializer
 )
 from apps.organizations.permissions import (
     CanCreateNamespace,
@@ -21,6 +37,20 @@ from apps.organizations.permissions import (
     IsOrganizationMember
 )
 
+UUID_PATTERN = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+
+
+def filter_by_expiry(queryset, query_params):
+    """Apply the ?expired=true|false filter shared by short URL list endpoints."""
+    expired = query_params.get('expired')
+    if expired is None:
+        return queryset
+    if expired.lower() in ('true', '1'):
+        return queryset.expired()
+    if expired.lower() in ('false', '0'):
+        return queryset.unexpired()
+    raise ValidationError({"expired": "Must be true or false."})
+
 
 class NamespaceViewSet(viewsets.ModelViewSet):
     """ViewSet for managing namespaces."""
@@ -62,11 +92,51 @@ class NamespaceViewSet(viewsets.ModelViewSet):
         
         serializer.save()
 
+    @action(detail=True, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request, pk=None):
+        """Start a background import of short URLs from an uploaded CSV or NDJSON file."""
+        namespace = self.get_object()
+        if not CanManageShortURL().has_object_permission(request, self, namespace):
+            raise PermissionDenied(
+                "Only organization admins and editors can import short URLs."
+            )
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({"file": "No file was uploaded."})
+        file_format = request.data.get('format') or detect_format(upload)
+        if file_format not in ImportJob.Format.values:
+            raise ValidationError({"format": "Must be csv or ndjson."})
+
+        job = ImportJob.objects.create(
+            namespace=namespace,
+            created_by=request.user,
+            file=upload,
+            format=file_format
+        )
+        transaction.on_commit(lambda: import_short_urls.delay(str(job.pk)))
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path=f'imports/(?P<job_id>{UUID_PATTERN})')
+    def import_status(self, request, pk=None, job_id=None):
+        """Get the progress of an import."""
+        namespace = self.get_object()
+        job = get_object_or_404(ImportJob, pk=job_id, namespace=namespace)
+        return Response(ImportJobSerializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Stream the short URLs of a namespace and their stats as CSV or NDJSON (?file_format=&gzip=true)."""
+        namespace = self.get_object()
+        short_urls = filter_by_expiry(namespace.shorturls.order_by('-created_at'), request.query_params)
+        return export_response(short_urls, request.query_params, f"short-urls-{namespace.name}")
+
 
 class ShortURLViewSet(viewsets.ModelViewSet):
     """ViewSet for managing short URLs."""
     queryset = ShortURL.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    max_page_size = settings.SHORT_URL_MAX_PAGE_SIZE
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -76,22 +146,32 @@ class ShortURLViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return short URLs from namespaces where user has access."""
-        return ShortURL.objects.filter(
+        queryset = ShortURL.objects.filter(
             namespace__organization__memberships__user=self.request.user
-        ).distinct()
+        ).select_related('namespace__organization', 'created_by').distinct()
+        return filter_by_expiry(queryset, self.request.query_params)
 
     def get_permissions(self):
         """Set permissions based on action."""
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             # Admins and editors can manage short URLs
             permission_classes = [permissions.IsAuthenticated, CanManageShortURL]
-        elif self.action in ['list', 'retrieve']:
+        elif self.action in ['list', 'retrieve', 'analytics']:
             # All organization members can view short URLs
             permission_classes = [permissions.IsAuthenticated, CanViewShortURL]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    def create(self, request, *args, **kwargs):
+        """Create a short URL; with reuse_existing, an existing link for the URL is returned with 200."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        response_status = status.HTTP_200_OK if serializer.reused else status.HTTP_201_CREATED
+        return Response(serializer.data, status=response_status, headers=headers)
+
     def perform_create(self, serializer):
         """Create short URL and validate user permissions."""
         namespace = serializer.validated_data['namespace']
@@ -105,6 +185,79 @@ class ShortURLViewSet(viewsets.ModelViewSet):
         
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create many short URLs at once, reporting a result for every entry."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"detail": "Expected a list of short URLs."})
+        if len(items) > settings.SHORT_URL_BULK_MAX_ITEMS:
+            raise ValidationError({
+                "detail": f"At most {settings.SHORT_URL_BULK_MAX_ITEMS} short URLs can be created at once."
+            })
+
+        permission = CanManageShortURL()
+        results = bulk_create_short_urls(
+            items,
+            request.user,
+            ShortURLBulkItemSerializer,
+            lambda namespace: permission.has_object_permission(request, None, namespace)
+        )
+        created = sum(result["status"] == "created" for result in results)
+        reused = sum(result["status"] == "reused" for result in results)
+        failed = len(results) - created - reused
+        if not failed:
+            response_status = status.HTTP_201_CREATED
+        elif created or reused:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {"created": created, "reused": reused, "failed": failed, "results": results},
+            status=response_status
+        )
+
+    @action(detail=False, methods=['post'])
+    def bulk_action(self, request):
+        """Activate, deactivate, set the expiry date of or delete the short URLs of a namespace matching a filter."""
+        serializer = ShortURLBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        namespace = data['namespace']
+
+        # One permission check covers every link, as they all belong to the namespace
+        permission = CanManageShortURL()
+        if not permission.has_object_permission(request, None, namespace):
+            raise PermissionDenied(
+                "Only organization admins and editors can change short URLs."
+            )
+
+        filters = ShortURLBulkActionFilterSerializer(data['filter']).data
+        matched = filter_short_urls(namespace, filters).count()
+        if matched > settings.SHORT_URL_BULK_ACTION_SYNC_LIMIT:
+            job = BulkActionJob.objects.create(
+                namespace=namespace,
+                created_by=request.user,
+                operation=data['operation'],
+                filters=filters,
+                expiry_date=data.get('expiry_date'),
+                rows_matched=matched
+            )
+            transaction.on_commit(lambda: run_bulk_action.delay(str(job.pk)))
+            return Response(BulkActionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        affected = apply_bulk_action(namespace, data['operation'], filters, data.get('expiry_date'))
+        return Response({"operation": data['operation'], "matched": matched, "affected": affected})
+
+    @action(detail=False, methods=['get'], url_path=f'bulk_action/(?P<job_id>{UUID_PATTERN})')
+    def bulk_action_status(self, request, job_id=None):
+        """Get the progress of a background bulk action."""
+        job = get_object_or_404(
+            BulkActionJob.objects.filter(namespace__organization__memberships__user=request.user).distinct(),
+            pk=job_id
+        )
+        return Response(BulkActionJobSerializer(job).data)
+
     @action(detail=True, methods=['post'])
     def redirect(self, request, pk=None):
         """Handle URL redirection and increment click count."""
@@ -155,9 +308,24 @@ class ShortURLViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        short_urls = self.get_queryset().filter(namespace=namespace)
+        short_urls = self.paginate_queryset(self.get_queryset().filter(namespace=namespace))
         serializer = self.get_serializer(short_urls, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """Get the click time series of a short URL (?start=&end=&bucket=hour|day|week|month)."""
+        short_url = self.get_object()
+        start, end, bucket = parse_time_series_params(request.query_params, LINK_BUCKETS)
+        return Response(link_time_series([short_url.pk], start, end, bucket))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Get the resolution cache counters of the worker serving this request (Staff only)."""
+        return Response({
+            "pid": os.getpid(),
+            "local_cache": local_cache.stats(),
+        })
 
     def _has_namespace_access(self, namespace):
         """Check if user has access to the namespace."""
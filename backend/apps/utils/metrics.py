@@ -0,0 +1,207 @@
+"""
+Prometheus metrics.
+
+Metrics are prometheus_client objects. When PROMETHEUS_MULTIPROC_DIR is set
+(see compose/production/django/start) every worker process writes its values
+to mmap-backed files in that directory and /metrics merges the files of all
+workers, so a scrape sees the whole gunicorn server, not one worker.
+
+Gauges that describe shared state (click buffers, Celery queues) are read
+from Redis and the broker at scrape time instead of being tracked per worker.
+"""
+import hmac
+import ipaddress
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+# Redis hash of Celery queue name -> "lag seconds:measured at" written by workers
+QUEUE_LAG_KEY = "metrics:celery:lag"
+UNRESOLVED_VIEW = "<unresolved>"
+
+REQUEST_LATENCY = Histogram(
+    "linknest_request_duration_seconds",
+    "Time spent producing a response, by view name",
+    ["view"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "linknest_requests_total",
+    "Responses sent, by view name and status class",
+    ["view", "status"],
+)
+DB_QUERIES = Histogram(
+    "linknest_db_queries_per_request",
+    "Database queries run while producing a response, by view name",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+REDIRECT_LOOKUPS = Histogram(
+    "linknest_redirect_lookup_seconds",
+    "Time to resolve a short URL, by the tier that answered",
+    ["tier"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+# Redirects answered by the fast path middleware are only timed here, with
+# children bound once so the redirect path skips the label lookup
+LOOKUP_TIERS = {
+    tier: REDIRECT_LOOKUPS.labels(tier)
+    for tier in ("local", "snapshot", "shared", "bloom", "db")
+}
+
+
+class SharedStateCollector:
+    """Reports click buffer depth and Celery queue lag at scrape time."""
+
+    def collect(self):
+        from apps.urls import events
+        from apps.urls.clicks import DIRTY_CLICKS_KEY
+        from apps.urls.redis_client import get_redis_client
+
+        buffers = GaugeMetricFamily(
+            "linknest_click_buffer_depth",
+            "Items waiting to be flushed to the database, by buffer",
+            labels=["buffer"],
+        )
+        lag = GaugeMetricFamily(
+            "linknest_celery_queue_lag_seconds",
+            "Time the last task picked up from each Celery queue spent waiting",
+            labels=["queue"],
+        )
+        client = get_redis_client()
+        if client is None:
+            buffers.add_metric(["click_events"], len(events._local_events))
+        else:
+            pipe = client.pipeline(transaction=False)
+            pipe.llen(events.CLICK_EVENTS_KEY)
+            pipe.scard(DIRTY_CLICKS_KEY)
+            pipe.hgetall(QUEUE_LAG_KEY)
+            event_depth, dirty_links, lags = pipe.execute()
+            buffers.add_metric(["click_events"], event_depth)
+            # Events buffered in this process while Redis was failing
+            buffers.add_metric(["local_click_events"], len(events._local_events))
+            buffers.add_metric(["click_counts"], dirty_links)
+            for queue, value in lags.items():
+                seconds, _, _ = value.decode().partition(":")
+                lag.add_metric([queue.decode()], float(seconds))
+        yield buffers
+        yield lag
+        yield from self._queue_depths()
+
+    def _queue_depths(self):
+        from config.celery_app import app
+
+        depths = GaugeMetricFamily(
+            "linknest_celery_queue_depth",
+            "Tasks waiting in each Celery queue",
+            labels=["queue"],
+        )
+        try:
+            with app.connection_for_read() as broker:
+                broker.ensure_connection(max_retries=1)
+                channel = broker.default_channel
+                for queue in app.amqp.queues:
+                    depths.add_metric([queue], channel.queue_declare(queue, passive=True).message_count)
+        except Exception:
+            # The broker being down must not break the scrape of everything else
+            pass
+        yield depths
+
+
+shared_state_registry = CollectorRegistry()
+shared_state_registry.register(SharedStateCollector())
+
+
+def record_queue_lag(queue, seconds):
+    """Remember how long a task waited in its queue (called by Celery workers)."""
+    from apps.urls.redis_client import get_redis_client
+
+    client = get_redis_client()
+    if client is not None and queue:
+        client.hset(QUEUE_LAG_KEY, queue, f"{seconds:.6f}:{time.time():.0f}")
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None and match.view_name else UNRESOLVED_VIEW
+
+
+def _record_request(request, response, started, queries=None):
+    view = _view_name(request)
+    REQUEST_LATENCY.labels(view).observe(time.perf_counter() - started)
+    REQUESTS.labels(view, f"{response.status_code // 100}xx").inc()
+    if queries is not None:
+        DB_QUERIES.labels(view).observe(queries[0])
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Time every response and count its database queries, labelled by view name."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            # Queries run in sync_to_async threads on other connections; only time them
+            _record_request(request, response, started)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            queries = [0]
+
+            def count_query(execute, sql, params, many, context):
+                queries[0] += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_query):
+                response = get_response(request)
+            _record_request(request, response, started, queries)
+            return response
+
+    return middleware
+
+
+def _scrape_allowed(request):
+    token = settings.METRICS_AUTH_TOKEN
+    if token:
+        return hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}")
+    # Requests relayed by a proxy carry its address, not the client's
+    if "HTTP_X_FORWARDED_FOR" in request.META:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    """Expose metrics in the Prometheus text format to authorized scrapers."""
+    if not _scrape_allowed(request):
+        return HttpResponseForbidden()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        output = generate_latest(registry)
+    else:
+        output = generate_latest(REGISTRY)
+    output += generate_latest(shared_state_registry)
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
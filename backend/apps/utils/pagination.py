@@ -0,0 +1,155 @@
+"""
+API pagination.
+
+List endpoints are paginated by keyset on (created_at, id), newest first: a
+cursor holds the position of the row a page starts after, and the next page
+is read with one range scan of the matching (..., created_at, id) index. Page N
+costs the same as page 1, and rows added meanwhile never shift a page.
+
+Counting every matching row costs a full scan, so totals are only returned
+with ?count=true and are capped at API_PAGINATION_COUNT_LIMIT.
+"""
+import base64
+import json
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+def _replace_query_param(url, key, value):
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    params = parse_qs(query, keep_blank_values=True)
+    if value is None:
+        params.pop(key, None)
+    else:
+        params[key] = [value]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(params.items()), doseq=True), fragment))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (created_at, id), newest first.
+
+    Query parameters:
+        cursor: Opaque cursor from a previous page's next or previous link
+        page_size: Rows per page, up to the view's max_page_size
+        count: true to include the (capped) number of matching rows
+
+    Views may set max_page_size, also per action through @action(max_page_size=...).
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size(self, request, view):
+        max_page_size = getattr(view, "max_page_size", None) or settings.API_MAX_PAGE_SIZE
+        page_size = settings.API_PAGE_SIZE
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            requested = None
+        if requested is not None and requested > 0:
+            page_size = requested
+        return min(page_size, max_page_size)
+
+    def encode_cursor(self, row, reverse):
+        position = {"t": row.created_at.isoformat(), "i": str(row.pk)}
+        if reverse:
+            position["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode()
+        return _replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        """Return (created_at, id, reverse) from the cursor parameter, or None on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            created_at = parse_datetime(position["t"])
+            pk = model._meta.pk.to_python(position["i"])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk, bool(position.get("r"))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request, view)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() == "true":
+            limit = settings.API_PAGINATION_COUNT_LIMIT
+            self.count = queryset[:limit + 1].count()
+            self.count_capped = self.count > limit
+            self.count = min(self.count, limit)
+
+        reverse = False
+        page = queryset.order_by("-created_at", "-id")
+        if cursor is not None:
+            created_at, pk, reverse = cursor
+            if reverse:
+                # Rows before the cursor, read nearest first and flipped back below
+                page = queryset.order_by("created_at", "id").filter(
+                    Q(created_at__gte=created_at),
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                )
+            else:
+                # The redundant bound lets the database seek the index before applying the tie-break
+                page = page.filter(
+                    Q(created_at__lte=created_at),
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+        rows = list(page[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.rows = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.encode_cursor(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.rows:
+            # Past the last row: go back to the first page
+            return _replace_query_param(self.base_url, self.cursor_query_param, None)
+        return self.encode_cursor(self.rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            response["count"] = self.count
+            response["count_capped"] = self.count_capped
+        response["results"] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer", "description": "Present with ?count=true"},
+                "count_capped": {"type": "boolean", "description": "Present with ?count=true"},
+                "results": schema,
+            },
+        }
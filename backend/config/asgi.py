@@ -0,0 +1,32 @@
+"""
+ASGI config for hirethon-template project.
+
+This module contains the ASGI application used by ASGI servers such as
+uvicorn (``gunicorn config.asgi -k uvicorn.workers.UvicornWorker``). It should
+expose a module-level variable named ``application``.
+
+Sync views, including the DRF viewsets, keep working unchanged under ASGI.
+Short URL redirects are answered by RedirectASGIMiddleware before Django's
+handler, so they stay on the event loop instead of occupying a thread while
+waiting on the cache.
+
+"""
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# hirethon_template directory.
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "hirethon_template"))
+# We defer to a DJANGO_SETTINGS_MODULE already in the environment.
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+# This application object is used by any ASGI server configured to use this file.
+django_application = get_asgi_application()
+
+from apps.urls.middleware import RedirectASGIMiddleware  # noqa: E402
+
+application = RedirectASGIMiddleware(django_application)
@@ -1,6 +1,8 @@
 import os
+import time
 
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun
 
 # set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.local")
@@ -15,3 +17,21 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    """Stamp tasks with their publish time so workers can report queue lag."""
+    headers.setdefault("published_at", time.time())
+
+
+@task_prerun.connect
+def report_queue_lag(task=None, **kwargs):
+    """Report how long a task waited in its queue before a worker picked it up."""
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is None:
+        return
+    from apps.utils.metrics import record_queue_lag
+
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    record_queue_lag(queue, time.time() - published_at)
@@ -0,0 +1,26 @@
+"""
+Gunicorn server hooks.
+
+Used by compose/production/django/start (``gunicorn -c config/gunicorn.py``).
+"""
+import os
+
+
+def post_worker_init(worker):
+    """Pre-load the hottest short URLs so a fresh worker does not meet them with cold caches."""
+    from apps.urls.hotlinks import prewarm_hot_links
+
+    try:
+        warmed = prewarm_hot_links()
+    except Exception:
+        worker.log.exception("Could not pre-warm the redirect cache")
+        return
+    worker.log.info("Pre-warmed the redirect cache with %d hot links", warmed)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the shared metrics directory."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -55,6 +55,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 ROOT_URLCONF = "config.urls"
 # https://docs.djangoproject.com/en/dev/ref/settings/#wsgi-application
 WSGI_APPLICATION = "config.wsgi.application"
+# https://docs.djangoproject.com/en/dev/howto/deployment/asgi/
+ASGI_APPLICATION = "config.asgi.application"
 
 # APPS
 # ------------------------------------------------------------------------------
@@ -136,6 +138,9 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    # Must stay first: answers short URL redirects without the rest of the stack
+    "apps.urls.middleware.redirect_fast_path_middleware",
+    "apps.utils.metrics.metrics_middleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -297,6 +302,37 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_WORKER_SEND_TASK_EVENTS = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_send_sent_event
 CELERY_TASK_SEND_SENT_EVENT = True
+# https://docs.celeryq.dev/en/stable/userguide/periodic-tasks.html#beat-entries
+CELERY_BEAT_SCHEDULE = {
+    "flush-click-counts": {
+        "task": "apps.urls.tasks.flush_click_counts",
+        "schedule": env.float("SHORT_URL_CLICK_FLUSH_INTERVAL", default=10.0),
+    },
+    "flush-click-events": {
+        "task": "apps.urls.tasks.flush_click_event_buffer",
+        "schedule": env.float("SHORT_URL_CLICK_EVENT_FLUSH_INTERVAL", default=5.0),
+    },
+    "fold-click-counter-shards": {
+        "task": "apps.urls.tasks.fold_click_counter_shards",
+        "schedule": env.float("SHORT_URL_CLICK_SHARD_FOLD_INTERVAL", default=60.0),
+    },
+    "build-redirect-snapshot": {
+        "task": "apps.urls.tasks.build_redirect_snapshot",
+        "schedule": env.float("SHORT_URL_SNAPSHOT_BUILD_INTERVAL", default=15 * 60.0),
+    },
+    "rebuild-short-code-filter": {
+        "task": "apps.urls.tasks.rebuild_short_code_filter",
+        "schedule": env.float("SHORT_URL_BLOOM_REBUILD_INTERVAL", default=24 * 60 * 60.0),
+    },
+    "deactivate-expired-short-urls": {
+        "task": "apps.urls.tasks.deactivate_expired_short_urls",
+        "schedule": env.float("SHORT_URL_EXPIRY_INTERVAL", default=60.0),
+    },
+    "decay-hot-links": {
+        "task": "apps.urls.tasks.decay_hot_link_scores",
+        "schedule": env.float("SHORT_URL_HOT_LINKS_DECAY_INTERVAL", default=10 * 60.0),
+    },
+}
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = env.bool("DJANGO_ACCOUNT_ALLOW_REGISTRATION", True)
@@ -329,7 +365,14 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "apps.utils.pagination.KeysetPagination",
 }
+# Rows per page of list endpoints, unless ?page_size= asks for fewer or more
+API_PAGE_SIZE = env.int("API_PAGE_SIZE", default=50)
+# Largest ?page_size= a list endpoint accepts, unless the view sets its own max_page_size
+API_MAX_PAGE_SIZE = env.int("API_MAX_PAGE_SIZE", default=100)
+# Highest total ?count=true reports; counting past it would scan the whole result
+API_PAGINATION_COUNT_LIMIT = env.int("API_PAGINATION_COUNT_LIMIT", default=10_000)
 
 # django-cors-headers - https://github.com/adamchainz/django-cors-headers#setup
 CORS_URLS_REGEX = r"^/api/.*$"
@@ -361,6 +404,92 @@ ADMIN_INDEX_TITLE = "Welcome to {} Admin Portal".format("hirethon_template".titl
 
 # Frontend URL for generating short URLs
 FRONTEND_BASE_URL = env("FRONTEND_BASE_URL", default="http://localhost:8000")
+# Bearer token Prometheus must send to scrape /metrics; without one, only direct
+# (unproxied) requests from METRICS_ALLOWED_NETWORKS may scrape
+METRICS_AUTH_TOKEN = env("METRICS_AUTH_TOKEN", default="")
+METRICS_ALLOWED_NETWORKS = env.list("METRICS_ALLOWED_NETWORKS", default=["127.0.0.0/8", "::1/128"])
+
+# Serve short URL redirects from the async view (enable when running under ASGI)
+SHORT_URL_ASYNC_REDIRECTS = env.bool("SHORT_URL_ASYNC_REDIRECTS", default=False)
+# Seconds a resolved short URL stays in the redirect cache
+SHORT_URL_CACHE_TIMEOUT = env.int("SHORT_URL_CACHE_TIMEOUT", default=60 * 60)
+# Seconds an unknown (namespace, short code) pair is remembered as missing
+SHORT_URL_NEGATIVE_CACHE_TIMEOUT = env.int("SHORT_URL_NEGATIVE_CACHE_TIMEOUT", default=60)
+# Per-worker in-memory LRU in front of the shared cache (0 disables it)
+SHORT_URL_LOCAL_CACHE_SIZE = env.int("SHORT_URL_LOCAL_CACHE_SIZE", default=200_000)
+SHORT_URL_LOCAL_CACHE_TIMEOUT = env.int("SHORT_URL_LOCAL_CACHE_TIMEOUT", default=5 * 60)
+# Seconds between checks of the shared invalidation change log
+SHORT_URL_LOCAL_CACHE_VERSION_INTERVAL = env.float("SHORT_URL_LOCAL_CACHE_VERSION_INTERVAL", default=1.0)
+# Invalidations kept in the change log; a worker further behind clears its whole LRU
+SHORT_URL_CHANGE_LOG_VERSIONS = env.int("SHORT_URL_CHANGE_LOG_VERSIONS", default=100_000)
+# Clicks per second (per worker, over SHORT_URL_SHARDING_WINDOW seconds) that switch a
+# link to SHORT_URL_CLICK_SHARDS counter rows when clicks are written directly (0 disables)
+SHORT_URL_SHARDING_THRESHOLD = env.float("SHORT_URL_SHARDING_THRESHOLD", default=50.0)
+SHORT_URL_SHARDING_WINDOW = env.float("SHORT_URL_SHARDING_WINDOW", default=10.0)
+SHORT_URL_CLICK_SHARDS = env.int("SHORT_URL_CLICK_SHARDS", default=16)
+# Per-click history (ClickEvent): buffered events before backpressure kicks in, the
+# fraction of events kept once the buffer is full, and rows written per batch
+SHORT_URL_CLICK_EVENTS = env.bool("SHORT_URL_CLICK_EVENTS", default=True)
+SHORT_URL_CLICK_EVENT_BUFFER_SIZE = env.int("SHORT_URL_CLICK_EVENT_BUFFER_SIZE", default=1_000_000)
+SHORT_URL_CLICK_EVENT_OVERFLOW_SAMPLE_RATE = env.float("SHORT_URL_CLICK_EVENT_OVERFLOW_SAMPLE_RATE", default=0.01)
+SHORT_URL_CLICK_EVENT_BATCH_SIZE = env.int("SHORT_URL_CLICK_EVENT_BATCH_SIZE", default=5000)
+# Per-process event buffer used without Redis: its size and seconds between flushes
+# by a thread of the same process (0 leaves it to flush_click_events)
+SHORT_URL_CLICK_EVENT_LOCAL_BUFFER_SIZE = env.int("SHORT_URL_CLICK_EVENT_LOCAL_BUFFER_SIZE", default=10_000)
+SHORT_URL_CLICK_EVENT_LOCAL_FLUSH_INTERVAL = env.float("SHORT_URL_CLICK_EVENT_LOCAL_FLUSH_INTERVAL", default=5.0)
+# request.META keys holding the client IP (first address is used) and country code;
+# behind a reverse proxy the IP key must name the header it forwards (see production.py)
+SHORT_URL_CLIENT_IP_HEADER = env("SHORT_URL_CLIENT_IP_HEADER", default="REMOTE_ADDR")
+SHORT_URL_COUNTRY_HEADER = env("SHORT_URL_COUNTRY_HEADER", default="HTTP_CF_IPCOUNTRY")
+# Memory-mapped redirect snapshot shared by web workers and the Celery worker
+# that builds it (empty disables it)
+SHORT_URL_SNAPSHOT_PATH = env("SHORT_URL_SNAPSHOT_PATH", default="")
+# Seconds between checks for a newer snapshot file and for changes made since its build
+SHORT_URL_SNAPSHOT_REFRESH_INTERVAL = env.float("SHORT_URL_SNAPSHOT_REFRESH_INTERVAL", default=1.0)
+# Bloom filter of existing short codes, kept in Redis (off with other cache backends):
+# expected number of codes (0 disables it) and false-positive rate at that size;
+# rebuild the filter after changing either
+SHORT_URL_BLOOM_CAPACITY = env.int("SHORT_URL_BLOOM_CAPACITY", default=10_000_000)
+SHORT_URL_BLOOM_ERROR_RATE = env.float("SHORT_URL_BLOOM_ERROR_RATE", default=0.01)
+# Seconds after an edit during which a redirect is neither permanent nor browser-cacheable
+SHORT_URL_REDIRECT_EDIT_GRACE = env.int("SHORT_URL_REDIRECT_EDIT_GRACE", default=5 * 60)
+# Response header carrying CDN surrogate keys on edge-cacheable redirects, e.g.
+# "Surrogate-Key" or "Cache-Tag" (empty disables it)
+SHORT_URL_SURROGATE_KEY_HEADER = env("SHORT_URL_SURROGATE_KEY_HEADER", default="")
+# nginx redirect caches that consume_redirect_purges refreshes on invalidation
+SHORT_URL_PURGE_ENDPOINTS = env.list("SHORT_URL_PURGE_ENDPOINTS", default=[])
+# Hosts short URLs are served under, which the nginx cache key includes (empty uses
+# each endpoint's own host)
+SHORT_URL_PURGE_HOSTS = env.list("SHORT_URL_PURGE_HOSTS", default=[])
+# Hot link tracking: counters per worker (0 disables it), seconds between writes of
+# worker counts to Redis, and hottest links loaded into a new worker's caches at boot
+SHORT_URL_HOT_LINKS_CAPACITY = env.int("SHORT_URL_HOT_LINKS_CAPACITY", default=1000)
+SHORT_URL_HOT_LINKS_PERSIST_INTERVAL = env.float("SHORT_URL_HOT_LINKS_PERSIST_INTERVAL", default=30.0)
+SHORT_URL_HOT_LINKS_PREWARM = env.int("SHORT_URL_HOT_LINKS_PREWARM", default=500)
+# Length of the first generated short codes in a namespace; longer codes follow once
+# every code of this length has been handed out
+SHORT_URL_CODE_MIN_LENGTH = env.int("SHORT_URL_CODE_MIN_LENGTH", default=6)
+# Key of the permutation that scrambles generated short codes (defaults to one derived
+# from SECRET_KEY); changing it makes new codes collide with old ones and be retried
+SHORT_URL_CODE_KEY = env("SHORT_URL_CODE_KEY", default="")
+# Generated short code indices each process reserves at once (1 reserves per link)
+SHORT_URL_CODE_BLOCK_SIZE = env.int("SHORT_URL_CODE_BLOCK_SIZE", default=1000)
+# Most short URLs one POST /api/short-urls/bulk/ request may create
+SHORT_URL_BULK_MAX_ITEMS = env.int("SHORT_URL_BULK_MAX_ITEMS", default=10_000)
+# Short URL imports: rows created per transaction, rejected rows kept for the status
+# resource, and seconds an import task may run
+SHORT_URL_IMPORT_CHUNK_SIZE = env.int("SHORT_URL_IMPORT_CHUNK_SIZE", default=1000)
+SHORT_URL_IMPORT_MAX_ERRORS = env.int("SHORT_URL_IMPORT_MAX_ERRORS", default=1000)
+SHORT_URL_IMPORT_TIME_LIMIT = env.int("SHORT_URL_IMPORT_TIME_LIMIT", default=60 * 60)
+# Rows fetched from the database cursor and encoded at a time by short URL exports
+SHORT_URL_EXPORT_CHUNK_SIZE = env.int("SHORT_URL_EXPORT_CHUNK_SIZE", default=2000)
+# Bulk short URL actions: most links changed within the request (larger actions run in the
+# background), links deleted or changed per transaction, and seconds a background action may run
+SHORT_URL_BULK_ACTION_SYNC_LIMIT = env.int("SHORT_URL_BULK_ACTION_SYNC_LIMIT", default=10_000)
+SHORT_URL_BULK_ACTION_CHUNK_SIZE = env.int("SHORT_URL_BULK_ACTION_CHUNK_SIZE", default=1000)
+SHORT_URL_BULK_ACTION_TIME_LIMIT = env.int("SHORT_URL_BULK_ACTION_TIME_LIMIT", default=60 * 60)
+# Largest ?page_size= of short URL list endpoints
+SHORT_URL_MAX_PAGE_SIZE = env.int("SHORT_URL_MAX_PAGE_SIZE", default=500)
 
 CLOUDFRONT_KEY_ID = env("CLOUDFRONT_KEY_ID", default="")
 CLOUDFRONT_DOMAIN = env("CLOUDFRONT_DOMAIN", default="")
@@ -172,3 +172,6 @@ SPECTACULAR_SETTINGS["SERVERS"] = [  # noqa: F405
 ]
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Requests reach Django through Traefik (and the nginx redirect cache), so
+# REMOTE_ADDR is a proxy; Traefik sets X-Real-IP to the connecting client
+SHORT_URL_CLIENT_IP_HEADER = env("SHORT_URL_CLIENT_IP_HEADER", default="HTTP_X_REAL_IP")
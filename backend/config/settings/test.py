@@ -2,6 +2,9 @@
 With these settings, tests run faster.
 """
 
+import fakeredis
+from fakeredis import aioredis
+
 from .base import *  # noqa
 from .base import env
 
@@ -30,3 +33,25 @@ EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore # noqa: F405
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Tests flush the in-process click event buffer themselves
+SHORT_URL_CLICK_EVENT_LOCAL_FLUSH_INTERVAL = 0
+# django-redis on an in-process fakeredis server, for tests of the Redis code paths:
+# @override_settings(CACHES=settings.REDIS_CACHES)
+_fake_redis_server = fakeredis.FakeServer()
+REDIS_CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://fakeredis:6379/0",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "CONNECTION_POOL_KWARGS": {
+                "connection_class": fakeredis.FakeConnection,
+                "server": _fake_redis_server,
+            },
+            "ASYNC_CONNECTION_POOL_KWARGS": {
+                "connection_class": aioredis.FakeConnection,
+                "server": _fake_redis_server,
+            },
+        },
+    }
+}
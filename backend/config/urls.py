@@ -7,7 +7,8 @@ from django.views import defaults as default_views
 from django.views.generic import TemplateView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.authtoken.views import obtain_auth_token
-from apps.urls.redirect_views import redirect_short_url
+from apps.urls.redirect_views import redirect_short_url, redirect_short_url_async
+from apps.utils.metrics import metrics_view
 
 # Customize admin site
 admin.site.site_header = settings.ADMIN_SITE_HEADER
@@ -16,6 +17,7 @@ admin.site.index_title = settings.ADMIN_INDEX_TITLE
 
 urlpatterns = [
     path("health/", lambda request: HttpResponse(status=200)),
+    path("metrics", metrics_view, name="metrics"),
     path("", TemplateView.as_view(template_name="pages/home.html"), name="home"),
     path("about/", TemplateView.as_view(template_name="pages/about.html"), name="about"),
     # Django Admin, use {% url 'admin:index' %}
@@ -38,7 +40,11 @@ urlpatterns = [
     # Custom auth endpoints
     path("api/auth/", include("apps.users.auth_urls")),
     # Short URL redirects - must be after API URLs to avoid conflicts
-    path("<str:namespace_name>/<str:short_code>/", redirect_short_url, name="short_url_redirect"),
+    path(
+        "<str:namespace_name>/<str:short_code>/",
+        redirect_short_url_async if settings.SHORT_URL_ASYNC_REDIRECTS else redirect_short_url,
+        name="short_url_redirect",
+    ),
     # Your stuff: custom urls includes go here
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from "../contexts/AuthContext";
-import { organizationsAPI } from '../services/api';
+import { organizationsAPI, fetchAllPages } from '../services/api';
 
 const Dashboard = () => {
   const { user, logout } = useAuth();
@@ -20,8 +20,7 @@ const Dashboard = () => {
   const fetchOrganizations = async () => {
     try {
       setLoading(true);
-      const response = await organizationsAPI.list();
-      setOrganizations(response.data.results || response.data);
+      setOrganizations(await fetchAllPages(organizationsAPI.list()));
     } catch (err) {
       setError('Failed to fetch organizations');
       console.error('Error fetching organizations:', err);
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { namespacesAPI, shortUrlsAPI, organizationsAPI } from '../services/api';
+import { namespacesAPI, shortUrlsAPI, organizationsAPI, fetchAllPages } from '../services/api';
 
 const Namespace = () => {
   const { id } = useParams();
@@ -42,13 +42,13 @@ const Namespace = () => {
   const fetchNamespaceData = async () => {
     try {
       setLoading(true);
-      const [namespaceResponse, shortUrlsResponse] = await Promise.all([
+      const [namespaceResponse, namespaceShortUrls] = await Promise.all([
         namespacesAPI.get(id),
-        shortUrlsAPI.getByNamespace(id)
+        fetchAllPages(shortUrlsAPI.getByNamespace(id))
       ]);
       
       setNamespace(namespaceResponse.data);
-      setShortUrls(shortUrlsResponse.data);
+      setShortUrls(namespaceShortUrls);
       
       // Get user role from the organization
       if (namespaceResponse.data.organization) {
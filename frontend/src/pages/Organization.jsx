@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { organizationsAPI, namespacesAPI } from '../services/api';
+import { organizationsAPI, namespacesAPI, fetchAllPages } from '../services/api';
 
 const Organization = () => {
   const { id } = useParams();
@@ -38,19 +38,18 @@ const Organization = () => {
   const fetchOrganizationData = async () => {
     try {
       setLoading(true);
-      const [orgResponse, namespacesResponse] = await Promise.all([
+      const [orgResponse, allNamespaces] = await Promise.all([
         organizationsAPI.get(id),
-        namespacesAPI.list()
+        fetchAllPages(namespacesAPI.list())
       ]);
       
       setOrganization(orgResponse.data);
-      setNamespaces(namespacesResponse.data.results || namespacesResponse.data);
+      setNamespaces(allNamespaces);
       setUserRole(orgResponse.data.current_user_role);
       
       // Try to fetch members, but don't fail if user doesn't have permission
       try {
-        const membersResponse = await organizationsAPI.getMembers(id);
-        setMembers(membersResponse.data);
+        setMembers(await fetchAllPages(organizationsAPI.getMembers(id)));
       } catch (membersErr) {
         // User doesn't have permission to view members, set empty array
         console.log('User does not have permission to view members');
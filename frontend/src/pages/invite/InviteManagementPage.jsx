@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { organizationsAPI } from '../../services/api';
+import { organizationsAPI, fetchAllPages } from '../../services/api';
 
 const InviteManagementPage = () => {
   const { id } = useParams();
@@ -25,13 +25,13 @@ const InviteManagementPage = () => {
   const fetchData = async () => {
     try {
       setLoading(true);
-      const [orgResponse, invitesResponse] = await Promise.all([
+      const [orgResponse, allInvites] = await Promise.all([
         organizationsAPI.get(id),
-        organizationsAPI.getInvites(id)
+        fetchAllPages(organizationsAPI.getInvites(id))
       ]);
       
       setOrganization(orgResponse.data);
-      setInvites(invitesResponse.data);
+      setInvites(allInvites);
     } catch (err) {
       setError('Failed to fetch organization data');
       console.error('Error fetching data:', err);
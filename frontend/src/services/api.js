@@ -58,6 +58,20 @@ api.interceptors.response.use(
   }
 );
 
+// Follow the `next` cursor of a paginated list response and return every row
+export const fetchAllPages = async (request) => {
+  let response = await request;
+  if (!response.data.results) {
+    return response.data;
+  }
+  const results = [...response.data.results];
+  while (response.data.next) {
+    response = await api.get(response.data.next);
+    results.push(...response.data.results);
+  }
+  return results;
+};
+
 // Auth API functions
 export const authAPI = {
   register: (userData) => api.post('/auth/register/', userData),